@@ -61,9 +61,7 @@ def create_app():
     limiter.init_app(app)
     
     
-    # Cache configuration
-    app.config['CACHE_TYPE'] = 'simple'
-    app.config['CACHE_DEFAULT_TIMEOUT'] = 300  # 5 minutes timeout
+    # Cache configuration (CACHE_TYPE, CACHE_REDIS_URL and CACHE_DEFAULT_TIMEOUT come from Config)
     
     # Initialize cache
     cache.init_app(app)
@@ -125,6 +123,18 @@ def create_app():
     app.register_blueprint(dspace_bp)  # DSpace 7+ integration
     app.register_blueprint(dspace_legacy_bp)  # DSpace 6.x Legacy integration
 
+    # Upstream refused locally (open circuit or concurrency limit) and no stale copy was available
+    from app.http_client import CircuitOpen, UpstreamBusy
+
+    @app.errorhandler(CircuitOpen)
+    @app.errorhandler(UpstreamBusy)
+    def upstream_unavailable(error):
+        response = jsonify({'error': f'Upstream service unavailable: {error}'})
+        response.status_code = 503
+        # Retry-After must be a whole number of seconds
+        response.headers['Retry-After'] = str(int(error.retry_after))
+        return response
+
     # Add root-level DocID route
     from app.routes.docid_root import setup_docid_root_route
     setup_docid_root_route(app)
@@ -0,0 +1,408 @@
+"""
+Shared outbound HTTP client for the registry proxies and identifier services.
+
+Every call to an external API (ROR, ORCID, ISNI, Ringgold, ARKs, RAiD, CSTR, Local
+Contexts, DataCite, Crossref) goes through `http_client` so that:
+
+- each upstream host gets its own pooled keep-alive session;
+- requests without an explicit timeout get (OUTBOUND_CONNECT_TIMEOUT, OUTBOUND_READ_TIMEOUT);
+- failed connections, and 429/5xx answers to idempotent requests, are retried a bounded
+  number of times with jittered exponential backoff; a Retry-After longer than
+  OUTBOUND_READ_TIMEOUT is not waited out, the 429/503 goes back to the caller instead;
+- at most OUTBOUND_MAX_CONCURRENCY requests (overridable per host) are in flight per
+  upstream in each worker, and callers fail fast with UpstreamBusy instead of queueing
+  behind a slow upstream until every worker slot is taken;
+- each host has a circuit breaker: after OUTBOUND_BREAKER_FAILURES consecutive failures
+  calls fail immediately with CircuitOpen for OUTBOUND_BREAKER_RESET seconds, then a
+  single half-open probe decides whether the circuit closes again.
+
+GETs made with stale_if_error=True keep their last good response in the shared cache and
+serve it (marked stale) while the circuit is open or the upstream errors.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+from app import cache
+
+logger = logging.getLogger(__name__)
+
+# Methods that are safe to replay after a read error or a retryable status
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Fallbacks when no app context is available (e.g. module-level use in scripts)
+DEFAULTS = {
+    'OUTBOUND_CONNECT_TIMEOUT': 3.05,
+    'OUTBOUND_READ_TIMEOUT': 10,
+    'OUTBOUND_MAX_RETRIES': 2,
+    'OUTBOUND_BACKOFF_FACTOR': 0.3,
+    'OUTBOUND_POOL_SIZE': 10,
+    'OUTBOUND_MAX_CONCURRENCY': 8,
+    'OUTBOUND_CONCURRENCY_LIMITS': '',
+    'OUTBOUND_QUEUE_TIMEOUT': 2,
+    'OUTBOUND_BREAKER_FAILURES': 5,
+    'OUTBOUND_BREAKER_RESET': 30,
+    'OUTBOUND_STALE_TTL': 86400,
+}
+
+STALE_WARNING = '110 - "Response is Stale"'
+
+
+class UpstreamBusy(requests.exceptions.ConnectionError):
+    """Raised when an upstream's concurrency limit is reached and no slot frees up in time"""
+
+    # Slots free up within a request's lifetime, so clients may retry almost at once
+    retry_after = 2
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """Raised without contacting an upstream whose circuit breaker is open"""
+
+    def __init__(self, *args, retry_after: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Whole seconds until the breaker allows a probe
+        self.retry_after = retry_after
+
+
+# Errors raised without a usable upstream answer; the app answers them with 503 and Retry-After
+UPSTREAM_UNAVAILABLE = (CircuitOpen, UpstreamBusy)
+
+
+class JitteredRetry(Retry):
+    """
+    urllib3 Retry whose backoff gets up to one backoff_factor of random jitter, and which
+    gives up instead of sleeping when an upstream asks to wait longer than max_retry_after
+    """
+
+    def __init__(self, *args, max_retry_after: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kwargs):
+        kwargs.setdefault('max_retry_after', self.max_retry_after)
+        return super().new(**kwargs)
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, self.backoff_factor) if self.backoff_factor else backoff
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and self.max_retry_after is not None:
+            retry_after = self.get_retry_after(response)
+            # The sleep would hold a concurrency slot; with raise_on_status=False the
+            # caller gets the 429/503 response itself
+            if retry_after is not None and retry_after > self.max_retry_after:
+                raise MaxRetryError(_pool, url, ResponseError(
+                    f"Retry-After of {retry_after:.0f}s exceeds {self.max_retry_after}s"
+                ))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _setting(key: str):
+    try:
+        return current_app.config.get(key, DEFAULTS[key])
+    except RuntimeError:
+        return DEFAULTS[key]
+
+
+def _parse_limits(raw: str) -> Dict[str, int]:
+    """Parse 'api.ror.org=4,pub.orcid.org=6' into {host: limit}"""
+    limits = {}
+    for item in raw.split(','):
+        host, _, limit = item.partition('=')
+        if host.strip() and limit.strip().isdigit():
+            limits[host.strip().lower()] = int(limit)
+    return limits
+
+
+def _is_upstream_failure(status_code: int) -> bool:
+    return status_code >= 500 or status_code == 429
+
+
+def _error_status(error: Exception) -> Optional[int]:
+    """HTTP status carried by a client exception (requests' HTTPError, habanero's RequestError)"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return response.status_code
+    status_code = getattr(error, 'status_code', None)
+    return status_code if isinstance(status_code, int) else None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream host.
+
+    closed: calls pass and failures are counted. open: calls are refused until
+    reset_timeout has passed. half-open: exactly one probe call passes; its outcome
+    closes the circuit or opens it for another reset_timeout.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, host: str, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only the first caller becomes the probe"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                logger.info(f"Circuit for {self.host} half-open; probing")
+                return True
+            return False
+
+    def retry_after(self) -> int:
+        """Seconds until the next probe is allowed"""
+        return max(1, int(self.reset_timeout - (time.monotonic() - self.opened_at)) + 1)
+
+    def abandon_probe(self) -> None:
+        """The half-open probe never went out; let the next caller probe instead"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.host} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.host} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+def _stale_key(key: str) -> str:
+    return f"upstream-stale:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+
+def _remember(key: str, value: Any) -> None:
+    """Keep the last good upstream result; cache errors never fail the request"""
+    try:
+        cache.set(_stale_key(key), value, timeout=_setting('OUTBOUND_STALE_TTL'))
+    except Exception as e:
+        logger.warning(f"Could not cache upstream response for {key}: {e}")
+
+
+def _recall(key: str) -> Optional[Any]:
+    try:
+        return cache.get(_stale_key(key))
+    except Exception as e:
+        logger.warning(f"Could not read cached upstream response for {key}: {e}")
+        return None
+
+
+def _stale_response(url: str, stored: Dict[str, Any]) -> requests.Response:
+    """Rebuild a requests.Response from a stored good response, marked stale"""
+    response = requests.Response()
+    response.status_code = stored['status_code']
+    response._content = stored['content']
+    response.headers['Content-Type'] = stored.get('content_type') or 'application/json'
+    response.headers['Warning'] = STALE_WARNING
+    response.url = url
+    response.encoding = stored.get('encoding')
+    response.stale = True
+    return response
+
+
+class OutboundHttpClient:
+    """Per-host pooled sessions and concurrency limits shared by every outbound call in a worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def _build_session(self) -> requests.Session:
+        retries = _setting('OUTBOUND_MAX_RETRIES')
+        retry = JitteredRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=_setting('OUTBOUND_BACKOFF_FACTOR'),
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            max_retry_after=_setting('OUTBOUND_READ_TIMEOUT'),
+            raise_on_status=False
+        )
+        pool_size = _setting('OUTBOUND_POOL_SIZE')
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _upstream(self, host: str):
+        """Get (session, concurrency slots) for a host, creating them on first use"""
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    limit = _parse_limits(_setting('OUTBOUND_CONCURRENCY_LIMITS')).get(
+                        host, _setting('OUTBOUND_MAX_CONCURRENCY')
+                    )
+                    self._slots[host] = threading.BoundedSemaphore(limit)
+                    self._breakers[host] = CircuitBreaker(
+                        host, _setting('OUTBOUND_BREAKER_FAILURES'), _setting('OUTBOUND_BREAKER_RESET')
+                    )
+                    session = self._sessions[host] = self._build_session()
+                    logger.info(f"Created outbound session for {host} (max {limit} concurrent requests)")
+        return session, self._slots[host]
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        """The circuit breaker of an upstream host"""
+        self._upstream(host)
+        return self._breakers[host]
+
+    def _send(self, method: str, url: str, timeout: Optional[object], **kwargs) -> requests.Response:
+        host = self._host(url)
+        session, slots = self._upstream(host)
+        breaker = self._breakers[host]
+        if timeout is None:
+            timeout = (_setting('OUTBOUND_CONNECT_TIMEOUT'), _setting('OUTBOUND_READ_TIMEOUT'))
+
+        # Checked before taking a slot so a dead upstream costs no worker time
+        if not breaker.allow():
+            retry_after = breaker.retry_after()
+            raise CircuitOpen(f"Circuit open for {host}; retry in {retry_after}s", retry_after=retry_after)
+        if not slots.acquire(timeout=_setting('OUTBOUND_QUEUE_TIMEOUT')):
+            logger.warning(f"Outbound concurrency limit reached for {host}")
+            breaker.abandon_probe()
+            raise UpstreamBusy(f"Too many concurrent requests to {host}")
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            breaker.record_failure()
+            raise
+        finally:
+            slots.release()
+
+        if _is_upstream_failure(response.status_code):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def request(self, method: str, url: str, timeout: Optional[object] = None, stale_if_error: bool = False,
+                **kwargs) -> requests.Response:
+        """
+        Send a request through the host's pooled session and circuit breaker.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            timeout: Seconds, or a (connect, read) tuple; defaults to the configured timeouts
+            stale_if_error: For GETs, remember the last 200 response and return it (with
+                `stale = True` and a Warning header) when the upstream is unavailable
+            **kwargs: Passed on to requests (params, json, data, headers, files, ...)
+
+        Raises:
+            CircuitOpen: The host's circuit is open and no stale response is available
+            UpstreamBusy: Too many requests to this host are already in flight
+            requests.exceptions.RequestException: The request failed after retries
+        """
+        if not stale_if_error or method.upper() != 'GET':
+            return self._send(method, url, timeout, **kwargs)
+
+        key = requests.Request('GET', url, params=kwargs.get('params')).prepare().url
+        try:
+            response = self._send(method, url, timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            stored = _recall(key)
+            if stored is None:
+                raise
+            logger.info(f"Serving stale response for {key}")
+            return _stale_response(url, stored)
+
+        if response.status_code == 200:
+            _remember(key, {
+                'status_code': response.status_code,
+                'content': response.content,
+                'content_type': response.headers.get('Content-Type'),
+                'encoding': response.encoding,
+            })
+        elif _is_upstream_failure(response.status_code):
+            stored = _recall(key)
+            if stored is not None:
+                logger.info(f"Serving stale response for {key} (upstream returned {response.status_code})")
+                return _stale_response(url, stored)
+        return response
+
+    def guarded(self, host: str, fetch: Callable[[], Any], stale_key: Optional[str] = None) -> Any:
+        """
+        Run a call made by a third-party client (e.g. habanero) behind a host's circuit breaker.
+
+        Any exception counts as a failure, except errors carrying an HTTP status below
+        500 (other than 429), which mean the upstream answered. With stale_key, the last good result is returned while the
+        upstream is unavailable.
+        """
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            retry_after = breaker.retry_after()
+            error = CircuitOpen(f"Circuit open for {host}; retry in {retry_after}s", retry_after=retry_after)
+        else:
+            try:
+                result = fetch()
+            except Exception as e:
+                status_code = _error_status(e)
+                if status_code is not None and not _is_upstream_failure(status_code):
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                error = e
+            else:
+                breaker.record_success()
+                if stale_key:
+                    _remember(stale_key, result)
+                return result
+
+        stored = _recall(stale_key) if stale_key else None
+        if stored is None:
+            raise error
+        logger.info(f"Serving stale result for {stale_key}")
+        return stored
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+
+# Singleton shared by routes and services running in this worker
+http_client = OutboundHttpClient()
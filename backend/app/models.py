@@ -243,6 +243,21 @@ class DocIdLookup(db.Model):
     # pid_assigned_by = initdb.Column(initdb.Integer, initdb.ForeignKey('app_user.user_id'))
     # docid_doi = initdb.Column(initdb.Integer, initdb.ForeignKey('docid_object.object_docid'))
 
+class HandlePool(db.Model):
+    """
+    APA handles minted in CORDRA ahead of time and claimed during publish
+    """
+
+    __tablename__ = "handle_pool"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    handle = db.Column(db.String(100), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    def __repr__(self):
+        return f"<HandlePool(id={self.id}, handle='{self.handle}', claimed_at={self.claimed_at})>"
+
 class ResourceTypes(db.Model):
     __tablename__ = 'resource_types'
 
@@ -465,6 +480,12 @@ class Publications(db.Model):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     updated_by = Column(Integer, ForeignKey('user_accounts.user_id'), nullable=True, index=True)
 
+    # Composite indexes backing keyset pagination on get-publications
+    __table_args__ = (
+        db.Index('ix_publications_published_id', 'published', 'id'),
+        db.Index('ix_publications_document_title_id', 'document_title', 'id'),
+    )
+
     # Relationships
     user_account = relationship('UserAccount', back_populates='publications', foreign_keys=[user_id])
     updated_by_user = relationship('UserAccount', foreign_keys=[updated_by])
@@ -663,6 +684,19 @@ class PublicationComments(db.Model):
     likes_count = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Keyset pagination of a publication's active top-level comments, newest first
+    __table_args__ = (
+        db.Index(
+            'ix_publication_comments_thread', publication_id, created_at.desc(), id.desc(),
+            postgresql_where=db.and_(status == 'active', parent_comment_id.is_(None))
+        ),
+        # Keyset pagination of a user's active comment history, newest first
+        db.Index(
+            'ix_publication_comments_user_history', user_id, created_at.desc(), id.desc(),
+            postgresql_where=(status == 'active')
+        ),
+    )
     
     # Relationships
     publication = db.relationship('Publications', backref=db.backref('comments', lazy='dynamic', cascade='all, delete-orphan'))
@@ -672,8 +706,15 @@ class PublicationComments(db.Model):
     def __repr__(self):
         return f"<PublicationComment(id={self.id}, publication_id={self.publication_id}, user_id={self.user_id})>"
     
-    def to_dict(self):
-        """Convert comment to dictionary for API responses"""
+    def to_dict(self, replies_count=None):
+        """
+        Convert comment to dictionary for API responses
+
+        Args:
+            replies_count (int, optional): Precomputed number of replies; avoids lazy-loading `replies`
+        """
+        if replies_count is None:
+            replies_count = len(self.replies) if self.replies else 0
         return {
             'id': self.id,
             'publication_id': self.publication_id,
@@ -689,7 +730,7 @@ class PublicationComments(db.Model):
             'likes_count': self.likes_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'replies_count': len(self.replies) if self.replies else 0
+            'replies_count': replies_count
         }
     
     @classmethod
@@ -734,10 +775,29 @@ class PublicationComments(db.Model):
             db.session.commit()
     
     def increment_likes(self):
-        """Increment the likes count for a comment"""
-        self.likes_count += 1
+        """Increment the likes count for a comment with a single atomic UPDATE"""
+        likes_count = db.session.execute(
+            db.update(PublicationComments)
+            .where(PublicationComments.id == self.id)
+            .values(likes_count=db.func.coalesce(PublicationComments.likes_count, 0) + 1)
+            .returning(PublicationComments.likes_count)
+        ).scalar()
         db.session.commit()
-        return self.likes_count
+        return likes_count
+
+
+class CommentLikes(db.Model):
+    """
+    One row per user who liked a comment, so a user can like each comment only once
+    """
+    __tablename__ = 'comment_likes'
+
+    comment_id = db.Column(db.Integer, db.ForeignKey('publication_comments.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user_accounts.user_id', ondelete='CASCADE'), primary_key=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<CommentLikes(comment_id={self.comment_id}, user_id={self.user_id})>"
 
 
 class PublicationDrafts(db.Model):
@@ -886,12 +946,17 @@ class PublicationViews(db.Model):
     __tablename__ = 'publication_views'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    publication_id = db.Column(db.Integer, db.ForeignKey('publications.id'), nullable=False, index=True)
+    publication_id = db.Column(db.Integer, db.ForeignKey('publications.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user_accounts.user_id'), nullable=True, index=True)
     ip_address = db.Column(db.String(45), nullable=True)
     user_agent = db.Column(db.Text, nullable=True)
     viewed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
+    # Partitioned by month of viewed_at (see migrations/partition_analytics_events.sql)
+    __table_args__ = (
+        db.Index('ix_publication_views_publication_id_viewed_at', 'publication_id', 'viewed_at'),
+    )
+
     # Relationships
     publication = db.relationship('Publications', backref=db.backref('views', lazy='dynamic'))
     user = db.relationship('UserAccount', backref=db.backref('viewed_publications', lazy='dynamic'))
@@ -919,7 +984,8 @@ class PublicationViews(db.Model):
         Returns:
             int: Total number of views
         """
-        return cls.query.filter_by(publication_id=publication_id).count()
+        total = db.session.get(AnalyticsCounterTotal, ('publication', publication_id, 'views'))
+        return total.count if total else 0
 
     @classmethod
     def track_view(cls, publication_id, user_id=None, ip_address=None, user_agent=None):
@@ -953,12 +1019,18 @@ class FileDownloads(db.Model):
     __tablename__ = 'file_downloads'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    publication_file_id = db.Column(db.Integer, db.ForeignKey('publications_files.id'), nullable=True, index=True)
-    publication_document_id = db.Column(db.Integer, db.ForeignKey('publication_documents.id'), nullable=True, index=True)
+    publication_file_id = db.Column(db.Integer, db.ForeignKey('publications_files.id'), nullable=True)
+    publication_document_id = db.Column(db.Integer, db.ForeignKey('publication_documents.id'), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user_accounts.user_id'), nullable=True, index=True)
     ip_address = db.Column(db.String(45), nullable=True)
     downloaded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
+    # Partitioned by month of downloaded_at (see migrations/partition_analytics_events.sql)
+    __table_args__ = (
+        db.Index('ix_file_downloads_publication_file_id_downloaded_at', 'publication_file_id', 'downloaded_at'),
+        db.Index('ix_file_downloads_publication_document_id_downloaded_at', 'publication_document_id', 'downloaded_at'),
+    )
+
     # Relationships
     publication_file = db.relationship('PublicationFiles', backref=db.backref('downloads', lazy='dynamic'))
     publication_document = db.relationship('PublicationDocuments', backref=db.backref('downloads', lazy='dynamic'))
@@ -988,15 +1060,8 @@ class FileDownloads(db.Model):
         Returns:
             int: Total number of downloads
         """
-        file_downloads_count = db.session.query(cls).join(
-            PublicationFiles, cls.publication_file_id == PublicationFiles.id
-        ).filter(PublicationFiles.publication_id == publication_id).count()
-
-        document_downloads_count = db.session.query(cls).join(
-            PublicationDocuments, cls.publication_document_id == PublicationDocuments.id
-        ).filter(PublicationDocuments.publication_id == publication_id).count()
-
-        return file_downloads_count + document_downloads_count
+        total = db.session.get(AnalyticsCounterTotal, ('publication', publication_id, 'downloads'))
+        return total.count if total else 0
 
     @classmethod
     def track_download(cls, file_id=None, document_id=None, user_id=None, ip_address=None):
@@ -1023,6 +1088,90 @@ class FileDownloads(db.Model):
         return download
 
 
+class AnalyticsCounterTotal(db.Model):
+    """
+    Running view/download totals per publication, file or document, maintained on ingest
+    """
+    __tablename__ = 'analytics_counter_totals'
+
+    subject_type = db.Column(db.String(20), primary_key=True)  # publication, file, document
+    subject_id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(20), primary_key=True)  # views, downloads
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AnalyticsCounterTotal({self.subject_type}:{self.subject_id} {self.metric}={self.count})>"
+
+
+class AnalyticsCounterDaily(db.Model):
+    """
+    Per-day view/download counts per publication, file or document, maintained on ingest
+    """
+    __tablename__ = 'analytics_counter_daily'
+
+    subject_type = db.Column(db.String(20), primary_key=True)
+    subject_id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(20), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<AnalyticsCounterDaily({self.subject_type}:{self.subject_id} {self.metric} {self.day}={self.count})>"
+
+
+class AnalyticsRollup(db.Model):
+    """
+    Hourly, daily and monthly view/download counts compacted from the raw event tables
+    """
+    __tablename__ = 'analytics_rollups'
+
+    # Primary key order serves per-subject time series
+    granularity = db.Column(db.String(10), primary_key=True)  # hour, day, month
+    subject_type = db.Column(db.String(20), primary_key=True)  # publication, file, document
+    subject_id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(20), primary_key=True)  # views, downloads
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        # Top-N leaderboards scan one granularity and period across all subjects
+        db.Index('ix_analytics_rollups_leaderboard', 'granularity', 'subject_type', 'metric', 'bucket_start'),
+    )
+
+    def __repr__(self):
+        return f"<AnalyticsRollup({self.granularity} {self.bucket_start} {self.subject_type}:{self.subject_id} {self.metric}={self.count})>"
+
+
+class AnalyticsCompactionState(db.Model):
+    """
+    Named high-water marks for analytics compaction: raw events before the watermark are compacted
+    """
+    __tablename__ = 'analytics_compaction_state'
+
+    name = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=True)  # End of the last compacted window
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def get_watermark(cls, name):
+        """Get the watermark for a compaction, or None if it never ran"""
+        state = db.session.get(cls, name)
+        return state.watermark if state else None
+
+    @classmethod
+    def set_watermark(cls, name, watermark):
+        """Advance the watermark for a compaction (caller commits)"""
+        state = db.session.get(cls, name)
+        if not state:
+            state = cls(name=name)
+            db.session.add(state)
+        state.watermark = watermark
+
+    def __repr__(self):
+        return f'<AnalyticsCompactionState {self.name} watermark={self.watermark}>'
+
+
 class DSpaceMapping(db.Model):
     """
     Tracks mapping between DSpace items and DOCiD publications for integration
@@ -1076,3 +1225,86 @@ class DSpaceMapping(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+class CordraSyncLedger(db.Model):
+    """
+    Last payload pushed to CORDRA for each object handle, so unchanged objects are not re-pushed
+    """
+    __tablename__ = 'cordra_sync_ledger'
+
+    handle = db.Column(db.String(255), primary_key=True)
+    publication_id = db.Column(db.Integer, db.ForeignKey('publications.id', ondelete='CASCADE'), nullable=False, index=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the pushed payload
+    pushed_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CordraSyncLedger {self.handle} publication={self.publication_id}>'
+
+
+class CordraSyncState(db.Model):
+    """
+    Named high-water marks for incremental CORDRA syncs
+    """
+    __tablename__ = 'cordra_sync_state'
+
+    name = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=True)  # Publications changed after this still need a sync
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def get_watermark(cls, name):
+        """Get the watermark for a sync, or None if it never completed"""
+        state = cls.query.get(name)
+        return state.watermark if state else None
+
+    @classmethod
+    def set_watermark(cls, name, watermark):
+        """Advance the watermark for a sync (caller commits)"""
+        state = cls.query.get(name)
+        if not state:
+            state = cls(name=name)
+            db.session.add(state)
+        state.watermark = watermark
+
+    def __repr__(self):
+        return f'<CordraSyncState {self.name} watermark={self.watermark}>'
+
+
+class RorOrganization(db.Model):
+    """
+    Local copy of the ROR registry, loaded from the published ROR data dump
+    """
+    __tablename__ = 'ror_organizations'
+
+    ror_id = db.Column(db.String(20), primary_key=True)  # Bare id, e.g. 02qv1aw94
+    display_name = db.Column(db.String(500), nullable=False)
+    country_name = db.Column(db.String(100), nullable=True)
+    country_code = db.Column(db.String(2), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=True)
+    record = db.Column(db.JSON, nullable=False)  # Full schema v2 record as served by api.ror.org
+    dump_version = db.Column(db.String(100), nullable=False)
+    imported_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<RorOrganization {self.ror_id} {self.display_name}>'
+
+
+class RorOrganizationTerm(db.Model):
+    """
+    Normalized search terms of a ROR organization: every name, alias, acronym and label
+    (kind 'name') and every word of those names (kind 'token')
+    """
+    __tablename__ = 'ror_organization_terms'
+
+    ror_id = db.Column(db.String(20), db.ForeignKey('ror_organizations.ror_id', ondelete='CASCADE'), primary_key=True)
+    kind = db.Column(db.String(10), primary_key=True)  # name, token
+    term = db.Column(db.String(500), primary_key=True)
+
+    __table_args__ = (
+        # Prefix searches (term LIKE 'abc%') within one kind
+        db.Index('ix_ror_organization_terms_prefix', 'kind', 'term', postgresql_ops={'term': 'text_pattern_ops'}),
+    )
+
+    def __repr__(self):
+        return f'<RorOrganizationTerm {self.ror_id} {self.kind}={self.term}>'
@@ -0,0 +1,74 @@
+"""
+Response cache for DocID resolution, invalidated whenever a publication is written
+"""
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from app import cache
+
+logger = logging.getLogger(__name__)
+
+# Output formats served by the DocID resolver
+RESPONSE_FORMATS = ('json', 'xml')
+
+
+def _cache_key(document_docid: str, response_format: str) -> str:
+    return f"docid-response:{response_format}:{document_docid}"
+
+
+def build_validators(publication, response_format: str, fields=None):
+    """
+    Derive the ETag and Last-Modified validators for a publication representation.
+
+    Args:
+        publication: The Publications instance being served
+        response_format: 'json' or 'xml'
+        fields: Optional field projection applied to the representation
+
+    Returns:
+        Tuple of (etag, last_modified)
+    """
+    last_modified = publication.updated_at or publication.published
+    stamp = last_modified.isoformat() if last_modified else ''
+    variant = ','.join(sorted(fields)) if fields else ''
+    etag = hashlib.sha1(
+        f"{publication.id}:{stamp}:{response_format}:{variant}".encode('utf-8')
+    ).hexdigest()
+    return etag, last_modified
+
+
+def get_cached_response(document_docid: str, response_format: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a cached DocID response
+
+    Returns:
+        Dict with body, content_type, etag and last_modified, or None on a miss
+    """
+    try:
+        return cache.get(_cache_key(document_docid, response_format))
+    except Exception as e:
+        logger.warning(f"DocID cache read failed for {document_docid}: {str(e)}")
+        return None
+
+
+def cache_response(document_docid: str, response_format: str, entry: Dict[str, Any]) -> None:
+    """Store a serialized DocID response"""
+    try:
+        timeout = current_app.config.get('DOCID_CACHE_TIMEOUT', 3600)
+        cache.set(_cache_key(document_docid, response_format), entry, timeout=timeout)
+    except Exception as e:
+        logger.warning(f"DocID cache write failed for {document_docid}: {str(e)}")
+
+
+def invalidate_publication(document_docid: Optional[str]) -> None:
+    """Drop every cached representation of a publication after it was created, updated or deleted"""
+    if not document_docid:
+        return
+    try:
+        cache.delete_many(*[_cache_key(document_docid, fmt) for fmt in RESPONSE_FORMATS])
+        logger.info(f"Invalidated cached DocID responses for {document_docid}")
+    except Exception as e:
+        logger.warning(f"DocID cache invalidation failed for {document_docid}: {str(e)}")
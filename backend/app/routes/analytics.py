@@ -1,10 +1,56 @@
+from datetime import datetime, timedelta
+
 from flask import Blueprint, jsonify, request, current_app
 from flask_cors import cross_origin
-from app import db
-from app.models import PublicationViews, FileDownloads, Publications, PublicationFiles, PublicationDocuments, PublicationComments
+from app.models import PublicationViews, FileDownloads, Publications, PublicationFiles, PublicationDocuments
+from app.service_analytics import (
+    record_view, record_download, resolve_client, get_counter_totals, get_publications_stats,
+    SUBJECT_PUBLICATION, SUBJECT_FILE, SUBJECT_DOCUMENT, METRIC_VIEWS, METRIC_DOWNLOADS
+)
+from app.service_analytics_rollups import GRANULARITIES, bucket_starts, get_time_series, get_top_subjects
 
 analytics_bp = Blueprint('analytics', __name__)
 
+METRICS = (METRIC_VIEWS, METRIC_DOWNLOADS)
+
+# Default time-series window per granularity, and the most buckets one request may ask for
+DEFAULT_SERIES_WINDOW = {'hour': timedelta(hours=48), 'day': timedelta(days=90), 'month': timedelta(days=365)}
+MAX_SERIES_POINTS = 2000
+MAX_TOP_LIMIT = 100
+MAX_BULK_STATS_IDS = 100
+
+
+def _client():
+    """
+    Address and user agent of the visitor, as forwarded by a trusted proxy such as the frontend
+
+    Returns:
+        Tuple of (IP address or None, user agent)
+    """
+    return resolve_client(
+        request.remote_addr,
+        request.headers.get('X-Forwarded-For'),
+        request.headers.get('User-Agent'),
+        request.headers.get('X-Client-User-Agent'),
+        current_app.config.get('TRUSTED_PROXIES', '127.0.0.1,::1')
+    )
+
+
+def _parse_range(default_window):
+    """
+    Read the optional ISO `start`/`end` query parameters
+
+    Returns:
+        Tuple of (start, end) datetimes in UTC; end defaults to now and start to end - default_window
+    """
+    end = request.args.get('end')
+    end = datetime.fromisoformat(end) if end else datetime.utcnow()
+    start = request.args.get('start')
+    start = datetime.fromisoformat(start) if start else end - default_window
+    if start > end:
+        raise ValueError("start must not be after end")
+    return start, end
+
 
 @analytics_bp.route('/api/publications/<int:publication_id>/views', methods=['POST'])
 @cross_origin()
@@ -29,42 +75,32 @@ def track_view(publication_id):
               type: integer
               description: ID of the user viewing (optional)
     responses:
-      201:
-        description: View tracked successfully
-      404:
-        description: Publication not found
+      202:
+        description: View accepted; it is written with the next batch unless it is from a bot or a repeat view
       500:
         description: Server error
     """
     try:
-        # Verify publication exists
-        publication = Publications.query.get(publication_id)
-        if not publication:
-            return jsonify({"status": "error", "message": "Publication not found"}), 404
-
         # Get request metadata
-        user_id = request.json.get('user_id') if request.json else None
-        ip_address = request.remote_addr
-        user_agent = request.headers.get('User-Agent')
+        payload = request.get_json(silent=True) or {}
+        user_id = payload.get('user_id')
+        ip_address, user_agent = _client()
 
-        # Track view
-        view = PublicationViews.track_view(
+        # Queue the view; bots and repeat views are not counted, and views of unknown
+        # publications are discarded when the batch is written
+        queued = record_view(
             publication_id=publication_id,
             user_id=user_id,
             ip_address=ip_address,
             user_agent=user_agent
         )
 
-        current_app.logger.info(f"View tracked for publication {publication_id} from IP {ip_address}")
-
         return jsonify({
-            "status": "success",
-            "message": "View tracked",
-            "view": view.to_dict()
-        }), 201
+            "status": "accepted",
+            "message": "View queued" if queued else "View not counted"
+        }), 202
 
     except Exception as e:
-        db.session.rollback()
         current_app.logger.error(f"Error tracking view: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -125,40 +161,32 @@ def track_file_download(file_id):
               type: integer
               description: ID of the user downloading (optional)
     responses:
-      201:
-        description: Download tracked successfully
-      404:
-        description: File not found
+      202:
+        description: Download accepted; it is written with the next batch unless it is from a bot or a repeat download
       500:
         description: Server error
     """
     try:
-        # Verify file exists
-        file = PublicationFiles.query.get(file_id)
-        if not file:
-            return jsonify({"status": "error", "message": "File not found"}), 404
-
         # Get request metadata
-        user_id = request.json.get('user_id') if request.json else None
-        ip_address = request.remote_addr
+        payload = request.get_json(silent=True) or {}
+        user_id = payload.get('user_id')
+        ip_address, user_agent = _client()
 
-        # Track download
-        download = FileDownloads.track_download(
+        # Queue the download; bots and repeat downloads are not counted, and downloads of
+        # unknown files are discarded when the batch is written
+        queued = record_download(
             file_id=file_id,
             user_id=user_id,
-            ip_address=ip_address
+            ip_address=ip_address,
+            user_agent=user_agent
         )
 
-        current_app.logger.info(f"File download tracked for file {file_id} from IP {ip_address}")
-
         return jsonify({
-            "status": "success",
-            "message": "Download tracked",
-            "download": download.to_dict()
-        }), 201
+            "status": "accepted",
+            "message": "Download queued" if queued else "Download not counted"
+        }), 202
 
     except Exception as e:
-        db.session.rollback()
         current_app.logger.error(f"Error tracking download: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -186,40 +214,32 @@ def track_document_download(document_id):
               type: integer
               description: ID of the user downloading (optional)
     responses:
-      201:
-        description: Download tracked successfully
-      404:
-        description: Document not found
+      202:
+        description: Download accepted; it is written with the next batch unless it is from a bot or a repeat download
       500:
         description: Server error
     """
     try:
-        # Verify document exists
-        document = PublicationDocuments.query.get(document_id)
-        if not document:
-            return jsonify({"status": "error", "message": "Document not found"}), 404
-
         # Get request metadata
-        user_id = request.json.get('user_id') if request.json else None
-        ip_address = request.remote_addr
+        payload = request.get_json(silent=True) or {}
+        user_id = payload.get('user_id')
+        ip_address, user_agent = _client()
 
-        # Track download
-        download = FileDownloads.track_download(
+        # Queue the download; bots and repeat downloads are not counted, and downloads of
+        # unknown documents are discarded when the batch is written
+        queued = record_download(
             document_id=document_id,
             user_id=user_id,
-            ip_address=ip_address
+            ip_address=ip_address,
+            user_agent=user_agent
         )
 
-        current_app.logger.info(f"Document download tracked for document {document_id} from IP {ip_address}")
-
         return jsonify({
-            "status": "success",
-            "message": "Download tracked",
-            "download": download.to_dict()
-        }), 201
+            "status": "accepted",
+            "message": "Download queued" if queued else "Download not counted"
+        }), 202
 
     except Exception as e:
-        db.session.rollback()
         current_app.logger.error(f"Error tracking download: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -257,6 +277,63 @@ def get_download_count(publication_id):
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@analytics_bp.route('/api/publications/stats', methods=['GET', 'POST'])
+@cross_origin()
+def get_bulk_publication_stats():
+    """
+    Get views, downloads and comments for several publications at once (e.g. a catalogue page)
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        description: Comma-separated publication IDs (GET)
+      - name: body
+        in: body
+        schema:
+          type: object
+          properties:
+            ids:
+              type: array
+              items:
+                type: integer
+              description: Publication IDs (POST)
+    responses:
+      200:
+        description: Statistics keyed by publication ID; unknown IDs report zero counts
+      400:
+        description: Missing, invalid or too many IDs (max 100)
+      500:
+        description: Server error
+    """
+    try:
+        if request.method == 'POST':
+            ids = (request.get_json(silent=True) or {}).get('ids') or []
+        else:
+            ids = [value for value in request.args.get('ids', '').split(',') if value.strip()]
+        try:
+            publication_ids = [int(value) for value in ids]
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "ids must be integers"}), 400
+        if not publication_ids:
+            return jsonify({"status": "error", "message": "ids is required"}), 400
+        if len(publication_ids) > MAX_BULK_STATS_IDS:
+            return jsonify({"status": "error", "message": f"At most {MAX_BULK_STATS_IDS} ids per request"}), 400
+
+        stats = get_publications_stats(publication_ids)
+
+        return jsonify({
+            "status": "success",
+            "stats": {str(publication_id): publication_stats for publication_id, publication_stats in stats.items()}
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error getting bulk publication stats: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @analytics_bp.route('/api/publications/<int:publication_id>/stats', methods=['GET'])
 @cross_origin()
 def get_publication_stats(publication_id):
@@ -278,21 +355,13 @@ def get_publication_stats(publication_id):
         description: Server error
     """
     try:
-        view_count = PublicationViews.get_view_count(publication_id)
-        download_count = FileDownloads.get_download_count(publication_id)
-        comment_count = PublicationComments.query.filter_by(
-            publication_id=publication_id,
-            status='active'
-        ).count()
+        # Views and downloads come from the pre-aggregated counters
+        stats = get_publications_stats([publication_id])[publication_id]
 
         return jsonify({
             "status": "success",
             "publication_id": publication_id,
-            "stats": {
-                "views": view_count,
-                "downloads": download_count,
-                "comments": comment_count
-            }
+            "stats": stats
         }), 200
 
     except Exception as e:
@@ -329,7 +398,7 @@ def get_file_stats(file_id):
             return jsonify({"status": "error", "message": "File not found"}), 404
 
         # Get download count for this specific file
-        download_count = FileDownloads.query.filter_by(publication_file_id=file_id).count()
+        download_count = get_counter_totals(SUBJECT_FILE, [file_id])[file_id][METRIC_DOWNLOADS]
 
         return jsonify({
             "status": "success",
@@ -371,7 +440,7 @@ def get_document_stats(document_id):
             return jsonify({"status": "error", "message": "Document not found"}), 404
 
         # Get download count for this specific document
-        download_count = FileDownloads.query.filter_by(publication_document_id=document_id).count()
+        download_count = get_counter_totals(SUBJECT_DOCUMENT, [document_id])[document_id][METRIC_DOWNLOADS]
 
         return jsonify({
             "status": "success",
@@ -414,27 +483,29 @@ def get_all_files_stats(publication_id):
 
         # Get all files for this publication
         files = PublicationFiles.query.filter_by(publication_id=publication_id).all()
-        files_stats = []
-        for file in files:
-            download_count = FileDownloads.query.filter_by(publication_file_id=file.id).count()
-            files_stats.append({
+        file_totals = get_counter_totals(SUBJECT_FILE, [file.id for file in files])
+        files_stats = [
+            {
                 "id": file.id,
                 "title": file.title,
                 "file_url": file.file_url,
-                "downloads": download_count
-            })
+                "downloads": file_totals[file.id][METRIC_DOWNLOADS]
+            }
+            for file in files
+        ]
 
         # Get all documents for this publication
         documents = PublicationDocuments.query.filter_by(publication_id=publication_id).all()
-        documents_stats = []
-        for doc in documents:
-            download_count = FileDownloads.query.filter_by(publication_document_id=doc.id).count()
-            documents_stats.append({
+        document_totals = get_counter_totals(SUBJECT_DOCUMENT, [doc.id for doc in documents])
+        documents_stats = [
+            {
                 "id": doc.id,
                 "title": doc.title,
                 "file_url": doc.file_url,
-                "downloads": download_count
-            })
+                "downloads": document_totals[doc.id][METRIC_DOWNLOADS]
+            }
+            for doc in documents
+        ]
 
         return jsonify({
             "status": "success",
@@ -446,3 +517,147 @@ def get_all_files_stats(publication_id):
     except Exception as e:
         current_app.logger.error(f"Error getting files stats: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@analytics_bp.route('/api/publications/<int:publication_id>/timeseries', methods=['GET'])
+@cross_origin()
+def get_publication_time_series(publication_id):
+    """
+    Get views or downloads of a publication per hour, day or month
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: publication_id
+        in: path
+        type: integer
+        required: true
+        description: ID of the publication
+      - name: metric
+        in: query
+        type: string
+        enum: [views, downloads]
+        default: views
+      - name: granularity
+        in: query
+        type: string
+        enum: [hour, day, month]
+        default: day
+      - name: start
+        in: query
+        type: string
+        description: ISO date or datetime (UTC); defaults to 48 hours, 90 days or 12 months before end
+      - name: end
+        in: query
+        type: string
+        description: ISO date or datetime (UTC), exclusive; defaults to now
+    responses:
+      200:
+        description: Counts per bucket, oldest first; empty buckets are 0. Hours still open are not compacted yet.
+      400:
+        description: Invalid metric, granularity or range
+      500:
+        description: Server error
+    """
+    try:
+        metric = request.args.get('metric', METRIC_VIEWS)
+        granularity = request.args.get('granularity', 'day')
+        if metric not in METRICS or granularity not in GRANULARITIES:
+            return jsonify({"status": "error", "message": "Invalid metric or granularity"}), 400
+        try:
+            start, end = _parse_range(DEFAULT_SERIES_WINDOW[granularity])
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Invalid date range: {str(e)}"}), 400
+        if len(bucket_starts(granularity, start, end)) > MAX_SERIES_POINTS:
+            return jsonify({"status": "error", "message": f"Range exceeds {MAX_SERIES_POINTS} {granularity} buckets"}), 400
+
+        series = get_time_series(SUBJECT_PUBLICATION, publication_id, metric, granularity, start, end)
+
+        return jsonify({
+            "status": "success",
+            "publication_id": publication_id,
+            "metric": metric,
+            "granularity": granularity,
+            "series": series
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error getting time series: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@analytics_bp.route('/api/publications/top', methods=['GET'])
+@cross_origin()
+def get_top_publications():
+    """
+    Get the most viewed or downloaded publications over a period
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: metric
+        in: query
+        type: string
+        enum: [views, downloads]
+        default: downloads
+      - name: start
+        in: query
+        type: string
+        description: ISO date (UTC); defaults to the first day of the current month
+      - name: end
+        in: query
+        type: string
+        description: ISO date (UTC), exclusive; defaults to now
+      - name: limit
+        in: query
+        type: integer
+        default: 20
+        description: Number of publications to return (max 100)
+    responses:
+      200:
+        description: Publications ranked by count, highest first
+      400:
+        description: Invalid metric, limit or range
+      500:
+        description: Server error
+    """
+    try:
+        metric = request.args.get('metric', METRIC_DOWNLOADS)
+        if metric not in METRICS:
+            return jsonify({"status": "error", "message": "Invalid metric"}), 400
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), MAX_TOP_LIMIT)
+            now = datetime.utcnow()
+            start, end = _parse_range(now - now.replace(day=1, hour=0, minute=0, second=0, microsecond=0))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Invalid parameters: {str(e)}"}), 400
+
+        ranking = get_top_subjects(SUBJECT_PUBLICATION, metric, start, end, limit)
+        publications = {
+            publication.id: publication
+            for publication in Publications.query.filter(
+                Publications.id.in_([publication_id for publication_id, _ in ranking])
+            ).all()
+        } if ranking else {}
+
+        return jsonify({
+            "status": "success",
+            "metric": metric,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "publications": [
+                {
+                    "rank": rank,
+                    "publication_id": publication_id,
+                    "document_title": publications[publication_id].document_title,
+                    "document_docid": publications[publication_id].document_docid,
+                    metric: count
+                }
+                for rank, (publication_id, count) in enumerate(ranking, start=1)
+                if publication_id in publications
+            ]
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error getting top publications: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
@@ -1,7 +1,7 @@
 # app/routes/arks.py
 
 from flask import Blueprint, jsonify, request
-import requests
+from app.http_client import http_client
 import logging
 
 # https://arks.org
@@ -69,7 +69,7 @@ def create_ark():
         payload = {"target": target_url, "metadata": metadata}
         headers = {"Authorization": f"Bearer {ARKS_CONFIG['API_KEY']}"}
 
-        response = requests.post(f"{ARKS_CONFIG['API_URL']}arks", json=payload, headers=headers)
+        response = http_client.post(f"{ARKS_CONFIG['API_URL']}arks", json=payload, headers=headers)
 
         if response.status_code == 201:
             return jsonify(response.json()), 201
@@ -107,7 +107,7 @@ def resolve_ark(ark_id):
     try:
         headers = {"Authorization": f"Bearer {ARKS_CONFIG['API_KEY']}"}
 
-        response = requests.get(f"{ARKS_CONFIG['API_URL']}arks/{ark_id}", headers=headers)
+        response = http_client.get(f"{ARKS_CONFIG['API_URL']}arks/{ark_id}", headers=headers)
 
         if response.status_code == 200:
             return jsonify(response.json()), 200
@@ -147,7 +147,7 @@ def get_ark_metadata(ark_id):
     try:
         headers = {"Authorization": f"Bearer {ARKS_CONFIG['API_KEY']}"}
 
-        response = requests.get(f"{ARKS_CONFIG['API_URL']}arks/{ark_id}/metadata", headers=headers)
+        response = http_client.get(f"{ARKS_CONFIG['API_URL']}arks/{ark_id}/metadata", headers=headers)
 
         if response.status_code == 200:
             return jsonify(response.json()), 200
@@ -5,6 +5,10 @@ from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 from app import db
 from app.models import PublicationComments, Publications, UserAccount
+from app.service_comments import (
+    load_comment_thread, count_active_comments, encode_comment_cursor, decode_comment_cursor,
+    get_comment_stats as compute_comment_stats, add_like, remove_like, load_user_comments, count_user_comments
+)
 import logging
 
 # Configure logging
@@ -17,6 +21,10 @@ logger = logging.getLogger(__name__)
 # Create Blueprint
 comments_bp = Blueprint('comments', __name__)
 
+# Page size bounds for cursor-paginated comment listings
+DEFAULT_COMMENTS_PAGE_SIZE = 20
+MAX_COMMENTS_PAGE_SIZE = 100
+
 @comments_bp.route('/api/publications/<int:publication_id>/comments', methods=['GET'])
 @cross_origin()
 def get_publication_comments(publication_id):
@@ -36,7 +44,20 @@ def get_publication_comments(publication_id):
         type: boolean
         required: false
         default: true
-        description: Whether to include replies in the response
+        description: Whether to nest the reply tree under each top-level comment
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: >
+          Opaque keyset cursor. Pass an empty value to start paginating top-level comments, then
+          the returned next_cursor to fetch following pages. Without it all comments are returned.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        default: 20
+        description: Top-level comments per page in cursor mode (max 100)
     responses:
       200:
         description: Successfully retrieved comments
@@ -47,6 +68,17 @@ def get_publication_comments(publication_id):
               type: integer
             total_comments:
               type: integer
+              description: Active comments on the publication (top-level only when include_replies is false)
+            pagination:
+              type: object
+              description: Present in cursor mode only
+              properties:
+                limit:
+                  type: integer
+                next_cursor:
+                  type: string
+                has_more:
+                  type: boolean
             comments:
               type: array
               items:
@@ -72,8 +104,12 @@ def get_publication_comments(publication_id):
                     type: string
                   updated_at:
                     type: string
+                  replies_count:
+                    type: integer
                   replies:
                     type: array
+      400:
+        description: Invalid cursor or limit
       404:
         description: Publication not found
       500:
@@ -87,24 +123,37 @@ def get_publication_comments(publication_id):
         
         # Get query parameters
         include_replies = request.args.get('include_replies', 'true').lower() == 'true'
-        
-        # Get comments
-        comments = PublicationComments.get_publication_comments(publication_id, include_replies)
-        
-        # Convert to dictionary format
-        comments_data = []
-        for comment in comments:
-            comment_dict = comment.to_dict()
-            # Add replies if it's a top-level comment
-            if not comment.parent_comment_id and include_replies:
-                comment_dict['replies'] = [reply.to_dict() for reply in comment.replies if reply.status == 'active']
-            comments_data.append(comment_dict)
-        
-        return jsonify({
+
+        # Cursor pagination of top-level comments is enabled by the presence of the cursor parameter
+        cursor_mode = 'cursor' in request.args
+        limit = None
+        cursor = None
+        if cursor_mode:
+            try:
+                limit = min(int(request.args.get('limit', DEFAULT_COMMENTS_PAGE_SIZE)), MAX_COMMENTS_PAGE_SIZE)
+                if limit <= 0:
+                    raise ValueError('limit must be positive')
+                if request.args.get('cursor'):
+                    cursor = decode_comment_cursor(request.args['cursor'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        # Top-level comments with their reply trees, without per-comment lazy loads
+        comments_data, last = load_comment_thread(publication_id, include_replies, limit, cursor)
+
+        response = {
             'publication_id': publication_id,
-            'total_comments': len(comments),
+            'total_comments': count_active_comments(publication_id, top_level_only=not include_replies),
             'comments': comments_data
-        }), 200
+        }
+        if cursor_mode:
+            response['pagination'] = {
+                'limit': limit,
+                'next_cursor': encode_comment_cursor(last) if last else None,
+                'has_more': last is not None
+            }
+
+        return jsonify(response), 200
         
     except Exception as e:
         logger.error(f"Error getting comments for publication {publication_id}: {str(e)}")
@@ -387,19 +436,35 @@ def like_comment(comment_id):
         type: integer
         required: true
         description: The ID of the comment to like
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - user_id
+          properties:
+            user_id:
+              type: integer
+              description: ID of the user liking the comment
     responses:
       200:
-        description: Comment liked successfully
+        description: Comment liked (or already liked by this user, in which case the count is unchanged)
         schema:
           type: object
           properties:
             message:
               type: string
+            liked:
+              type: boolean
+              description: False if the user had already liked the comment
             likes_count:
               type: integer
               description: Updated number of likes
+      400:
+        description: Bad request - missing user_id
       404:
-        description: Comment not found
+        description: Comment or user not found
       500:
         description: Internal server error
     """
@@ -409,14 +474,23 @@ def like_comment(comment_id):
         if not comment:
             return jsonify({'error': 'Comment not found'}), 404
         
-        # Increment likes
-        new_likes_count = comment.increment_likes()
+        # Get request data
+        data = request.get_json(silent=True) or {}
+        user_id = data.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        if not UserAccount.query.get(user_id):
+            return jsonify({'error': 'User not found'}), 404
+        
+        # One like per user; the counter is incremented atomically in the database
+        liked, likes_count = add_like(comment_id, user_id)
         
-        logger.info(f"Comment {comment_id} liked. New count: {new_likes_count}")
+        logger.info(f"Comment {comment_id} liked by user {user_id}. New count: {likes_count}")
         
         return jsonify({
-            'message': 'Comment liked successfully',
-            'likes_count': new_likes_count
+            'message': 'Comment liked successfully' if liked else 'Comment already liked',
+            'liked': liked,
+            'likes_count': likes_count
         }), 200
         
     except Exception as e:
@@ -424,6 +498,79 @@ def like_comment(comment_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to like comment'}), 500
 
+@comments_bp.route('/api/comments/<int:comment_id>/like', methods=['DELETE'])
+@cross_origin()
+def unlike_comment(comment_id):
+    """
+    Remove a user's like from a comment
+    ---
+    tags:
+      - Comments
+    parameters:
+      - name: comment_id
+        in: path
+        type: integer
+        required: true
+        description: The ID of the comment to unlike
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - user_id
+          properties:
+            user_id:
+              type: integer
+              description: ID of the user removing the like
+    responses:
+      200:
+        description: Like removed (or the user had not liked the comment)
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+            unliked:
+              type: boolean
+              description: False if the user had not liked the comment
+            likes_count:
+              type: integer
+              description: Updated number of likes
+      400:
+        description: Bad request - missing user_id
+      404:
+        description: Comment not found
+      500:
+        description: Internal server error
+    """
+    try:
+        # Get the comment
+        comment = PublicationComments.query.get(comment_id)
+        if not comment:
+            return jsonify({'error': 'Comment not found'}), 404
+        
+        # Get request data
+        data = request.get_json(silent=True) or {}
+        user_id = data.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        
+        unliked, likes_count = remove_like(comment_id, user_id)
+        
+        logger.info(f"Comment {comment_id} unliked by user {user_id}. New count: {likes_count}")
+        
+        return jsonify({
+            'message': 'Like removed successfully' if unliked else 'Comment was not liked',
+            'unliked': unliked,
+            'likes_count': likes_count
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error unliking comment {comment_id}: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to unlike comment'}), 500
+
 @comments_bp.route('/api/users/<int:user_id>/comments', methods=['GET'])
 @cross_origin()
 def get_user_comments(user_id):
@@ -438,6 +585,19 @@ def get_user_comments(user_id):
         type: integer
         required: true
         description: The ID of the user
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: >
+          Opaque keyset cursor. Pass an empty value to start paginating, then the returned
+          next_cursor to fetch following pages. Without it all comments are returned.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        default: 20
+        description: Comments per page in cursor mode (max 100)
     responses:
       200:
         description: Successfully retrieved user comments
@@ -450,6 +610,16 @@ def get_user_comments(user_id):
               type: string
             total_comments:
               type: integer
+            pagination:
+              type: object
+              description: Present in cursor mode only
+              properties:
+                limit:
+                  type: integer
+                next_cursor:
+                  type: string
+                has_more:
+                  type: boolean
             comments:
               type: array
               items:
@@ -473,6 +643,8 @@ def get_user_comments(user_id):
                     type: string
                   updated_at:
                     type: string
+      400:
+        description: Invalid cursor or limit
       404:
         description: User not found
       500:
@@ -484,21 +656,37 @@ def get_user_comments(user_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get all comments by user
-        comments = PublicationComments.query.filter_by(
-            user_id=user_id, 
-            status='active'
-        ).order_by(PublicationComments.created_at.desc()).all()
-        
-        # Convert to dictionary format
-        comments_data = [comment.to_dict() for comment in comments]
-        
-        return jsonify({
+        # Cursor pagination is enabled by the presence of the cursor parameter
+        cursor_mode = 'cursor' in request.args
+        limit = None
+        cursor = None
+        if cursor_mode:
+            try:
+                limit = min(int(request.args.get('limit', DEFAULT_COMMENTS_PAGE_SIZE)), MAX_COMMENTS_PAGE_SIZE)
+                if limit <= 0:
+                    raise ValueError('limit must be positive')
+                if request.args.get('cursor'):
+                    cursor = decode_comment_cursor(request.args['cursor'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        # Column projection of the user's comments, newest first
+        comments_data, last = load_user_comments(user, limit, cursor)
+        
+        response = {
             'user_id': user_id,
             'user_name': user.full_name,
-            'total_comments': len(comments),
+            'total_comments': count_user_comments(user_id) if cursor_mode else len(comments_data),
             'comments': comments_data
-        }), 200
+        }
+        if cursor_mode:
+            response['pagination'] = {
+                'limit': limit,
+                'next_cursor': encode_comment_cursor(last) if last else None,
+                'has_more': last is not None
+            }
+        
+        return jsonify(response), 200
         
     except Exception as e:
         logger.error(f"Error getting comments for user {user_id}: {str(e)}")
@@ -558,38 +746,12 @@ def get_comment_stats(publication_id):
         if not publication:
             return jsonify({'error': 'Publication not found'}), 404
         
-        # Get all comments for the publication
-        all_comments = PublicationComments.query.filter_by(
-            publication_id=publication_id,
-            status='active'
-        ).all()
-        
-        # Calculate statistics
-        total_comments = len(all_comments)
-        top_level_comments = len([c for c in all_comments if not c.parent_comment_id])
-        replies = len([c for c in all_comments if c.parent_comment_id])
-        
-        # Get comment types breakdown
-        comment_types = {}
-        for comment in all_comments:
-            comment_types[comment.comment_type] = comment_types.get(comment.comment_type, 0) + 1
-        
-        # Get unique commenters
-        unique_users = len(set([c.user_id for c in all_comments]))
-        
-        # Get total likes
-        total_likes = sum([c.likes_count for c in all_comments])
+        # Aggregate in the database instead of loading every comment
+        statistics = compute_comment_stats(publication_id)
         
         return jsonify({
             'publication_id': publication_id,
-            'statistics': {
-                'total_comments': total_comments,
-                'top_level_comments': top_level_comments,
-                'replies': replies,
-                'unique_commenters': unique_users,
-                'total_likes': total_likes,
-                'comment_types': comment_types
-            }
+            'statistics': statistics
         }), 200
         
     except Exception as e:
@@ -5,6 +5,7 @@ from app.models import DocIdLookup,CrossrefMetadata
 from app.service_crossref import deposit_metadata
 from sqlalchemy.sql import func
 from habanero import Crossref
+from app.http_client import UPSTREAM_UNAVAILABLE, http_client
 import logging
 
 # Initialize logger
@@ -31,6 +32,15 @@ logging.basicConfig(level=logging.ERROR)
     """
 
 crossref_bp = Blueprint("crossref", __name__, url_prefix="/api/v1/crossref")
+
+CROSSREF_HOST = 'api.crossref.org'
+
+
+def _crossref(method, **kwargs):
+    """Call a habanero Crossref method behind the Crossref circuit breaker, falling back to its last good result"""
+    stale_key = f"crossref:{method.__name__}:{sorted(kwargs.items())}"
+    return http_client.guarded(CROSSREF_HOST, lambda: method(**kwargs), stale_key=stale_key)
+
 @crossref_bp.route('/doi/', methods=['GET'])
 def get_doi_info():
     """
@@ -70,7 +80,7 @@ def get_doi_info():
         # Initialize Crossref client
         cr = Crossref()
         # Fetch works by DOI
-        works = cr.works(ids=doi)
+        works = _crossref(cr.works, ids=doi)
 
         # Extracting specific data points
         data = {
@@ -83,6 +93,8 @@ def get_doi_info():
         # Save metadata to the database
         save_metadata(doi, data)
         return jsonify({'status': 'success', 'data': data}), 200
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logging.error(f"Error retrieving works by DOI {doi}: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -133,12 +145,12 @@ def get_cached_doi_info():
         # If not cached, fetch from Crossref
         cr = Crossref()
         # Fetch works by DOI
-        works = cr.works(ids=doi)
+        works = _crossref(cr.works, ids=doi)
         # Fetch funders, journals, types, and licenses
-        funders = cr.funders(ids=doi)
-        journals = cr.journals(ids=doi)
-        types = cr.types(ids=doi)
-        licenses = cr.licenses(ids=doi)
+        funders = _crossref(cr.funders, ids=doi)
+        journals = _crossref(cr.journals, ids=doi)
+        types = _crossref(cr.types, ids=doi)
+        licenses = _crossref(cr.licenses, ids=doi)
 
         # Extracting specific data points
         data = {
@@ -154,6 +166,8 @@ def get_cached_doi_info():
         # Save metadata to the database
         save_metadata(doi, data)
         return jsonify({'status': 'success','from':'api' ,'data': data}), 200
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logging.error(f"Error retrieving works by DOI {doi}: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -223,7 +237,7 @@ def get_bulk_doi_info():
         cr = Crossref()
         results = []
         for doi in doi_list:
-            works = cr.works(ids=doi)
+            works = _crossref(cr.works, ids=doi)
             results.append({
                 'doi': doi,
                 'title': works['message'].get('title', [None])[0],
@@ -233,6 +247,8 @@ def get_bulk_doi_info():
             # Save metadata to the database
             save_metadata(doi, results[-1])
         return jsonify({'status': 'success', 'data': results}), 200
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logging.error(f"Error retrieving works for DOIs: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -275,8 +291,10 @@ def search_works():
 
     try:
         cr = Crossref()
-        results = cr.works(query=query)
+        results = _crossref(cr.works, query=query)
         return jsonify({'status': 'success', 'data': results['message']['items']}), 200
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logging.error(f"Error searching works: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -312,8 +330,10 @@ def get_doi_works():
     try:
      # Initialize Crossref client
      cr = Crossref()
-     works = cr.works(ids= doi)
+     works = _crossref(cr.works, ids= doi)
      return works
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         # Catch any exceptions (including potential 500 errors)
          return jsonify({'error':  f"Error retrieving works by DOI {doi}: {e}" }), 400
@@ -349,8 +369,10 @@ def get_doi_members():
     try:
      # Initialize Crossref client
         cr = Crossref()
-        members = cr.members(ids= doi)
+        members = _crossref(cr.members, ids= doi)
         return members
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         # Catch any exceptions (including potential 500 errors)
          return jsonify({'error':  f"Error retrieving works by DOI {doi}: {e}" }), 400
@@ -385,8 +407,10 @@ def get_doi_funders():
     try:
      # Initialize Crossref client
         cr = Crossref()
-        funders = cr.funders(ids= doi)
+        funders = _crossref(cr.funders, ids= doi)
         return funders
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         # Catch any exceptions (including potential 500 errors)
          return jsonify({'error':  f"Error retrieving works by DOI {doi}: {e}" }), 400
@@ -424,8 +448,10 @@ def get_doi_journals():
     try:
         # Initialize Crossref client
         cr = Crossref()
-        journals = cr.journals(ids= doi)
+        journals = _crossref(cr.journals, ids= doi)
         return journals
+    except UPSTREAM_UNAVAILABLE:
+     raise
     except Exception as e:
      # Catch any exceptions (including potential 500 errors)
      return jsonify({'error':  f"Error retrieving works by DOI {doi}: {e}" }), 400
@@ -460,8 +486,10 @@ def get_doi_types():
     try:
         # Initialize Crossref client
         cr = Crossref()
-        types = cr.types(ids= doi)
+        types = _crossref(cr.types, ids= doi)
         return types
+    except UPSTREAM_UNAVAILABLE:
+     raise
     except Exception as e:
      # Catch any exceptions (including potential 500 errors)
      return jsonify({'error':  f"Error retrieving works by DOI {doi}: {e}" }), 400
@@ -496,8 +524,10 @@ def get_doi_licenses():
     try:
         # Initialize Crossref client
         cr = Crossref()
-        licenses = cr.licenses(ids= doi)
+        licenses = _crossref(cr.licenses, ids= doi)
         return licenses
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         # Catch any exceptions (including potential 500 errors)
         return jsonify({'error':  f"Error retrieving works by DOI {doi}: {e}" }), 400
@@ -554,6 +584,8 @@ def do_submit_crossref_xml():
 
     return response
   
+  except UPSTREAM_UNAVAILABLE:
+      raise
   except Exception as e:
       # Catch any exceptions (including potential 500 errors)
       return jsonify({'error':  f"Error depositing crossref  xml: {e}" }), 400
@@ -9,10 +9,10 @@
 import os
 import json
 import logging
-import requests
 from typing import Dict, Any, List, Optional
 from flask import Blueprint, request, jsonify, current_app
 from flasgger import swag_from
+from app.http_client import http_client
 
 # Configure logging
 logging.basicConfig(
@@ -52,7 +52,7 @@ def _make_request(path: str, params: dict = None, method: str = "GET", data: dic
         headers["Content-Type"] = "application/json"
 
     logger.info(f"Calling CSTR {url} method={method} params={params}")
-    resp = requests.request(method, url, headers=headers, params=params or {}, json=data)
+    resp = http_client.request(method, url, headers=headers, params=params or {}, json=data)
     try:
         return resp.status_code, resp.json()
     except ValueError:
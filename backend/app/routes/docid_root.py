@@ -2,14 +2,26 @@
 
 import re
 import logging
-import xml.etree.ElementTree as ET
-from flask import jsonify, request, Response, abort
-from sqlalchemy.orm import joinedload
-from app.models import Publications
-from app import db
+from flask import jsonify, request, Response, abort, current_app
+from app.service_publications import load_publication, serialize_publication, publication_to_xml, parse_fields
+from app.publication_cache import get_cached_response, cache_response, build_validators
 
 logger = logging.getLogger(__name__)
 
+
+def _conditional_response(entry):
+    """
+    Build a response from a serialized DocID entry, answering 304 Not Modified when the
+    client's If-None-Match / If-Modified-Since validators still match
+    """
+    response = Response(entry['body'], status=200, content_type=entry['content_type'])
+    response.set_etag(entry['etag'])
+    if entry['last_modified']:
+        response.last_modified = entry['last_modified']
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('DOCID_HTTP_MAX_AGE', 60)
+    return response.make_conditional(request)
+
 def setup_docid_root_route(app):
     """
     Set up the root-level DocID route directly on the Flask app
@@ -39,9 +51,16 @@ def setup_docid_root_route(app):
             type: string
             required: false
             description: The format of the response, either "json" or "xml". Default is "json".
+          - in: query
+            name: fields
+            type: string
+            required: false
+            description: Comma-separated projection of fields and related collections to return. Default is all.
         responses:
           200:
-            description: Publication details
+            description: Publication details (with ETag and Last-Modified headers)
+          304:
+            description: Not modified since the validators sent in If-None-Match / If-Modified-Since
           404:
             description: Publication not found or invalid DocID format
           500:
@@ -59,125 +78,46 @@ def setup_docid_root_route(app):
                 
             logger.info(f"get_publication_by_docid_root called with document_docid={document_docid}")
             
-            # Query for publication by DocID
-            data = Publications.query \
-                .options(
-                    joinedload(Publications.publications_files),
-                    joinedload(Publications.publication_documents),
-                    joinedload(Publications.publication_creators),
-                    joinedload(Publications.publication_organizations),
-                    joinedload(Publications.publication_funders),
-                    joinedload(Publications.publication_projects)
-                ) \
-                .filter_by(document_docid=document_docid) \
-                .first()
-
-            if not data:
-                logger.warning(f"No publication found with DocID: {document_docid}")
-                return jsonify({'message': 'No matching records found'}), 404
-
-            # Create a dictionary for the main publication data
-            publication_dict = {}
-            desired_fields = ['id', 'document_title', 'document_description', 'document_docid',
-                              'resource_type_id', 'user_id', 'avatar', 'owner', 'publication_poster_url', 'doi', 'published']
-
-            # Update main publication data with Unix timestamp for `published`
-            for field in desired_fields:
-                if hasattr(data, field):
-                    if field == 'published' and getattr(data, field):
-                        publication_dict[field] = int(getattr(data, field).timestamp())
-                    else:
-                        publication_dict[field] = getattr(data, field)
-
-            # Add related data
-            publication_dict['publications_files'] = [
-                {
-                    'id': file.id,
-                    'title': file.title,
-                    'description': file.description,
-                    'publication_type_id': file.publication_type_id,
-                    'file_name': file.file_name,
-                    'file_type': file.file_type,
-                    'file_url': file.file_url,
-                    'identifier': file.identifier,
-                    'generated_identifier': file.generated_identifier
-                } for file in data.publications_files
-            ]
-
-            publication_dict['publication_documents'] = [
-                {
-                    'id': doc.id,
-                    'title': doc.title,
-                    'description': doc.description,
-                    'publication_type': doc.publication_type_id,
-                    'file_url': doc.file_url,
-                    'identifier': doc.identifier_type_id,
-                    'generated_identifier': doc.generated_identifier
-                } for doc in data.publication_documents
-            ]
-
-            publication_dict['publication_creators'] = [
-                {
-                    'id': creator.id,
-                    'family_name': creator.family_name,
-                    'given_name': creator.given_name,
-                    'identifier': creator.identifier,
-                    'role': creator.role_id
-                } for creator in data.publication_creators
-            ]
-
-            publication_dict['publication_organizations'] = [
-                {
-                    'id': org.id,
-                    'name': org.name,
-                    'type': org.type,
-                    'other_name': org.other_name,
-                    'country': org.country
-                } for org in data.publication_organizations
-            ]
-
-            publication_dict['publication_funders'] = [
-                {
-                    'id': funder.id,
-                    'name': funder.name,
-                    'type': funder.type,
-                    'funder_type': funder.funder_type_id,
-                    'other_name': funder.other_name,
-                    'country': funder.country
-                } for funder in data.publication_funders
-            ]
-
-            publication_dict['publication_projects'] = [
-                {
-                    'id': project.id,
-                    'title': project.title,
-                    'raid_id': project.raid_id,
-                    'description': project.description
-                } for project in data.publication_projects
-            ]
+            try:
+                fields = parse_fields(request.args.get('fields'))
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
 
             # Determine response format
-            response_type = request.args.get('type', 'json').lower()
-
-            if response_type == 'xml':
-                # Convert the dictionary to XML
-                root = ET.Element("publication")
-                for key, value in publication_dict.items():
-                    if isinstance(value, list):
-                        list_root = ET.SubElement(root, key)
-                        for item in value:
-                            item_root = ET.SubElement(list_root, "item")
-                            for k, v in item.items():
-                                ET.SubElement(item_root, k).text = str(v)
-                    else:
-                        ET.SubElement(root, key).text = str(value)
-
-                xml_response = ET.tostring(root, encoding='utf-8')
-                return Response(xml_response, content_type='application/xml')
-
-            # Default to JSON response
-            logger.info(f"Successfully retrieved publication for DocID: {document_docid}")
-            return jsonify(publication_dict), 200
+            response_type = 'xml' if request.args.get('type', 'json').lower() == 'xml' else 'json'
+
+            # Only full representations are cached, so invalidation has one entry per format
+            entry = None if fields else get_cached_response(document_docid, response_type)
+
+            if entry is None:
+                # Query for publication by DocID
+                data = load_publication(fields, document_docid=document_docid)
+
+                if not data:
+                    logger.warning(f"No publication found with DocID: {document_docid}")
+                    return jsonify({'message': 'No matching records found'}), 404
+
+                publication_dict = serialize_publication(data, fields)
+
+                if response_type == 'xml':
+                    body, content_type = publication_to_xml(publication_dict), 'application/xml'
+                else:
+                    body, content_type = jsonify(publication_dict).get_data(), 'application/json'
+
+                etag, last_modified = build_validators(data, response_type, fields)
+                entry = {
+                    'body': body,
+                    'content_type': content_type,
+                    'etag': etag,
+                    'last_modified': last_modified
+                }
+                if not fields:
+                    cache_response(document_docid, response_type, entry)
+                logger.info(f"Successfully retrieved publication for DocID: {document_docid}")
+            else:
+                logger.info(f"Serving cached publication for DocID: {document_docid}")
+
+            return _conditional_response(entry)
 
         except Exception as e:
             logger.error(f"Error retrieving publication by DocID {document_docid}: {str(e)}")
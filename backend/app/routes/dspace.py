@@ -5,8 +5,9 @@ DSpace Integration API Endpoints
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Publications, DSpaceMapping, UserAccount, PublicationCreators, CreatorsRoles
+from app.models import Publications, DSpaceMapping, UserAccount, PublicationCreators
 from app.service_dspace import DSpaceClient, DSpaceMetadataMapper
+from app.service_reference_data import reference_data
 import os
 
 dspace_bp = Blueprint('dspace', __name__, url_prefix='/api/v1/dspace')
@@ -39,11 +40,11 @@ def save_publication_creators(publication_id, creators_data):
     for creator_data in creators_data:
         # Get role_id for the creator role
         role_name = creator_data.get('creator_role', 'Author')
-        role = CreatorsRoles.query.filter_by(role_name=role_name).first()
+        role = reference_data.creators_role_by_name(role_name)
 
         if not role:
             # Default to "Author" role if not found
-            role = CreatorsRoles.query.filter_by(role_name='Author').first()
+            role = reference_data.creators_role_by_name('Author')
 
         if not role:
             continue  # Skip if no role found
@@ -292,9 +293,8 @@ def sync_single_item(uuid):
         mapped_data = DSpaceMetadataMapper.dspace_to_docid(dspace_item, current_user_id)
 
         # Get resource type ID
-        from app.models import ResourceTypes
         resource_type_name = mapped_data['publication'].get('resource_type', 'Text')
-        resource_type = ResourceTypes.query.filter_by(resource_type=resource_type_name).first()
+        resource_type = reference_data.resource_type_by_name(resource_type_name)
         resource_type_id = resource_type.id if resource_type else 1
 
         # Use DSpace handle as document_docid
@@ -482,9 +482,8 @@ def sync_batch():
                 mapped_data = DSpaceMetadataMapper.dspace_to_docid(full_item, current_user_id)
 
                 # Get resource type ID
-                from app.models import ResourceTypes
                 resource_type_name = mapped_data['publication'].get('resource_type', 'Text')
-                resource_type_obj = ResourceTypes.query.filter_by(resource_type=resource_type_name).first()
+                resource_type_obj = reference_data.resource_type_by_name(resource_type_name)
                 resource_type_id = resource_type_obj.id if resource_type_obj else 1
 
                 # Use DSpace handle as document_docid
@@ -8,8 +8,9 @@ These endpoints use the older DSpace REST API structure.
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Publications, DSpaceMapping, ResourceTypes, UserAccount
+from app.models import Publications, DSpaceMapping, UserAccount
 from app.service_dspace_legacy import DSpaceLegacyClient, DSpaceLegacyMetadataMapper
+from app.service_reference_data import reference_data
 from datetime import datetime
 import os
 
@@ -370,7 +371,7 @@ def sync_single_item(item_id):
     try:
         # Get resource type
         resource_type_name = mapped_data['publication'].get('resource_type', 'Text')
-        resource_type = ResourceTypes.query.filter_by(resource_type=resource_type_name).first()
+        resource_type = reference_data.resource_type_by_name(resource_type_name)
         resource_type_id = resource_type.id if resource_type else 1
 
         # Generate DOCiD
@@ -517,7 +518,7 @@ def batch_sync():
 
             # Get resource type
             resource_type_name = mapped_data['publication'].get('resource_type', 'Text')
-            resource_type = ResourceTypes.query.filter_by(resource_type=resource_type_name).first()
+            resource_type = reference_data.resource_type_by_name(resource_type_name)
             resource_type_id = resource_type.id if resource_type else 1
 
             # Create publication
@@ -1,6 +1,7 @@
 # app/routes/isni.py
 from flask import Blueprint, jsonify, request
 import requests
+from app.http_client import http_client
 import json
 from urllib.parse import urlencode
 
@@ -83,7 +84,7 @@ def get_isni_by_id(isni_id):
     url = f"{ISNI_STABLE_API_URL}/institution/{clean_isni}"
 
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, stale_if_error=True)
 
         if response.status_code == 200:
             data = response.json()
@@ -203,7 +204,7 @@ def search_organizations():
     print(f"ISNI API Request URL: {url}")
 
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, stale_if_error=True)
 
         if response.status_code == 200:
             data = response.json()
@@ -321,7 +322,7 @@ def search_organization():
     print(f"ISNI API Request URL: {url}")
 
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, stale_if_error=True)
 
         if response.status_code == 200:
             data = response.json()
@@ -2,6 +2,7 @@ import os
 import json
 import logging
 import requests
+from app.http_client import UPSTREAM_UNAVAILABLE, http_client
 from typing import Dict, Any, List, Optional, Union
 from flask import Blueprint, request, jsonify, current_app
 from flasgger import swag_from
@@ -51,9 +52,9 @@ def _make_request(path: str, params: dict = None, method: str = "GET", data: dic
     
     try:
         if method == "GET":
-            resp = requests.get(url, headers=headers, params=params or {})
+            resp = http_client.get(url, headers=headers, params=params or {}, stale_if_error=True)
         elif method == "POST":
-            resp = requests.post(url, headers=headers, params=params or {}, json=data)
+            resp = http_client.post(url, headers=headers, params=params or {}, json=data)
         else:
             return 400, {"error": f"Unsupported HTTP method: {method}"}
         
@@ -64,6 +65,8 @@ def _make_request(path: str, params: dict = None, method: str = "GET", data: dic
         
         return resp.status_code, response_data
     
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except requests.exceptions.RequestException as e:
         logger.error(f"Request error: {str(e)}")
         return 500, {"error": str(e)}
@@ -175,6 +178,8 @@ def get_project(project_id):
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching Project")
         return jsonify({"error": str(e)}), 500
@@ -223,6 +228,8 @@ def get_label(label_id):
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching Label")
         return jsonify({"error": str(e)}), 500
@@ -280,6 +287,8 @@ def list_projects():
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error listing Projects")
         return jsonify({"error": str(e)}), 500
@@ -315,6 +324,8 @@ def get_notice_types():
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching notice types")
         return jsonify({"error": str(e)}), 500
@@ -350,6 +361,8 @@ def get_label_types():
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching label types")
         return jsonify({"error": str(e)}), 500
@@ -395,6 +408,8 @@ def get_communities():
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching communities")
         return jsonify({"error": str(e)}), 500
@@ -438,6 +453,8 @@ def get_community(community_id):
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching community")
         return jsonify({"error": str(e)}), 500
@@ -481,6 +498,8 @@ def get_community_notices(community_id):
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching community notices")
         return jsonify({"error": str(e)}), 500
@@ -524,6 +543,8 @@ def get_community_labels(community_id):
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching community labels")
         return jsonify({"error": str(e)}), 500
@@ -567,6 +588,8 @@ def get_research_notice(notice_id):
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching researcher notice")
         return jsonify({"error": str(e)}), 500
@@ -610,6 +633,8 @@ def get_project_labels(project_id):
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching project labels")
         return jsonify({"error": str(e)}), 500
@@ -653,6 +678,8 @@ def get_project_notices(project_id):
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error fetching project notices")
         return jsonify({"error": str(e)}), 500
@@ -703,6 +730,8 @@ def search_projects():
             payload["cordra_storage"] = cordra_response
         
         return jsonify(payload), status
+    except UPSTREAM_UNAVAILABLE:
+        raise
     except Exception as e:
         logger.exception("Error searching projects")
         return jsonify({"error": str(e)}), 500
@@ -1,6 +1,7 @@
 # app/routes/orcid.py
 from flask import Blueprint, jsonify, request
 import requests
+from app.service_orcid import get_person, search_people
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required
 from app import db
 from app.models import DocIdLookup
@@ -9,9 +10,6 @@ from sqlalchemy.sql import func
 from habanero import Crossref
 import urllib.parse
 
-# ORCID API base URL (replace with the actual URL)
-ORCID_API_URL = "https://pub.orcid.org/v3.0/"
-
 orcid_bp = Blueprint("orcid", __name__, url_prefix="/api/v1/orcid")
 
 @orcid_bp.route('/get-orcid/<path:orcid_id>', methods=['GET'])
@@ -48,35 +46,22 @@ def get_researcher_profile(orcid_id):
         description: Internal server error
     """
 
-    # Extract ORCID ID from full URL if provided
-    if orcid_id.startswith('https://orcid.org/'):
-        orcid_id = orcid_id.replace('https://orcid.org/', '')
-    elif orcid_id.startswith('http://orcid.org/'):
-        orcid_id = orcid_id.replace('http://orcid.org/', '')
-
-    url = f"{ORCID_API_URL}{orcid_id}/person"
-    # print(f"url={url}")
-
-    headers = {
-        "Accept": "application/json"
-    }
-
+    # Accepts the bare iD or the full https://orcid.org/ URL; cached per iD, concurrent lookups share one call
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raise an exception for non-200 status codes
+        status_code, data = get_person(orcid_id)
     except requests.exceptions.RequestException as e:
         # Handle potential request exceptions (e.g., network issues)
         return jsonify({'error': f"Error fetching ORCID data ({e})"}), 500
-    except requests.exceptions.HTTPError as e:
-        # Handle specific ORCID API errors (based on status code)
-        if e.response.status_code == 400:
-            return jsonify({'error': "Invalid ORCID ID format"}), 400
-        elif e.response.status_code == 404:
-            return jsonify({'error': "Researcher with specified ORCID ID not found"}), 404
-        else:
-            return jsonify({'error': f"ORCID API error ({e.response.status_code})"}), e.response.status_code
 
-    return jsonify(response.json())
+    # Handle specific ORCID API errors (based on status code)
+    if status_code == 400:
+        return jsonify({'error': "Invalid ORCID ID format"}), 400
+    elif status_code == 404:
+        return jsonify({'error': "Researcher with specified ORCID ID not found"}), 404
+    elif status_code != 200:
+        return jsonify({'error': f"ORCID API error ({status_code})"}), status_code
+
+    return jsonify(data)
   
 @orcid_bp.route('/search-orcid', methods=['GET'])
   
@@ -131,28 +116,11 @@ def search_orcid():
     other_names = request.args.get('other_names')
     affiliations = request.args.get('affiliations')
 
-    # Construct the ORCID API search URL
-    base_url = "https://pub.orcid.org/v3.0/expanded-search"
-    query_parts = []
-    if first_name:
-        query_parts.append(f"given-names:{first_name}")
-    if last_name:
-        query_parts.append(f"family-name:{last_name}")
-    if other_names:
-        query_parts.append(f"given-names:{other_names}")
-    if affiliations:
-        query_parts.append(f"affiliation-org-name:{affiliations}")
-    query = " AND ".join(query_parts)
-
-    headers = {
-        'Accept': 'application/json'
-    }
-
-    # Send the GET request to ORCID API
-    response = requests.get(f"{base_url}?q={query}", headers=headers)
+    # Search ORCID; results are cached per normalized query and concurrent identical searches share one call
+    status_code, data = search_people(first_name, last_name, other_names, affiliations)
 
     # Return the response from ORCID API
-    if response.status_code == 200:
-        return jsonify(response.json())
+    if status_code == 200:
+        return jsonify(data)
     else:
-        return jsonify({"error": "Failed to retrieve data from ORCID"}), response.status_code
\ No newline at end of file
+        return jsonify({"error": "Failed to retrieve data from ORCID"}), status_code
\ No newline at end of file
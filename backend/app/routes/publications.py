@@ -6,14 +6,20 @@ from flask import Blueprint, jsonify, request, Response, abort
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required
 from app import db
 from app.models import Publications,PublicationFiles,PublicationDocuments,PublicationCreators,PublicationOrganization,PublicationFunders,PublicationProjects
-from app.models import ResourceTypes,FunderTypes,CreatorsRoles,creatorsIdentifiers,PublicationIdentifierTypes,PublicationTypes,UserAccount,PublicationDrafts,PublicationAuditTrail
+from app.models import UserAccount,PublicationDrafts,PublicationAuditTrail
 # from app.service_codra import push_apa_metadata
 # CORDRA imports removed - functionality moved to push_to_cordra.py script
 # from app.service_codra import update_object
 from app.service_identifiers import IdentifierService
-from sqlalchemy import desc
-import xml.etree.ElementTree as ET
+from app.service_publications import load_publication, serialize_publication, publication_to_xml, parse_fields
+from app.publication_cache import invalidate_publication
+from app.service_reference_data import reference_data
+from app.service_handle_pool import pool_is_low
+from app.service_analytics import get_publications_stats
+from sqlalchemy import desc, and_, or_
 from datetime import datetime
+import base64
+import hashlib
 import re
 import json
 from config import Config
@@ -57,6 +63,120 @@ def clean_undefined_string(value):
         return None
     return value
 
+# Sort keys accepted by get-publications, mapped to their model columns
+PUBLICATION_SORT_COLUMNS = {
+    'published': Publications.published,
+    'title': Publications.document_title,
+    'id': Publications.id,
+}
+
+def encode_publication_cursor(sort_field, order, publication):
+    """Build an opaque keyset cursor pointing just after the given publication"""
+    value = None
+    if sort_field == 'published':
+        value = publication.published.isoformat() if publication.published else None
+    elif sort_field == 'title':
+        value = publication.document_title
+    payload = {'s': sort_field, 'o': order, 'v': value, 'id': publication.id}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_publication_cursor(cursor):
+    """Decode a keyset cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if payload['s'] not in PUBLICATION_SORT_COLUMNS or payload['o'] not in ('asc', 'desc'):
+            raise ValueError('unknown sort in cursor')
+        last_id = int(payload['id'])
+        value = payload.get('v')
+        if payload['s'] == 'published' and value is not None:
+            value = datetime.fromisoformat(value)
+        return payload['s'], payload['o'], value, last_id
+    except (KeyError, TypeError, ValueError, json.JSONDecodeError, UnicodeError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
+
+def publication_keyset_filter(sort_field, order, value, last_id):
+    """
+    Filter selecting the rows strictly after (value, last_id) in the given ordering.
+
+    Matches PostgreSQL's default NULL placement (NULLs last for ASC, first for DESC)
+    so that publications without a published date are neither skipped nor repeated.
+    """
+    id_after = Publications.id < last_id if order == 'desc' else Publications.id > last_id
+    if sort_field == 'id':
+        return id_after
+
+    column = PUBLICATION_SORT_COLUMNS[sort_field]
+    if value is None:
+        if order == 'desc':
+            # NULL group comes first; continue within it, then every non-NULL row
+            return or_(and_(column.is_(None), id_after), column.isnot(None))
+        # NULL group comes last; only the rest of it remains
+        return and_(column.is_(None), id_after)
+
+    value_after = column < value if order == 'desc' else column > value
+    condition = or_(value_after, and_(column == value, id_after))
+    if order == 'asc':
+        condition = or_(condition, column.is_(None))
+    return condition
+
+# Response shape of each reference list, keyed by reference_data table name
+REFERENCE_LIST_SERIALIZERS = {
+    'resource_types': lambda row: { 'resource_type': row.resource_type, 'id': row.id},
+    'funder_types': lambda row: { 'funder_type_name': row.funder_type_name, 'id': row.id},
+    'creators_roles': lambda row: { 'role_id': row.role_id, 'role_name': row.role_name },
+    'creators_identifiers': lambda row: { 'id': row.id, 'identifier_name': row.identifier_name },
+    'identifier_types': lambda row: { 'identifier_type_name': row.identifier_type_name, 'id': row.id},
+    'publication_types': lambda row: { 'publication_type_name': row.publication_type_name, 'id': row.id},
+}
+
+
+def reference_list(table):
+    """Serialize a reference table from the in-process registry snapshot"""
+    serializer = REFERENCE_LIST_SERIALIZERS[table]
+    return [serializer(row) for row in reference_data.all(table)]
+
+
+def reference_list_response(payload):
+    """
+    Return a reference list with a strong ETag and a long Cache-Control lifetime,
+    answering 304 Not Modified when the client's If-None-Match still matches
+    """
+    response = jsonify(payload)
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.REFERENCE_LIST_MAX_AGE
+    return response.make_conditional(request)
+
+
+@publications_bp.route('/get-list-all', methods=['GET'])
+# @jwt_required()
+def get_all_reference_lists():
+
+    """
+    Fetches every reference list used by the assign-DocID form in one request
+    ---
+    tags:
+      - Publications
+    responses:
+      200:
+        description: Object with resource_types, funder_types, creators_roles, creators_identifiers, identifier_types and publication_types lists
+        schema:
+          type: object
+      304:
+        description: Not modified since the ETag sent in If-None-Match
+      500:
+        description: Internal server error
+    """
+
+    try:
+        bundle = {table: reference_list(table) for table in REFERENCE_LIST_SERIALIZERS}
+        return reference_list_response(bundle)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @publications_bp.route('/get-list-resource-types', methods=['GET'])
 # @jwt_required()
 def get_resource_types():
@@ -74,16 +194,17 @@ def get_resource_types():
           items:
             type: object
             # ... properties of a resource-types object ...
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       500:
         description: Internal server error
     """
 
     try:
-        data = ResourceTypes.query.all()
-        if len(data) == 0:
+        data_list = reference_list('resource_types')
+        if len(data_list) == 0:
             return jsonify({'message': 'No matching resource types found'}), 404
-        data_list = [{ 'resource_type': row.resource_type, 'id': row.id} for row in data]
-        return jsonify(data_list)
+        return reference_list_response(data_list)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -106,16 +227,17 @@ def get_funder_types():
           items:
             type: object
             # ... properties of a funder-types object ...
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       500:
         description: Internal server error
     """
 
     try:
-        data = FunderTypes.query.all()
-        if len(data) == 0:
+        data_list = reference_list('funder_types')
+        if len(data_list) == 0:
             return jsonify({'message': 'No matching funder types found'}), 404
-        data_list = [{ 'funder_type_name': row.funder_type_name, 'id': row.id} for row in data]
-        return jsonify(data_list)
+        return reference_list_response(data_list)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -137,16 +259,17 @@ def get_creators_roles():
           items:
             type: object
             # ... properties of a  Creators & Organization creators-roles object ...
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       500:
         description: Internal server error
     """
 
     try:
-        data = CreatorsRoles.query.all()
-        if len(data) == 0:
+        data_list = reference_list('creators_roles')
+        if len(data_list) == 0:
             return jsonify({'message': 'No matching creators roles found'}), 404
-        data_list = [{ 'role_id': row.role_id, 'role_name': row.role_name } for row in data]
-        return jsonify(data_list)
+        return reference_list_response(data_list)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -167,16 +290,17 @@ def get_creators_identifiers():
           items:
             type: object
             # ... properties of a  Creators identifiers object ...
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       500:
         description: Internal server error
     """
 
     try:
-        data = creatorsIdentifiers.query.all()
-        if len(data) == 0:
+        data_list = reference_list('creators_identifiers')
+        if len(data_list) == 0:
             return jsonify({'message': 'No matching creators identifiers found'}), 404
-        data_list = [{ 'id': row.id, 'identifier_name': row.identifier_name } for row in data]
-        return jsonify(data_list)
+        return reference_list_response(data_list)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -198,16 +322,17 @@ def get_identifier_types():
           items:
             type: object
             # ... properties of a identifier-types object ...
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       500:
         description: Internal server error
     """
 
     try:
-        data = PublicationIdentifierTypes.query.all()
-        if len(data) == 0:
+        data_list = reference_list('identifier_types')
+        if len(data_list) == 0:
             return jsonify({'message': 'No matching identifier type found'}), 404
-        data_list = [{ 'identifier_type_name': row.identifier_type_name, 'id': row.id} for row in data]
-        return jsonify(data_list)
+        return reference_list_response(data_list)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -230,16 +355,17 @@ def get_publication_types():
           items:
             type: object
             # ... properties of a publication-types object ...
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       500:
         description: Internal server error
     """
 
     try:
-        data = PublicationTypes.query.all()
-        if len(data) == 0:
+        data_list = reference_list('publication_types')
+        if len(data_list) == 0:
             return jsonify({'message': 'No matching publication type found'}), 404
-        data_list = [{ 'publication_type_name': row.publication_type_name, 'id': row.id} for row in data]
-        return jsonify(data_list)
+        return reference_list_response(data_list)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -318,6 +444,20 @@ def get_all_publications():
         name: order
         type: string
         description: Sorting order ("asc" for ascending, "desc" for descending). Default is "desc".
+      - in: query
+        name: cursor
+        type: string
+        description: >
+          Opaque keyset cursor. Pass an empty value to start cursor pagination, then the
+          returned next_cursor to fetch following pages. When present, page is ignored.
+      - in: query
+        name: include_total
+        type: boolean
+        description: Set to false to skip counting all matching publications. Default is true.
+      - in: query
+        name: include
+        type: string
+        description: Set to "stats" to add views, downloads and comments to every publication on the page.
     responses:
       200:
         description: List of publications (with optional filters, pagination, and sorting)
@@ -341,6 +481,9 @@ def get_all_publications():
                     type: integer
                   published:
                     type: string
+                  stats:
+                    type: object
+                    description: Views, downloads and comments (only with include=stats)
             pagination:
               type: object
               properties:
@@ -352,6 +495,12 @@ def get_all_publications():
                   type: integer
                 total_pages:
                   type: integer
+                next_cursor:
+                  type: string
+                  description: Cursor for the next page (cursor mode only, null on the last page)
+                has_more:
+                  type: boolean
+                  description: Whether more publications follow this page (cursor mode only)
       400:
         description: Bad request
       500:
@@ -377,10 +526,16 @@ def get_all_publications():
             return jsonify({'message': 'Invalid order parameter (must be "asc" or "desc")'}), 400
 
         # Validate and set sort field
-        valid_sort_fields = ['published', 'title', 'id']
+        valid_sort_fields = list(PUBLICATION_SORT_COLUMNS)
         if sort_field not in valid_sort_fields:
             return jsonify({'message': f'Invalid sort field (must be one of {valid_sort_fields})'}), 400
 
+        # Keyset pagination is enabled by the presence of the cursor parameter
+        cursor_mode = 'cursor' in request.args
+        cursor = request.args.get('cursor', '')
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
+        include = {part.strip() for part in request.args.get('include', '').split(',') if part.strip()}
+
         # Build the query using the Publications model
         query = Publications.query
 
@@ -391,19 +546,38 @@ def get_all_publications():
             except ValueError:
                 return jsonify({'message': 'Invalid resource_type_id (must be an integer)'}), 400
 
-        # Apply sorting
-        sort_column = getattr(Publications, sort_field)
-        if order == 'desc':
-            sort_column = desc(sort_column)
-
-        # Apply sorting and pagination
-        offset = (page - 1) * page_size
-        publications = (
-            query.order_by(sort_column)
-            .limit(page_size)
-            .offset(offset)
-            .all()
-        )
+        # Apply sorting, with id as a tie-breaker so page boundaries are stable
+        sort_column = PUBLICATION_SORT_COLUMNS[sort_field]
+        order_by = [desc(sort_column) if order == 'desc' else sort_column]
+        if sort_field != 'id':
+            order_by.append(desc(Publications.id) if order == 'desc' else Publications.id)
+
+        if cursor_mode:
+            page_query = query
+            if cursor:
+                try:
+                    cursor_sort, cursor_order, last_value, last_id = decode_publication_cursor(cursor)
+                except ValueError as e:
+                    return jsonify({'message': str(e)}), 400
+                if cursor_sort != sort_field or cursor_order != order:
+                    return jsonify({'message': 'Cursor does not match the requested sort and order'}), 400
+                page_query = page_query.filter(
+                    publication_keyset_filter(sort_field, order, last_value, last_id)
+                )
+
+            # Fetch one extra row to learn whether another page follows
+            rows = page_query.order_by(*order_by).limit(page_size + 1).all()
+            has_more = len(rows) > page_size
+            publications = rows[:page_size]
+        else:
+            # Apply sorting and pagination
+            offset = (page - 1) * page_size
+            publications = (
+                query.order_by(*order_by)
+                .limit(page_size)
+                .offset(offset)
+                .all()
+            )
 
         # Prepare the response data
         data_list = [
@@ -424,14 +598,28 @@ def get_all_publications():
             for pub in publications
         ]
 
+        # Stats for the whole page in two grouped queries instead of one request per card
+        if 'stats' in include:
+            page_stats = get_publications_stats([pub.id for pub in publications])
+            for item in data_list:
+                item['stats'] = page_stats[item['id']]
+
         # Pagination metadata
-        total_publications = query.count()
-        pagination = {
-            'total': total_publications,
-            'page': page,
-            'page_size': page_size,
-            'total_pages': (total_publications + page_size - 1) // page_size
-        }
+        total_publications = query.count() if include_total else None
+        if cursor_mode:
+            pagination = {
+                'total': total_publications,
+                'page_size': page_size,
+                'next_cursor': encode_publication_cursor(sort_field, order, publications[-1]) if has_more else None,
+                'has_more': has_more
+            }
+        else:
+            pagination = {
+                'total': total_publications,
+                'page': page,
+                'page_size': page_size,
+                'total_pages': (total_publications + page_size - 1) // page_size if include_total else None
+            }
 
         return jsonify({
             'data': data_list,
@@ -468,6 +656,11 @@ def get_publication(publication_id):
         type: string
         required: false
         description: The format of the response, either "json" or "xml". Default is "json".
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Comma-separated projection of fields and related collections to return (e.g. "id,document_title,publication_creators"). Default is all.
     responses:
       200:
         description: Publication details
@@ -493,8 +686,13 @@ def get_publication(publication_id):
                 logger.warning(f"Invalid user_id format: {user_id_str}")
                 return jsonify({'message': 'Invalid user_id format (must be an integer)'}), 400
 
-        # First check if the publication exists
-        publication = Publications.query.filter_by(id=publication_id).first()
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
+        # Load the publication and the related collections it will be serialized with
+        publication = load_publication(fields, id=publication_id)
         if not publication:
             logger.warning(f"Publication not found with ID: {publication_id}")
             return jsonify({'message': 'Publication not found'}), 404
@@ -508,126 +706,17 @@ def get_publication(publication_id):
                 logger.info(f"User {user_id} has access to publication {publication_id}")
         else:
             logger.info(f"No user_id filter provided, showing publication {publication_id} to anyone")
-            
-        # Now fetch the publication with all its related data
-        data = Publications.query \
-            .options(
-                db.joinedload(Publications.publications_files),
-                db.joinedload(Publications.publication_documents),
-                db.joinedload(Publications.publication_creators),
-                db.joinedload(Publications.publication_organizations),
-                db.joinedload(Publications.publication_funders),
-                db.joinedload(Publications.publication_projects)
-            ) \
-            .filter_by(id=publication_id) \
-            .first()
-            
-        # If data is None at this point, something went wrong
-        if data is None:
-            logger.error(f"Publication data with ID {publication_id} couldn't be loaded with relations")
-            return jsonify({'message': 'Error loading publication data'}), 500
-
-        # Create a dictionary for the main publication data
-        publication_dict = {}
-        desired_fields = ['id', 'document_title', 'document_description', 'document_docid',
-                          'resource_type_id', 'user_id', 'avatar', 'owner', 'publication_poster_url', 'doi', 'published', 'handle_url']
 
         # Log publication details
-        logger.info(f"Fetching publication details for ID: {publication_id}, User ID: {getattr(data, 'user_id', 'unknown')}")
-        
-        for field in desired_fields:
-            if hasattr(data, field):
-                # Special handling for datetime fields
-                if field == 'published' and getattr(data, field):
-                    publication_dict[field] = int(getattr(data, field).timestamp())
-                else:
-                    publication_dict[field] = getattr(data, field)
+        logger.info(f"Fetching publication details for ID: {publication_id}, User ID: {publication.user_id}")
 
-        # Add related data
-        publication_dict['publications_files'] = [
-            {
-                'id': file.id,
-                'title': file.title,
-                'description': file.description,
-                'publication_type_id': file.publication_type_id,
-                'file_name': file.file_name,
-                'file_type': file.file_type,
-                'file_url': file.file_url,
-                'identifier': file.identifier,
-                'generated_identifier': file.generated_identifier
-            } for file in data.publications_files
-        ]
-
-        publication_dict['publication_documents'] = [
-            {
-                'id': doc.id,
-                'title': doc.title,
-                'description': doc.description,
-                'publication_type': doc.publication_type_id,
-                'file_url': doc.file_url,
-                'identifier': doc.identifier_type_id,
-                'generated_identifier': doc.generated_identifier
-            } for doc in data.publication_documents
-        ]
-
-        publication_dict['publication_creators'] = [
-            {
-                'id': creator.id,
-                'family_name': creator.family_name,
-                'given_name': creator.given_name,
-                'identifier': creator.identifier,
-                'role': creator.role_id
-            } for creator in data.publication_creators
-        ]
-
-        publication_dict['publication_organizations'] = [
-            {
-                'id': org.id,
-                'name': org.name,
-                'type': org.type,
-                'other_name': org.other_name,
-                'country': org.country
-            } for org in data.publication_organizations
-        ]
-
-        publication_dict['publication_funders'] = [
-            {
-                'id': funder.id,
-                'name': funder.name,
-                'type': funder.type,
-                'funder_type': funder.funder_type_id,
-                'other_name': funder.other_name,
-                'country': funder.country
-            } for funder in data.publication_funders
-        ]
-
-        publication_dict['publication_projects'] = [
-            {
-                'id': project.id,
-                'title': project.title,
-                'raid_id': project.raid_id,
-                'description': project.description
-            } for project in data.publication_projects
-        ]
+        publication_dict = serialize_publication(publication, fields)
 
         # Determine response format
         response_type = request.args.get('type', 'json').lower()
 
         if response_type == 'xml':
-            # Convert the dictionary to XML
-            root = ET.Element("publication")
-            for key, value in publication_dict.items():
-                if isinstance(value, list):
-                    list_root = ET.SubElement(root, key)
-                    for item in value:
-                        item_root = ET.SubElement(list_root, "item")
-                        for k, v in item.items():
-                            ET.SubElement(item_root, k).text = str(v)
-                else:
-                    ET.SubElement(root, key).text = str(value)
-
-            xml_response = ET.tostring(root, encoding='utf-8')
-            return Response(xml_response, content_type='application/xml')
+            return Response(publication_to_xml(publication_dict), content_type='application/xml')
 
         # Default to JSON response
         return jsonify(publication_dict), 200
@@ -654,6 +743,11 @@ def get_publication_by_docid_prefix():
         type: string
         required: false
         description: The format of the response, either "json" or "xml". Default is "json".
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Comma-separated projection of fields and related collections to return (e.g. "id,document_title,publication_creators"). Default is all.
     responses:
       200:
         description: Publication details
@@ -669,120 +763,24 @@ def get_publication_by_docid_prefix():
         if not document_docid:
             return jsonify({'error': 'docid parameter is required'}), 400
 
-        # Retrieve the publication data with all related tables using joinedload
-        data = Publications.query \
-            .options(
-                db.joinedload(Publications.publications_files),
-                db.joinedload(Publications.publication_documents),
-                db.joinedload(Publications.publication_creators),
-                db.joinedload(Publications.publication_organizations),
-                db.joinedload(Publications.publication_funders),
-                db.joinedload(Publications.publication_projects)
-            ) \
-            .filter_by(document_docid=document_docid) \
-            .first()
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
+        # Retrieve the publication data with the requested related tables
+        data = load_publication(fields, document_docid=document_docid)
 
         if not data:
             return jsonify({'message': 'No matching records found'}), 404
 
-        # Create a dictionary for the main publication data
-        publication_dict = {}
-        desired_fields = ['id', 'document_title', 'document_description', 'document_docid',
-                          'resource_type_id', 'user_id', 'avatar', 'owner', 'publication_poster_url', 'doi', 'published', 'handle_url']
-
-        # Update main publication data with Unix timestamp for `published`
-        for field in desired_fields:
-            if hasattr(data, field):
-                if field == 'published' and getattr(data, field):
-                    publication_dict[field] = int(getattr(data, field).timestamp())
-                else:
-                    publication_dict[field] = getattr(data, field)
-
-        # Add related data
-        publication_dict['publications_files'] = [
-            {
-                'id': file.id,
-                'title': file.title,
-                'description': file.description,
-                'publication_type_id': file.publication_type_id,
-                'file_name': file.file_name,
-                'file_type': file.file_type,
-                'file_url': file.file_url,
-                'identifier': file.identifier,
-                'generated_identifier': file.generated_identifier
-            } for file in data.publications_files
-        ]
-
-        publication_dict['publication_documents'] = [
-            {
-                'id': doc.id,
-                'title': doc.title,
-                'description': doc.description,
-                'publication_type': doc.publication_type_id,
-                'file_url': doc.file_url,
-                'identifier': doc.identifier_type_id,
-                'generated_identifier': doc.generated_identifier
-            } for doc in data.publication_documents
-        ]
-
-        publication_dict['publication_creators'] = [
-            {
-                'id': creator.id,
-                'family_name': creator.family_name,
-                'given_name': creator.given_name,
-                'identifier': creator.identifier,
-                'role': creator.role_id
-            } for creator in data.publication_creators
-        ]
-
-        publication_dict['publication_organizations'] = [
-            {
-                'id': org.id,
-                'name': org.name,
-                'type': org.type,
-                'other_name': org.other_name,
-                'country': org.country
-            } for org in data.publication_organizations
-        ]
-
-        publication_dict['publication_funders'] = [
-            {
-                'id': funder.id,
-                'name': funder.name,
-                'type': funder.type,
-                'funder_type': funder.funder_type_id,
-                'other_name': funder.other_name,
-                'country': funder.country
-            } for funder in data.publication_funders
-        ]
-
-        publication_dict['publication_projects'] = [
-            {
-                'id': project.id,
-                'title': project.title,
-                'raid_id': project.raid_id,
-                'description': project.description
-            } for project in data.publication_projects
-        ]
+        publication_dict = serialize_publication(data, fields)
 
         # Determine response format
         response_type = request.args.get('type', 'json').lower()
 
         if response_type == 'xml':
-            # Convert the dictionary to XML
-            root = ET.Element("publication")
-            for key, value in publication_dict.items():
-                if isinstance(value, list):
-                    list_root = ET.SubElement(root, key)
-                    for item in value:
-                        item_root = ET.SubElement(list_root, "item")
-                        for k, v in item.items():
-                            ET.SubElement(item_root, k).text = str(v)
-                else:
-                    ET.SubElement(root, key).text = str(value)
-
-            xml_response = ET.tostring(root, encoding='utf-8')
-            return Response(xml_response, content_type='application/xml')
+            return Response(publication_to_xml(publication_dict), content_type='application/xml')
 
         # Default to JSON response
         return jsonify(publication_dict), 200
@@ -812,6 +810,11 @@ def get_publication_by_docid_simple(document_docid):
         type: string
         required: false
         description: The format of the response, either "json" or "xml". Default is "json".
+      - in: query
+        name: fields
+        type: string
+        required: false
+        description: Comma-separated projection of fields and related collections to return (e.g. "id,document_title,publication_creators"). Default is all.
     responses:
       200:
         description: Publication details
@@ -830,121 +833,25 @@ def get_publication_by_docid_simple(document_docid):
             
         logger.info(f"get_publication_by_docid_simple called with document_docid={document_docid}")
         
-        # Retrieve the publication data with all related tables using joinedload
-        data = Publications.query \
-            .options(
-                db.joinedload(Publications.publications_files),
-                db.joinedload(Publications.publication_documents),
-                db.joinedload(Publications.publication_creators),
-                db.joinedload(Publications.publication_organizations),
-                db.joinedload(Publications.publication_funders),
-                db.joinedload(Publications.publication_projects)
-            ) \
-            .filter_by(document_docid=document_docid) \
-            .first()
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
+        # Retrieve the publication data with the requested related tables
+        data = load_publication(fields, document_docid=document_docid)
 
         if not data:
             logger.warning(f"No publication found with DocID: {document_docid}")
             return jsonify({'message': 'No matching records found'}), 404
 
-        # Create a dictionary for the main publication data
-        publication_dict = {}
-        desired_fields = ['id', 'document_title', 'document_description', 'document_docid',
-                          'resource_type_id', 'user_id', 'avatar', 'owner', 'publication_poster_url', 'doi', 'published', 'handle_url']
-
-        # Update main publication data with Unix timestamp for `published`
-        for field in desired_fields:
-            if hasattr(data, field):
-                if field == 'published' and getattr(data, field):
-                    publication_dict[field] = int(getattr(data, field).timestamp())
-                else:
-                    publication_dict[field] = getattr(data, field)
-
-        # Add related data
-        publication_dict['publications_files'] = [
-            {
-                'id': file.id,
-                'title': file.title,
-                'description': file.description,
-                'publication_type_id': file.publication_type_id,
-                'file_name': file.file_name,
-                'file_type': file.file_type,
-                'file_url': file.file_url,
-                'identifier': file.identifier,
-                'generated_identifier': file.generated_identifier
-            } for file in data.publications_files
-        ]
-
-        publication_dict['publication_documents'] = [
-            {
-                'id': doc.id,
-                'title': doc.title,
-                'description': doc.description,
-                'publication_type': doc.publication_type_id,
-                'file_url': doc.file_url,
-                'identifier': doc.identifier_type_id,
-                'generated_identifier': doc.generated_identifier
-            } for doc in data.publication_documents
-        ]
-
-        publication_dict['publication_creators'] = [
-            {
-                'id': creator.id,
-                'family_name': creator.family_name,
-                'given_name': creator.given_name,
-                'identifier': creator.identifier,
-                'role': creator.role_id
-            } for creator in data.publication_creators
-        ]
-
-        publication_dict['publication_organizations'] = [
-            {
-                'id': org.id,
-                'name': org.name,
-                'type': org.type,
-                'other_name': org.other_name,
-                'country': org.country
-            } for org in data.publication_organizations
-        ]
-
-        publication_dict['publication_funders'] = [
-            {
-                'id': funder.id,
-                'name': funder.name,
-                'type': funder.type,
-                'funder_type': funder.funder_type_id,
-                'other_name': funder.other_name,
-                'country': funder.country
-            } for funder in data.publication_funders
-        ]
-
-        publication_dict['publication_projects'] = [
-            {
-                'id': project.id,
-                'title': project.title,
-                'raid_id': project.raid_id,
-                'description': project.description
-            } for project in data.publication_projects
-        ]
+        publication_dict = serialize_publication(data, fields)
 
         # Determine response format
         response_type = request.args.get('type', 'json').lower()
 
         if response_type == 'xml':
-            # Convert the dictionary to XML
-            root = ET.Element("publication")
-            for key, value in publication_dict.items():
-                if isinstance(value, list):
-                    list_root = ET.SubElement(root, key)
-                    for item in value:
-                        item_root = ET.SubElement(list_root, "item")
-                        for k, v in item.items():
-                            ET.SubElement(item_root, k).text = str(v)
-                else:
-                    ET.SubElement(root, key).text = str(value)
-
-            xml_response = ET.tostring(root, encoding='utf-8')
-            return Response(xml_response, content_type='application/xml')
+            return Response(publication_to_xml(publication_dict), content_type='application/xml')
 
         # Default to JSON response
         logger.info(f"Successfully retrieved publication for DocID: {document_docid}")
@@ -1139,7 +1046,7 @@ def create_publication():
             return jsonify({"message": f"Invalid resource type '{resource_type}'."}), 400
 
         # Now validate the resource type by querying the database
-        resource_type_obj = ResourceTypes.query.filter_by(id=resource_type).first()
+        resource_type_obj = reference_data.resource_type(resource_type)
         if not resource_type_obj:
             logger.error(f"Resource type '{resource_type}' validation failed")
             return jsonify({"message": f"Invalid resource type '{resource_type}'."}), 400
@@ -1238,7 +1145,7 @@ def create_publication():
                 logger.error(f"Publication type is required at index {index}")
                 return jsonify({'message': f'Publication type is required at index {index}.'}), 400
                 
-            publication_type_obj = PublicationTypes.query.filter_by(id=publication_type).first()
+            publication_type_obj = reference_data.publication_type(publication_type)
             if not publication_type_obj:
                 logger.error(f"Invalid publication type '{publication_type}' at index {index}")
                 return jsonify({'message': f'Invalid publication type \'{publication_type}\' at index {index}.'}), 400
@@ -1326,7 +1233,7 @@ def create_publication():
               logger.error(f"Publication type is required at index {index}")
               return jsonify({'message': f'Publication type is required at index {index}.'}), 400
                 
-          publication_type_obj = PublicationTypes.query.filter_by(id=publication_type).first()
+          publication_type_obj = reference_data.publication_type(publication_type)
           if not publication_type_obj:
               logger.error(f"Invalid publication type '{publication_type}' at index {index}")
               return jsonify({'message': f'Invalid publication type \'{publication_type}\' at index {index}.'}), 400
@@ -1343,7 +1250,7 @@ def create_publication():
                   return jsonify({'message': f'Invalid input for identifier_type_id at index {index}. Expected an integer.'}), 400
               
               # Validate identifier type
-              identifier_type = PublicationIdentifierTypes.query.filter_by(id=identifier_type_id).first()
+              identifier_type = reference_data.identifier_type(identifier_type_id)
               if not identifier_type:
                   logger.error(f"Invalid identifier type ID {identifier_type_id} at index {index}")
                   return jsonify({'message': f'Invalid identifier type ID {identifier_type_id} at index {index}.'}), 400
@@ -1474,7 +1381,7 @@ def create_publication():
             #     return jsonify({'message': f'Invalid input for Publication Creators role_id at index {index}. Expected an integer.'}), 400
 
             # Validate role
-            creators_role = CreatorsRoles.validate_creators_role(role_id)
+            creators_role = reference_data.creators_role(role_id) if isinstance(role_id, str) else None
             if not creators_role:
                 logger.error(f"Invalid creators role '{role_id}' at index {index}")
                 raise ValueError(f"Invalid creators role '{role_id}'.")
@@ -1673,7 +1580,7 @@ def create_publication():
                 logger.error(f"Funder type is required at index {index}")
                 return jsonify({'message': f'Funder type is required at index {index}.'}), 400
                 
-            funder_type_obj = FunderTypes.query.filter_by(id=funder_type).first()
+            funder_type_obj = reference_data.funder_type(funder_type)
             if not funder_type_obj:
                 logger.error(f"Invalid Funders type '{funder_type}' at index {index}")
                 return jsonify({'message': f'Invalid Funders type \'{funder_type}\' at index {index}.'}), 400
@@ -1751,6 +1658,21 @@ def create_publication():
         
         logger.info(f"=== SUCCESS: Publication created successfully with ID: {publication_id} ===")
 
+        # Fill in handles the pool could not cover, and keep the pool topped up, outside the request
+        pending_handles = any(
+            row.external_identifier_type == 'DOI' and not row.handle_identifier
+            for row in files_publications + files_documents
+        )
+        try:
+            from app.tasks import assign_pending_handles_async, replenish_handle_pool_async
+            if pending_handles:
+                assign_pending_handles_async.apply_async(args=[publication_id])
+                logger.info(f"Scheduled pending handle assignment for publication {publication_id}")
+            elif pool_is_low():
+                replenish_handle_pool_async.apply_async()
+        except Exception as e:
+            logger.warning(f"Could not schedule handle tasks ({str(e)}). Pending handles will be assigned by replenish_handle_pool.py")
+
         # Prepare full publication data to return
         publication_data = {
             'id': publication.id,
@@ -2146,7 +2068,7 @@ def update_publication(publication_id):
             try:
                 resource_type_id = int(new_resource_type)
                 # Validate resource type exists
-                resource_type_obj = ResourceTypes.query.filter_by(id=resource_type_id).first()
+                resource_type_obj = reference_data.resource_type(resource_type_id)
                 if not resource_type_obj:
                     return jsonify({'message': f'Invalid resource type ID: {resource_type_id}'}), 400
                 
@@ -2208,6 +2130,7 @@ def update_publication(publication_id):
             try:
                 db.session.commit()
                 logger.info(f"Publication {publication_id} updated successfully with {len(changes_made)} changes")
+                invalidate_publication(publication.document_docid)
                 
                 # Log each change in audit trail
                 for change in changes_made:
@@ -2269,6 +2192,11 @@ def get_publication_for_edit(publication_id):
         type: integer
         required: true
         description: The user ID requesting edit access (must own the publication).
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma-separated projection of fields and related collections to return. Default is all.
     responses:
       200:
         description: Publication data for editing
@@ -2294,8 +2222,13 @@ def get_publication_for_edit(publication_id):
         except ValueError:
             return jsonify({'message': 'Invalid user_id format (must be an integer)'}), 400
         
-        # Check if publication exists
-        publication = Publications.query.filter_by(id=publication_id).first()
+        try:
+            fields = parse_fields(request.args.get('fields'), detailed=True)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
+        # Load the publication with all related data needed by the edit form
+        publication = load_publication(fields, id=publication_id)
         if not publication:
             logger.warning(f"Publication not found with ID: {publication_id}")
             return jsonify({'message': 'Publication not found'}), 404
@@ -2309,117 +2242,8 @@ def get_publication_for_edit(publication_id):
         # TODO: Implement status checking when status field is available
         # For now, assume all publications can be edited
         
-        # Use existing get_publication endpoint logic but with ownership already validated
-        # Fetch publication with all related data
-        data = Publications.query \
-            .options(
-                db.joinedload(Publications.publications_files),
-                db.joinedload(Publications.publication_documents),
-                db.joinedload(Publications.publication_creators),
-                db.joinedload(Publications.publication_organizations),
-                db.joinedload(Publications.publication_funders),
-                db.joinedload(Publications.publication_projects)
-            ) \
-            .filter_by(id=publication_id) \
-            .first()
-        
-        if data is None:
-            logger.error(f"Publication data with ID {publication_id} couldn't be loaded with relations")
-            return jsonify({'message': 'Error loading publication data'}), 500
-        
-        # Build response data (similar to get_publication but optimized for editing)
-        publication_dict = {}
-        desired_fields = ['id', 'document_title', 'document_description', 'document_docid',
-                          'resource_type_id', 'user_id', 'avatar', 'owner', 'publication_poster_url', 
-                          'doi', 'published', 'updated_at', 'updated_by']
-        
-        for field in desired_fields:
-            if hasattr(data, field):
-                value = getattr(data, field)
-                if field in ['published', 'updated_at'] and value:
-                    publication_dict[field] = int(value.timestamp())
-                else:
-                    publication_dict[field] = value
-        
-        # Add related data
-        publication_dict['publications_files'] = [
-            {
-                'id': file.id,
-                'title': file.title,
-                'description': file.description,
-                'publication_type_id': file.publication_type_id,
-                'file_name': file.file_name,
-                'file_type': file.file_type,
-                'file_url': file.file_url,
-                'identifier': file.identifier,
-                'generated_identifier': file.generated_identifier,
-                'handle_identifier': getattr(file, 'handle_identifier', None),
-                'external_identifier': getattr(file, 'external_identifier', None),
-                'external_identifier_type': getattr(file, 'external_identifier_type', None)
-            } for file in data.publications_files
-        ]
-        
-        publication_dict['publication_documents'] = [
-            {
-                'id': doc.id,
-                'title': doc.title,
-                'description': doc.description,
-                'publication_type': doc.publication_type_id,
-                'file_url': doc.file_url,
-                'identifier': doc.identifier_type_id,
-                'generated_identifier': doc.generated_identifier,
-                'handle_identifier': getattr(doc, 'handle_identifier', None),
-                'external_identifier': getattr(doc, 'external_identifier', None),
-                'external_identifier_type': getattr(doc, 'external_identifier_type', None)
-            } for doc in data.publication_documents
-        ]
-        
-        publication_dict['publication_creators'] = [
-            {
-                'id': creator.id,
-                'family_name': creator.family_name,
-                'given_name': creator.given_name,
-                'identifier': creator.identifier,
-                'role': creator.role_id,
-                'identifier_type': getattr(creator, 'identifier_type', None)
-            } for creator in data.publication_creators
-        ]
-        
-        publication_dict['publication_organizations'] = [
-            {
-                'id': org.id,
-                'name': org.name,
-                'type': org.type,
-                'other_name': org.other_name,
-                'country': org.country,
-                'identifier': getattr(org, 'identifier', None),
-                'identifier_type': getattr(org, 'identifier_type', None)
-            } for org in data.publication_organizations
-        ]
-        
-        publication_dict['publication_funders'] = [
-            {
-                'id': funder.id,
-                'funder_name': funder.funder_name,
-                'funder_type_id': funder.funder_type_id,
-                'award_number': funder.award_number,
-                'award_title': funder.award_title,
-                'award_uri': funder.award_uri,
-                'identifier': getattr(funder, 'identifier', None),
-                'identifier_type': getattr(funder, 'identifier_type', None)
-            } for funder in data.publication_funders
-        ]
-        
-        publication_dict['publication_projects'] = [
-            {
-                'id': project.id,
-                'project_name': project.project_name,
-                'project_description': project.project_description,
-                'project_acronym': project.project_acronym,
-                'identifier': getattr(project, 'identifier', None),
-                'identifier_type': getattr(project, 'identifier_type', None)
-            } for project in data.publication_projects
-        ]
+        # Build response data (same shape as get_publication plus identifier details for editing)
+        publication_dict = serialize_publication(publication, fields, detailed=True)
         
         logger.info(f"Publication data for edit retrieved successfully: ID={publication_id}, User={user_id}")
         return jsonify(publication_dict), 200
@@ -6,6 +6,7 @@ import logging
 import re
 from typing import Dict, Optional
 import requests
+from app.http_client import http_client
 from datetime import datetime, timedelta
 import time
 
@@ -140,11 +141,10 @@ def fetch_new_token() -> Optional[str]:
         }
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
 
-        response = requests.post(
+        response = http_client.post(
             RAID_CONFIG['TOKEN_URL'],
             headers=headers,
-            data=data,
-            timeout=10
+            data=data
         )
 
         if response.status_code == 200:
@@ -302,7 +302,7 @@ def get_raid():
         }
 
         logger.info(f"Making request to {api_url}")
-        response = requests.get(api_url, headers=headers, timeout=10)
+        response = http_client.get(api_url, headers=headers)
 
         if response.status_code == 200:
             result = response.json()
@@ -407,7 +407,7 @@ def mint_raid():
             "Accept": "application/json"
         }
 
-        response = requests.post(api_url, json=data, headers=headers)
+        response = http_client.post(api_url, json=data, headers=headers)
 
         if response.status_code == 201:
             return jsonify(response.json()), 201
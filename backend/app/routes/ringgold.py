@@ -1,6 +1,7 @@
 # app/routes/ringgold.py
 from flask import Blueprint, jsonify, request
 import requests
+from app.http_client import http_client
 import json
 from urllib.parse import urlencode
 
@@ -91,7 +92,7 @@ def get_by_isni_id(isni_id):
     url = f"{RINGGOLD_API_URL}/institution/{clean_isni}"
 
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, stale_if_error=True)
 
         if response.status_code == 200:
             data = response.json()
@@ -215,7 +216,7 @@ def search_organizations():
     print(f"Ringgold API Request URL: {url}")
 
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, stale_if_error=True)
 
         if response.status_code == 200:
             data = response.json()
@@ -336,7 +337,7 @@ def search_organization():
     print(f"Ringgold API Request URL: {url}")
 
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, stale_if_error=True)
 
         if response.status_code == 200:
             data = response.json()
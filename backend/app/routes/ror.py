@@ -1,6 +1,9 @@
 # app/routes/ror.py
 from flask import Blueprint, jsonify, request
-import requests
+from app.service_ror import (
+    search_organizations as search_ror_organizations, get_organization, filter_by_country
+)
+from app.service_ror_local import local_index_ready, search_local, get_local
 import json
 from app import db
 from app.models import DocIdLookup
@@ -8,12 +11,48 @@ from app.service_crossref import get_crossref_doi
 from sqlalchemy.sql import func
 from habanero import Crossref
 import urllib.parse
-from urllib.parse import urlencode
-# Replace with your desired ROR API base URL
-ROR_API_URL = "https://api.ror.org/"
 
 ror_bp = Blueprint("ror", __name__, url_prefix="/api/v1/ror")
 
+
+def _organization_summary(record):
+    """Id, display name, status, Wikipedia URL and country of a ROR schema v2 record"""
+    ror_id = record.get('id')
+    id = ror_id.split("/")[-1]
+
+    # Extract the primary name (ror_display type)
+    name = None
+    names = record.get('names', [])
+    for name_obj in names:
+        if 'ror_display' in name_obj.get('types', []):
+            name = name_obj.get('value')
+            break
+    if not name and names:  # Fallback to first name if no ror_display
+        name = names[0].get('value')
+
+    # Extract country from locations
+    country = None
+    locations = record.get('locations', [])
+    if locations and locations[0].get('geonames_details'):
+        country = locations[0]['geonames_details'].get('country_name')
+
+    # Extract Wikipedia URL from links
+    wikipedia_url = None
+    links = record.get('links', [])
+    for link in links:
+        if link.get('type') == 'wikipedia':
+            wikipedia_url = link.get('value')
+            break
+
+    return {
+        "id": id,
+        "name": name,
+        "status": record.get('status'),
+        "wikipedia_url": wikipedia_url,
+        "country": country,
+    }
+
+
 @ror_bp.route('/get-ror-by-id/<path:ror_id>', methods=['GET'])
 def get_ror_by_id(ror_id):
     """
@@ -59,27 +98,21 @@ def get_ror_by_id(ror_id):
                     type: string
                     description: Generic error message for server-side issues
     """
-    
-    # Extract the ROR ID from the full URL if a full URL is provided
-    if ror_id.startswith('https://ror.org/'):
-        # Extract just the ID part from the full URL
-        extracted_id = ror_id.replace('https://ror.org/', '')
-        print(f"Extracted ROR ID '{extracted_id}' from full URL '{ror_id}'")
-        ror_id = extracted_id
-    elif ror_id.startswith('http://ror.org/'):
-        # Handle http version too
-        extracted_id = ror_id.replace('http://ror.org/', '')
-        print(f"Extracted ROR ID '{extracted_id}' from full URL '{ror_id}'")
-        ror_id = extracted_id
-    
-    print(f"Making ROR API request for ID: {ror_id}")
-    url = f"{ROR_API_URL}organizations/{ror_id}"
-    response = requests.get(url)
 
-    if response.status_code == 200:
-        return jsonify(response.json())
+    # Local-first: the imported ROR dump holds the same schema v2 records as api.ror.org;
+    # ids registered after the dump was taken fall through to the API
+    if local_index_ready():
+        record = get_local(ror_id)
+        if record is not None:
+            return jsonify(record)
+
+    # Accepts the bare ROR ID or the full https://ror.org/ URL; served from the ROR cache when possible
+    status_code, data = get_organization(ror_id)
+
+    if status_code == 200:
+        return jsonify(data)
     else:
-        return jsonify({'error': f"Failed to retrieve ROR data (status code: {response.status_code})"}), response.status_code
+        return jsonify({'error': f"Failed to retrieve ROR data (status code: {status_code})"}), status_code
  
 @ror_bp.route('/search-organizations', methods=['GET'])
 def search_organizations():
@@ -100,6 +133,11 @@ def search_organizations():
         type: integer
         default: 1
         description: Page number of results (defaults to 1).
+      - in: query
+        name: country
+        type: string
+        required: false
+        description: Only return organizations located in this country (case-insensitive).
     responses:
         '200':
           description: Successful retrieval of ROR search results
@@ -140,33 +178,29 @@ def search_organizations():
     
     param = query_params.get('q')
     page = query_params.get('page')
+    country_name = query_params.get('country')
 
-    # Encode the query parameter for safe inclusion in the URL
-    encoded_params = urlencode({
-        'query': param,
-        'page': page,
-    })
-    
-    url = f"https://api.ror.org/organizations?query={encoded_params}"
-    
-    response = requests.get(url)
+    # Cached per (query, page); the country filter is applied to the cached page
+    try:
+        status_code, data = search_ror_organizations(param, page)
+    except (ValueError, json.JSONDecodeError):
+        return jsonify({'error': "Failed to parse ROR API response"}), 500
      
-    if response.status_code == 200:
+    if status_code == 200:
         try:
-            data = response.json()
-            
             # Check if results are found
             if 'errors' in data:
                return data
             else:
             
               # Check if results are found
-              if data['number_of_results'] == 0:
+              items = filter_by_country(data.get('items', []), country_name)
+              if data['number_of_results'] == 0 or not items:
                 return jsonify({"message": "No organizations found for your query"}), 204
               
               # Extract organization information (modify based on your needs)
               organizations = []
-              for org in data.get('items', []):
+              for org in items:
                 
                 ror_id = org.get('id')
                 id = ror_id.split("/")[-1]
@@ -186,7 +220,7 @@ def search_organizations():
             # Handle potential JSON parsing errors
             return jsonify({'error': "Failed to parse ROR API response"}), 500
     else:
-        return jsonify({'error': f"Failed to retrieve ROR data (status code: {response.status_code})"}), response.status_code
+        return jsonify({'error': f"Failed to retrieve ROR data (status code: {status_code})"}), status_code
       
       
 @ror_bp.route('/search-organization', methods=['GET'])
@@ -267,24 +301,22 @@ def search_organization():
     if country_name:
         country_name = country_name.strip().title()
 
-    # Use simple query for fuzzy matching (better for name variations)
-    # Then filter results by country in the backend
-    params = {
-        'query': organization_name,
-        'page': page
-    }
-
-    encoded_params = urlencode(params)
-    url = f"https://api.ror.org/organizations?{encoded_params}"
+    # Local-first: answer from the imported ROR dump without any network call
+    if local_index_ready():
+        items = search_local(organization_name, country_name, page)
+        if not items:
+            return jsonify({"error": "No results found"}), 404
+        return jsonify([_organization_summary(items[0])])
 
-    print(f"ROR API Request URL: {url}")
-
-    response = requests.get(url)
+    # Use simple query for fuzzy matching (better for name variations)
+    # Then filter results by country in the backend, on the cached upstream page
+    try:
+        status_code, data = search_ror_organizations(organization_name, page)
+    except (ValueError, json.JSONDecodeError):
+        return jsonify({'error': "Failed to parse ROR API response"}), 500
 
-    if response.status_code == 200:
+    if status_code == 200:
         try:
-            data = response.json()
-
             # Check if results are found
             if 'errors' in data:
                return data
@@ -296,13 +328,7 @@ def search_organization():
 
                   # If country is specified, filter results to match that country
                   if country_name:
-                      filtered_items = []
-                      for item in items:
-                          locations = item.get('locations', [])
-                          if locations and locations[0].get('geonames_details'):
-                              item_country = locations[0]['geonames_details'].get('country_name')
-                              if item_country and item_country.lower() == country_name.lower():
-                                  filtered_items.append(item)
+                      filtered_items = filter_by_country(items, country_name)
 
                       if not filtered_items:
                           return jsonify({"error": "No results found"}), 404
@@ -311,44 +337,7 @@ def search_organization():
                   else:
                       first_result = items[0]
                   
-                  ror_id = first_result.get('id')
-                  id = ror_id.split("/")[-1]
- 
-                  organization = []
-                   
-                  # Extract the primary name (ror_display type)
-                  name = None
-                  names = first_result.get('names', [])
-                  for name_obj in names:
-                      if 'ror_display' in name_obj.get('types', []):
-                          name = name_obj.get('value')
-                          break
-                  if not name and names:  # Fallback to first name if no ror_display
-                      name = names[0].get('value')
-                  
-                  # Extract country from locations
-                  country = None
-                  locations = first_result.get('locations', [])
-                  if locations and locations[0].get('geonames_details'):
-                      country = locations[0]['geonames_details'].get('country_name')
-                  
-                  # Extract Wikipedia URL from links
-                  wikipedia_url = None
-                  links = first_result.get('links', [])
-                  for link in links:
-                      if link.get('type') == 'wikipedia':
-                          wikipedia_url = link.get('value')
-                          break
-                  
-                  organization.append({
-                      "id": id,
-                      "name": name,
-                      "status": first_result.get('status'),
-                      "wikipedia_url": wikipedia_url,
-                      "country": country,
-                    })
-                    
-                  return jsonify(organization)
+                  return jsonify([_organization_summary(first_result)])
               else:
                   return jsonify({"error": "No results found"}), 404
  
@@ -356,6 +345,6 @@ def search_organization():
             # Handle potential JSON parsing errors
             return jsonify({'error': "Failed to parse ROR API response"}), 500
     else:
-        return jsonify({'error': f"Failed to retrieve ROR data (status code: {response.status_code})"}), response.status_code
+        return jsonify({'error': f"Failed to retrieve ROR data (status code: {status_code})"}), status_code
       
       
\ No newline at end of file
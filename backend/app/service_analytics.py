@@ -0,0 +1,580 @@
+"""
+Buffered ingestion of publication views and file/document downloads.
+
+Tracking endpoints only append an event to a queue and return. A background flusher in
+each worker drains the queue and writes events in batches with multi-row INSERTs, so a
+burst of page views costs one round trip per batch instead of a commit per hit.
+
+The queue is in-process by default (ANALYTICS_QUEUE_BACKEND=memory). With
+ANALYTICS_QUEUE_BACKEND=redis every worker pushes to one shared Redis list, which
+any worker's flusher (or flush_analytics_events.py) can drain.
+
+Hits from known bots are dropped before they are queued, and repeat hits by the same
+visitor (user id, or IP address for anonymous visitors) on the same publication, file
+or document within ANALYTICS_DEDUPE_WINDOW seconds are counted once, so the stored
+counts are unique visits in the spirit of COUNTER.
+
+Most hits arrive through the frontend's API routes rather than from the browser, so
+when the connecting address is one of TRUSTED_PROXIES the client is taken from the
+X-Forwarded-For chain and its user agent from X-Client-User-Agent. Anonymous hits whose
+client address is unknown are counted without dedupe rather than deduped on the proxy.
+
+Every batch also bumps pre-aggregated counters (a running total plus a daily bucket per
+publication, file and document) in the same transaction, so the stats endpoints read a
+handful of counter rows instead of counting raw events.
+"""
+import atexit
+import ipaddress
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import db
+from app.models import (
+    PublicationViews, FileDownloads, Publications, PublicationFiles, PublicationDocuments,
+    PublicationComments, AnalyticsCounterTotal, AnalyticsCounterDaily, UserAccount
+)
+
+logger = logging.getLogger(__name__)
+
+EVENT_VIEW = 'view'
+EVENT_DOWNLOAD = 'download'
+
+# Counter subjects and metrics
+SUBJECT_PUBLICATION = 'publication'
+SUBJECT_FILE = 'file'
+SUBJECT_DOCUMENT = 'document'
+METRIC_VIEWS = 'views'
+METRIC_DOWNLOADS = 'downloads'
+
+# Failed batches are re-queued this many times before their events are dropped
+MAX_WRITE_ATTEMPTS = 3
+
+# Stored user agents are truncated to this length
+MAX_USER_AGENT_LENGTH = 512
+
+# Length of the ip_address columns
+MAX_IP_ADDRESS_LENGTH = 45
+
+# User-agent fragments of crawlers, link previewers, monitors and HTTP libraries (case-insensitive).
+# ANALYTICS_BOT_PATTERNS adds site-specific ones.
+BOT_USER_AGENT_PATTERNS = (
+    r'bot\b', r'crawl', r'spider', r'slurp', r'archiver', r'indexer', r'scrapy', r'headless',
+    r'phantomjs', r'lighthouse', r'pingdom', r'uptime', r'monitor', r'facebookexternalhit',
+    r'embedly', r'preview', r'curl/', r'wget/', r'python-requests', r'python-urllib', r'aiohttp',
+    r'go-http-client', r'java/', r'okhttp', r'libwww', r'httpclient', r'node-fetch', r'axios/',
+)
+
+
+def compile_bot_pattern(extra_patterns: str = '') -> re.Pattern:
+    """Combine the built-in and configured (comma-separated) bot patterns into one regex"""
+    patterns = list(BOT_USER_AGENT_PATTERNS)
+    patterns.extend(pattern.strip() for pattern in extra_patterns.split(',') if pattern.strip())
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+
+
+@lru_cache(maxsize=8)
+def parse_trusted_proxies(trusted_proxies: str) -> tuple:
+    """Networks of the comma-separated TRUSTED_PROXIES addresses and CIDRs"""
+    networks = []
+    for proxy in trusted_proxies.split(','):
+        proxy = proxy.strip()
+        if not proxy:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(proxy, strict=False))
+        except ValueError:
+            logger.warning(f"Ignoring invalid TRUSTED_PROXIES entry: {proxy}")
+    return tuple(networks)
+
+
+def _is_trusted(address: Optional[str], networks: tuple) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def resolve_client(remote_addr: Optional[str], forwarded_for: Optional[str], user_agent: Optional[str],
+                   client_user_agent: Optional[str], trusted_proxies: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Address and user agent of the client behind any trusted proxies
+
+    X-Forwarded-For and X-Client-User-Agent are only believed when the request comes
+    from a trusted proxy; the chain is walked from the right and the first address that
+    is not a trusted proxy is the client. An entry that is not an IP address makes the
+    client unknown rather than letting a forged value become its address.
+
+    Returns:
+        Tuple of (client IP address or None when it is unknown, user agent)
+    """
+    networks = parse_trusted_proxies(trusted_proxies or '')
+    if not remote_addr or not _is_trusted(remote_addr, networks):
+        return remote_addr, user_agent
+
+    client_ip = None
+    for address in reversed((forwarded_for or '').split(',')):
+        address = _valid_ip(address.strip())
+        if address is None or not _is_trusted(address, networks):
+            client_ip = address
+            break
+    return client_ip, client_user_agent or user_agent
+
+
+class MemoryEventQueue:
+    """Bounded in-process queue; the oldest events are dropped if the flusher falls behind"""
+
+    def __init__(self, max_size: int):
+        self._events = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+
+    def push(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                logger.warning("Analytics event buffer full, dropping oldest event")
+            self._events.append(event)
+
+    def pop_batch(self, size: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._events.popleft() for _ in range(min(size, len(self._events)))]
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class RedisEventQueue:
+    """Redis list shared by every worker"""
+
+    KEY = 'analytics:events'
+
+    def __init__(self, url: str):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def push(self, event: Dict[str, Any]) -> None:
+        self._client.rpush(self.KEY, json.dumps(event))
+
+    def pop_batch(self, size: int) -> List[Dict[str, Any]]:
+        # LRANGE + LTRIM in one MULTI so two flushers never take the same events
+        pipeline = self._client.pipeline(transaction=True)
+        pipeline.lrange(self.KEY, 0, size - 1)
+        pipeline.ltrim(self.KEY, size, -1)
+        raw_events, _ = pipeline.execute()
+        return [json.loads(raw) for raw in raw_events]
+
+    def __len__(self) -> int:
+        return self._client.llen(self.KEY)
+
+
+class MemoryDeduplicator:
+    """Bounded per-worker LRU of visitor keys seen within the dedupe window"""
+
+    def __init__(self, window: int, max_keys: int):
+        self._window = window
+        self._max_keys = max_keys
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def first_seen(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            seen_at = self._seen.get(key)
+            if seen_at is not None and now - seen_at < self._window:
+                return False
+            self._seen[key] = now
+            self._seen.move_to_end(key)
+            while len(self._seen) > self._max_keys:
+                self._seen.popitem(last=False)
+            return True
+
+
+class RedisDeduplicator:
+    """Dedupe window shared by every worker, one expiring Redis key per visitor key"""
+
+    PREFIX = 'analytics:seen:'
+
+    def __init__(self, url: str, window: int):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._window = window
+
+    def first_seen(self, key: str) -> bool:
+        # SET NX only succeeds for the first hit in the window
+        return bool(self._client.set(self.PREFIX + key, 1, nx=True, ex=self._window))
+
+
+class AnalyticsIngestor:
+    """Owns the event queue and the per-process background flusher"""
+
+    def __init__(self):
+        self._queue = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher_pid = None
+        self._app = None
+        self._deduplicator = None
+        self._bot_pattern = None
+
+    def _config(self, key: str, default):
+        return self._app.config.get(key, default) if self._app else default
+
+    def _ensure_started(self) -> None:
+        """Create the queue and flusher thread on first use in each (possibly forked) worker process"""
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._app = current_app._get_current_object()
+            redis_url = self._config('ANALYTICS_REDIS_URL', 'redis://localhost:6379/1')
+            window = self._config('ANALYTICS_DEDUPE_WINDOW', 1800)
+            if self._config('ANALYTICS_QUEUE_BACKEND', 'memory') == 'redis':
+                self._queue = RedisEventQueue(redis_url)
+                self._deduplicator = RedisDeduplicator(redis_url, window) if window > 0 else None
+            else:
+                self._queue = MemoryEventQueue(self._config('ANALYTICS_MAX_BUFFER', 100000))
+                self._deduplicator = (
+                    MemoryDeduplicator(window, self._config('ANALYTICS_DEDUPE_MAX_KEYS', 100000))
+                    if window > 0 else None
+                )
+            self._bot_pattern = compile_bot_pattern(self._config('ANALYTICS_BOT_PATTERNS', ''))
+            threading.Thread(target=self._run_flusher, name='analytics-flusher', daemon=True).start()
+            atexit.register(self._flush_on_exit)
+            self._flusher_pid = os.getpid()
+
+    def accepts(self, dedupe_key: Optional[str], user_agent: Optional[str]) -> bool:
+        """
+        Whether a hit should be counted: not from a bot and not a repeat within the dedupe window.
+        Requests without a user agent are treated as bots; hits without a dedupe key are not deduped.
+        """
+        self._ensure_started()
+        if not user_agent or self._bot_pattern.search(user_agent):
+            return False
+        if self._deduplicator is None or dedupe_key is None:
+            return True
+        try:
+            return self._deduplicator.first_seen(dedupe_key)
+        except Exception as e:
+            # Count the hit rather than lose it when the shared dedupe store is unavailable
+            logger.warning(f"Analytics dedupe check failed: {str(e)}")
+            return True
+
+    def enqueue(self, event: Dict[str, Any]) -> None:
+        """Queue an event for the next batch write"""
+        self._ensure_started()
+        event.setdefault('at', datetime.utcnow().isoformat())
+        self._queue.push(event)
+        if isinstance(self._queue, MemoryEventQueue) and len(self._queue) >= self._config('ANALYTICS_FLUSH_SIZE', 500):
+            self._wakeup.set()
+
+    def _run_flusher(self) -> None:
+        interval = self._config('ANALYTICS_FLUSH_INTERVAL', 5)
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.error(f"Analytics flusher error: {str(e)}")
+
+    def _flush_on_exit(self) -> None:
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception as e:
+            logger.error(f"Could not flush analytics events on exit: {str(e)}")
+
+    def flush(self) -> int:
+        """
+        Drain the queue in batches of ANALYTICS_FLUSH_SIZE. Must run inside an app context.
+
+        Returns:
+            Number of events written
+        """
+        if self._queue is None:
+            self._ensure_started()
+        batch_size = self._config('ANALYTICS_FLUSH_SIZE', 500)
+        written = 0
+        while True:
+            batch = self._queue.pop_batch(batch_size)
+            if not batch:
+                return written
+            written += self._write_batch(batch)
+            if len(batch) < batch_size:
+                return written
+
+    def _write_batch(self, events: List[Dict[str, Any]]) -> int:
+        try:
+            written = write_events(events)
+            db.session.commit()
+            return written
+        except Exception as e:
+            db.session.rollback()
+            if len(events) > 1:
+                # Write the events one by one so a single bad event cannot discard the others
+                logger.warning(f"Failed to write {len(events)} analytics events, retrying one by one: {str(e)}")
+                return sum(self._write_batch([event]) for event in events)
+            logger.error(f"Failed to write analytics event: {str(e)}")
+            event = events[0]
+            event['attempts'] = event.get('attempts', 0) + 1
+            if event['attempts'] < MAX_WRITE_ATTEMPTS:
+                self._queue.push(event)
+            return 0
+
+
+def _existing_ids(column, ids) -> set:
+    """Return the subset of ids that still exist, in one query"""
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(column).where(column.in_(ids))))
+
+
+def _valid_ip(ip_address: Optional[str]) -> Optional[str]:
+    """The address if it is an IPv4/IPv6 address that fits the ip_address column, else None"""
+    if not isinstance(ip_address, str) or len(ip_address) > MAX_IP_ADDRESS_LENGTH:
+        return None
+    try:
+        ipaddress.ip_address(ip_address)
+    except ValueError:
+        return None
+    return ip_address
+
+
+def _parent_publications(model, ids) -> Dict[int, int]:
+    """Map the existing file or document ids to their publication id, in one query"""
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return {}
+    return dict(db.session.execute(select(model.id, model.publication_id).where(model.id.in_(ids))).all())
+
+
+def increment_counters(increments: Counter) -> None:
+    """
+    Add to the total and daily counters with one upsert per table (caller commits).
+
+    Args:
+        increments: Counter keyed by (subject_type, subject_id, metric, day)
+    """
+    if not increments:
+        return
+
+    # Sorted so concurrent flushers lock counter rows in the same order and cannot deadlock
+    keys = sorted(increments)
+    totals = Counter()
+    for key in keys:
+        totals[key[:3]] += increments[key]
+
+    now = datetime.utcnow()
+    total_rows = [
+        {'subject_type': subject_type, 'subject_id': subject_id, 'metric': metric, 'count': count, 'updated_at': now}
+        for (subject_type, subject_id, metric), count in sorted(totals.items())
+    ]
+    stmt = pg_insert(AnalyticsCounterTotal).values(total_rows)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['subject_type', 'subject_id', 'metric'],
+        set_={'count': AnalyticsCounterTotal.count + stmt.excluded['count'], 'updated_at': stmt.excluded.updated_at}
+    ))
+
+    daily_rows = [
+        {'subject_type': subject_type, 'subject_id': subject_id, 'metric': metric, 'day': day,
+         'count': increments[(subject_type, subject_id, metric, day)]}
+        for subject_type, subject_id, metric, day in keys
+    ]
+    stmt = pg_insert(AnalyticsCounterDaily).values(daily_rows)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['subject_type', 'subject_id', 'metric', 'day'],
+        set_={'count': AnalyticsCounterDaily.count + stmt.excluded['count']}
+    ))
+
+
+def write_events(events: List[Dict[str, Any]]) -> int:
+    """
+    Insert a batch of queued events with one multi-row INSERT per table (caller commits).
+
+    Events whose publication, file or document no longer exists are skipped instead of
+    failing the whole batch on a foreign key error; unknown user ids and malformed IP
+    addresses are stored as NULL. The matching counters are incremented in the same
+    transaction.
+
+    Returns:
+        Number of rows inserted
+    """
+    views = [event for event in events if event.get('type') == EVENT_VIEW]
+    downloads = [event for event in events if event.get('type') == EVENT_DOWNLOAD]
+
+    publication_ids = _existing_ids(Publications.id, [event.get('publication_id') for event in views])
+    file_ids = _parent_publications(PublicationFiles, [event.get('file_id') for event in downloads])
+    document_ids = _parent_publications(PublicationDocuments, [event.get('document_id') for event in downloads])
+    # user_id comes from the request body, so only ids of existing accounts are kept
+    user_ids = _existing_ids(
+        UserAccount.user_id,
+        [event.get('user_id') for event in events if type(event.get('user_id')) is int]
+    )
+
+    view_rows = [
+        {
+            'publication_id': event['publication_id'],
+            'user_id': event.get('user_id') if event.get('user_id') in user_ids else None,
+            'ip_address': _valid_ip(event.get('ip_address')),
+            'user_agent': event.get('user_agent'),
+            'viewed_at': datetime.fromisoformat(event['at'])
+        }
+        for event in views if event.get('publication_id') in publication_ids
+    ]
+    download_rows = [
+        {
+            'publication_file_id': event.get('file_id') if event.get('file_id') in file_ids else None,
+            'publication_document_id': event.get('document_id') if event.get('document_id') in document_ids else None,
+            'user_id': event.get('user_id') if event.get('user_id') in user_ids else None,
+            'ip_address': _valid_ip(event.get('ip_address')),
+            'downloaded_at': datetime.fromisoformat(event['at'])
+        }
+        for event in downloads
+        if event.get('file_id') in file_ids or event.get('document_id') in document_ids
+    ]
+
+    increments = Counter()
+    for row in view_rows:
+        increments[(SUBJECT_PUBLICATION, row['publication_id'], METRIC_VIEWS, row['viewed_at'].date())] += 1
+    for row in download_rows:
+        day = row['downloaded_at'].date()
+        if row['publication_file_id'] is not None:
+            increments[(SUBJECT_FILE, row['publication_file_id'], METRIC_DOWNLOADS, day)] += 1
+            publication_id = file_ids[row['publication_file_id']]
+        else:
+            publication_id = None
+        if row['publication_document_id'] is not None:
+            increments[(SUBJECT_DOCUMENT, row['publication_document_id'], METRIC_DOWNLOADS, day)] += 1
+            publication_id = publication_id or document_ids[row['publication_document_id']]
+        increments[(SUBJECT_PUBLICATION, publication_id, METRIC_DOWNLOADS, day)] += 1
+
+    if view_rows:
+        db.session.execute(insert(PublicationViews), view_rows)
+    if download_rows:
+        db.session.execute(insert(FileDownloads), download_rows)
+    increment_counters(increments)
+
+    skipped = len(events) - len(view_rows) - len(download_rows)
+    if skipped:
+        logger.info(f"Skipped {skipped} analytics events for deleted or unknown records")
+    return len(view_rows) + len(download_rows)
+
+
+def get_counter_totals(subject_type: str, subject_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Read the running totals for a set of publications, files or documents in one query
+
+    Args:
+        subject_type: SUBJECT_PUBLICATION, SUBJECT_FILE or SUBJECT_DOCUMENT
+        subject_ids: Ids to look up
+
+    Returns:
+        Dict of subject id -> {metric: count}; every metric defaults to 0
+    """
+    subject_ids = list(subject_ids)
+    totals = {subject_id: {METRIC_VIEWS: 0, METRIC_DOWNLOADS: 0} for subject_id in subject_ids}
+    if not subject_ids:
+        return totals
+
+    rows = db.session.execute(
+        select(AnalyticsCounterTotal.subject_id, AnalyticsCounterTotal.metric, AnalyticsCounterTotal.count)
+        .where(AnalyticsCounterTotal.subject_type == subject_type,
+               AnalyticsCounterTotal.subject_id.in_(subject_ids))
+    )
+    for subject_id, metric, count in rows:
+        totals[subject_id][metric] = count
+    return totals
+
+
+def get_publications_stats(publication_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """
+    View, download and active comment counts for a page of publications: one counter
+    query and one grouped comment count, however many publications are asked for
+
+    Returns:
+        Dict of publication id -> {'views': int, 'downloads': int, 'comments': int}
+    """
+    publication_ids = list(dict.fromkeys(publication_ids))
+    stats = get_counter_totals(SUBJECT_PUBLICATION, publication_ids)
+    for publication_stats in stats.values():
+        publication_stats['comments'] = 0
+    if not publication_ids:
+        return stats
+
+    comment_counts = db.session.execute(
+        select(PublicationComments.publication_id, func.count())
+        .where(PublicationComments.publication_id.in_(publication_ids), PublicationComments.status == 'active')
+        .group_by(PublicationComments.publication_id)
+    )
+    for publication_id, count in comment_counts:
+        stats[publication_id]['comments'] = count
+    return stats
+
+
+# Singleton shared by the analytics routes in this worker
+analytics_ingestor = AnalyticsIngestor()
+
+
+def _dedupe_key(event_type: str, subject: Any, user_id: Optional[int], ip_address: Optional[str]) -> Optional[str]:
+    """Key of a visitor's hits on a subject, or None for an anonymous visitor without a known address"""
+    if user_id is not None:
+        return f"{event_type}:{subject}:u{user_id}"
+    if ip_address:
+        return f"{event_type}:{subject}:ip{ip_address}"
+    return None
+
+
+def record_view(publication_id: int, user_id: Optional[int] = None, ip_address: Optional[str] = None,
+                user_agent: Optional[str] = None) -> bool:
+    """
+    Queue a publication view unless it comes from a bot or repeats within the dedupe window
+
+    Returns:
+        Whether the view was queued
+    """
+    if not analytics_ingestor.accepts(_dedupe_key(EVENT_VIEW, publication_id, user_id, ip_address), user_agent):
+        return False
+    analytics_ingestor.enqueue({
+        'type': EVENT_VIEW,
+        'publication_id': publication_id,
+        'user_id': user_id,
+        'ip_address': ip_address,
+        'user_agent': user_agent[:MAX_USER_AGENT_LENGTH]
+    })
+    return True
+
+
+def record_download(file_id: Optional[int] = None, document_id: Optional[int] = None,
+                    user_id: Optional[int] = None, ip_address: Optional[str] = None,
+                    user_agent: Optional[str] = None) -> bool:
+    """
+    Queue a file or document download unless it comes from a bot or repeats within the dedupe window
+
+    Returns:
+        Whether the download was queued
+    """
+    subject = f"f{file_id}" if file_id is not None else f"d{document_id}"
+    if not analytics_ingestor.accepts(_dedupe_key(EVENT_DOWNLOAD, subject, user_id, ip_address), user_agent):
+        return False
+    analytics_ingestor.enqueue({
+        'type': EVENT_DOWNLOAD,
+        'file_id': file_id,
+        'document_id': document_id,
+        'user_id': user_id,
+        'ip_address': ip_address
+    })
+    return True
@@ -0,0 +1,175 @@
+"""
+Monthly partitions of the raw analytics event tables.
+
+After migrations/partition_analytics_events.sql, publication_views and file_downloads have
+one partition per month named <table>_yYYYYmMM plus a DEFAULT partition. This module
+creates partitions ahead of time so new events never land in DEFAULT, and archives whole
+months once they are compacted into the rollups: the partition is copied to a gzipped
+CSV in ANALYTICS_ARCHIVE_DIR, detached and dropped, which is far cheaper than DELETE.
+"""
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from flask import current_app
+from sqlalchemy import text
+
+from app import db
+from app.service_analytics_rollups import compacted_through, next_bucket, truncate
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES = {
+    'publication_views': 'viewed_at',
+    'file_downloads': 'downloaded_at',
+}
+
+MIGRATION_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations', 'partition_analytics_events.sql'
+)
+
+PARTITION_SUFFIX = re.compile(r'_y(\d{4})m(\d{2})$')
+
+
+def partition_name(table: str, month_start: datetime) -> str:
+    return f"{table}_y{month_start:%Y}m{month_start:%m}"
+
+
+def is_partitioned(table: str) -> bool:
+    """Whether `table` has been converted to a partitioned table"""
+    return db.session.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE relname = :table AND relkind IN ('r', 'p')"),
+        {'table': table}
+    ).scalar() is True
+
+
+def convert_tables() -> None:
+    """Run the partitioning migration on tables that are not partitioned yet"""
+    if all(is_partitioned(table) for table in PARTITIONED_TABLES):
+        logger.info("Analytics event tables are already partitioned")
+        return
+    db.session.rollback()
+
+    with open(MIGRATION_FILE, encoding='utf-8') as migration:
+        sql = migration.read()
+
+    # Plain DBAPI cursor: the migration has its own BEGIN/COMMIT and PL/pgSQL blocks
+    connection = db.engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+        connection.commit()
+    finally:
+        connection.close()
+    logger.info("Converted analytics event tables to monthly partitions")
+
+
+def list_partitions(table: str) -> List[Tuple[str, datetime]]:
+    """
+    Monthly partitions of a table, oldest first (the DEFAULT partition is not included)
+
+    Returns:
+        List of (partition name, month start)
+    """
+    names = db.session.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {'table': table}
+    ).scalars()
+
+    partitions = []
+    for name in names:
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_partitions(months_ahead: int = 3) -> List[str]:
+    """
+    Create the partitions for the current month and the next `months_ahead` months
+
+    Returns:
+        Names of the partitions that were created
+    """
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(table):
+            logger.warning(f"{table} is not partitioned; run manage_analytics_partitions.py convert first")
+            continue
+        existing = {name for name, _ in list_partitions(table)}
+        month_start = truncate(datetime.utcnow(), 'month')
+        for _ in range(months_ahead + 1):
+            name = partition_name(table, month_start)
+            if name not in existing:
+                db.session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month_start:%Y-%m-%d}') TO ('{next_bucket(month_start, 'month'):%Y-%m-%d}')"
+                ))
+                created.append(name)
+            month_start = next_bucket(month_start, 'month')
+    db.session.commit()
+
+    if created:
+        logger.info(f"Created analytics partitions: {', '.join(created)}")
+    return created
+
+
+def _export_partition(name: str, archive_dir: str) -> str:
+    """Copy every row of a partition to <archive_dir>/<name>.csv.gz and return the file path"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    partial_path = f"{path}.partial"
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        with gzip.open(partial_path, 'wb') as archive:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+    finally:
+        cursor.close()
+
+    # Only a complete file gets the final name, so a crash never leaves a truncated archive behind
+    os.replace(partial_path, path)
+    return path
+
+
+def archive_partitions(retention_days: int, archive_dir: str = None) -> List[str]:
+    """
+    Archive and drop monthly partitions older than `retention_days`.
+
+    A month is only archived once it ended before the rollups were compacted through,
+    so the time series and leaderboards keep its counts.
+
+    Returns:
+        Names of the partitions that were archived
+    """
+    archive_dir = archive_dir or current_app.config.get('ANALYTICS_ARCHIVE_DIR', 'archive/analytics')
+    through = compacted_through()
+    if through is None:
+        logger.info("Analytics rollups are empty; no partitions archived")
+        return []
+    cutoff = min(datetime.utcnow() - timedelta(days=retention_days), through)
+
+    archived = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(table):
+            continue
+        for name, month_start in list_partitions(table):
+            if next_bucket(month_start, 'month') > cutoff:
+                break
+            path = _export_partition(name, archive_dir)
+            db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            db.session.execute(text(f"DROP TABLE {name}"))
+            db.session.commit()
+            archived.append(name)
+            logger.info(f"Archived analytics partition {name} to {path}")
+
+    return archived
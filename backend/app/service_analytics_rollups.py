@@ -0,0 +1,271 @@
+"""
+Hourly, daily and monthly rollups of the raw analytics events.
+
+compact() aggregates closed hours of publication_views and file_downloads into hourly
+rollups, then re-derives the daily rollups from the hours and the monthly rollups from
+the days. Buckets are overwritten rather than incremented, so re-running a period is
+safe; each run restarts a few hours before the stored compaction watermark to pick up
+events that were still queued when the previous run closed those hours.
+
+Once a period is compacted its raw events can be deleted (prune_raw_events) without
+losing the time series or the leaderboards, which only read the rollups.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import delete, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import db
+from app.models import AnalyticsRollup, AnalyticsCompactionState, PublicationViews, FileDownloads, PublicationFiles, PublicationDocuments
+from app.service_analytics import (
+    SUBJECT_PUBLICATION, SUBJECT_FILE, SUBJECT_DOCUMENT, METRIC_VIEWS, METRIC_DOWNLOADS
+)
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day', 'month')
+
+# Each coarser granularity is summed from the next finer one
+PARENT_GRANULARITY = {'day': 'hour', 'month': 'day'}
+
+# Raw events are compacted in windows of this size, one commit per window
+COMPACTION_WINDOW = timedelta(days=7)
+
+# AnalyticsCompactionState row holding the end of the last compacted window
+COMPACTION_STATE = 'rollups'
+
+ROLLUP_COLUMNS = ['granularity', 'subject_type', 'subject_id', 'metric', 'bucket_start', 'count']
+
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """Start of the hour, day or month containing `moment`"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity in ('day', 'month'):
+        moment = moment.replace(hour=0)
+    if granularity == 'month':
+        moment = moment.replace(day=1)
+    return moment
+
+
+def next_bucket(bucket_start: datetime, granularity: str) -> datetime:
+    """Start of the bucket following `bucket_start`"""
+    if granularity == 'hour':
+        return bucket_start + timedelta(hours=1)
+    if granularity == 'day':
+        return bucket_start + timedelta(days=1)
+    return (bucket_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def bucket_starts(granularity: str, start: datetime, end: datetime) -> List[datetime]:
+    """Every bucket start from the bucket containing `start` up to (excluding) `end`"""
+    buckets = []
+    bucket = truncate(start, granularity)
+    while bucket < end:
+        buckets.append(bucket)
+        bucket = next_bucket(bucket, granularity)
+    return buckets
+
+
+def _upsert_rollups(rows_select) -> None:
+    """Write aggregated rows into analytics_rollups, overwriting existing buckets"""
+    stmt = pg_insert(AnalyticsRollup).from_select(ROLLUP_COLUMNS, rows_select)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=ROLLUP_COLUMNS[:-1],
+        set_={'count': stmt.excluded['count']}
+    ))
+
+
+def _hourly_event_selects(start: datetime, end: datetime) -> List:
+    """Hourly aggregates of the raw events in [start, end), one select per subject and metric"""
+    hour = literal_column("'hour'")
+    viewed = func.date_trunc(hour, PublicationViews.viewed_at)
+    downloaded = func.date_trunc(hour, FileDownloads.downloaded_at)
+    in_view_window = (PublicationViews.viewed_at >= start, PublicationViews.viewed_at < end)
+    in_download_window = (FileDownloads.downloaded_at >= start, FileDownloads.downloaded_at < end)
+    download_publication = func.coalesce(PublicationFiles.publication_id, PublicationDocuments.publication_id)
+
+    return [
+        select(hour, literal(SUBJECT_PUBLICATION), PublicationViews.publication_id, literal(METRIC_VIEWS),
+               viewed, func.count())
+        .where(*in_view_window)
+        .group_by(PublicationViews.publication_id, viewed),
+
+        select(hour, literal(SUBJECT_FILE), FileDownloads.publication_file_id, literal(METRIC_DOWNLOADS),
+               downloaded, func.count())
+        .where(*in_download_window, FileDownloads.publication_file_id.isnot(None))
+        .group_by(FileDownloads.publication_file_id, downloaded),
+
+        select(hour, literal(SUBJECT_DOCUMENT), FileDownloads.publication_document_id, literal(METRIC_DOWNLOADS),
+               downloaded, func.count())
+        .where(*in_download_window, FileDownloads.publication_document_id.isnot(None))
+        .group_by(FileDownloads.publication_document_id, downloaded),
+
+        select(hour, literal(SUBJECT_PUBLICATION), download_publication, literal(METRIC_DOWNLOADS),
+               downloaded, func.count())
+        .select_from(FileDownloads)
+        .outerjoin(PublicationFiles, PublicationFiles.id == FileDownloads.publication_file_id)
+        .outerjoin(PublicationDocuments, PublicationDocuments.id == FileDownloads.publication_document_id)
+        .where(*in_download_window, download_publication.isnot(None))
+        .group_by(download_publication, downloaded),
+    ]
+
+
+def _derived_select(granularity: str, start: datetime, end: datetime):
+    """Sum the finer rollups in [start, end) into `granularity` buckets"""
+    bucket = func.date_trunc(literal_column(f"'{granularity}'"), AnalyticsRollup.bucket_start)
+    return (
+        select(literal_column(f"'{granularity}'"), AnalyticsRollup.subject_type, AnalyticsRollup.subject_id,
+               AnalyticsRollup.metric, bucket, func.sum(AnalyticsRollup.count))
+        .where(AnalyticsRollup.granularity == PARENT_GRANULARITY[granularity],
+               AnalyticsRollup.bucket_start >= start,
+               AnalyticsRollup.bucket_start < end)
+        .group_by(AnalyticsRollup.subject_type, AnalyticsRollup.subject_id, AnalyticsRollup.metric, bucket)
+    )
+
+
+def compacted_through() -> Optional[datetime]:
+    """
+    Point before which raw events are final in the rollups: the next compaction starts here
+
+    Returns:
+        None if nothing has been compacted yet
+    """
+    watermark = AnalyticsCompactionState.get_watermark(COMPACTION_STATE)
+    if watermark is None:
+        return None
+    return watermark - timedelta(hours=current_app.config.get('ANALYTICS_COMPACTION_LOOKBACK_HOURS', 3))
+
+
+def _earliest_event() -> Optional[datetime]:
+    earliest = [
+        db.session.scalar(select(func.min(PublicationViews.viewed_at))),
+        db.session.scalar(select(func.min(FileDownloads.downloaded_at))),
+    ]
+    earliest = [moment for moment in earliest if moment is not None]
+    return min(earliest) if earliest else None
+
+
+def compact(until: Optional[datetime] = None) -> int:
+    """
+    Bring the hourly, daily and monthly rollups up to date with the raw events.
+
+    Only closed hours are compacted. Each window is committed on its own together with
+    the compaction watermark, which advances to the end of the window even when it held
+    no events, so a long first run keeps its progress if it is interrupted and quiet
+    periods are not rescanned.
+
+    Args:
+        until: Compact events before this moment (defaults to the start of the current hour)
+
+    Returns:
+        Number of windows compacted
+    """
+    end = truncate(until or datetime.utcnow(), 'hour')
+    start = compacted_through() or _earliest_event()
+    if start is None:
+        # Nothing recorded yet: later runs only need to look at events from here on
+        AnalyticsCompactionState.set_watermark(COMPACTION_STATE, end)
+        db.session.commit()
+        logger.info("No analytics events to compact")
+        return 0
+
+    windows = 0
+    window_start = truncate(start, 'hour')
+    while window_start < end:
+        window_end = min(window_start + COMPACTION_WINDOW, end)
+        for rows_select in _hourly_event_selects(window_start, window_end):
+            _upsert_rollups(rows_select)
+        _upsert_rollups(_derived_select('day', truncate(window_start, 'day'), window_end))
+        _upsert_rollups(_derived_select('month', truncate(window_start, 'month'), window_end))
+        AnalyticsCompactionState.set_watermark(COMPACTION_STATE, window_end)
+        db.session.commit()
+        windows += 1
+        logger.info(f"Compacted analytics events from {window_start.isoformat()} to {window_end.isoformat()}")
+        window_start = window_end
+
+    return windows
+
+
+def prune_raw_events(retention_days: int) -> Tuple[int, int]:
+    """
+    Delete raw views and downloads older than `retention_days` that are already compacted
+
+    Returns:
+        Tuple of (views deleted, downloads deleted)
+    """
+    through = compacted_through()
+    if through is None:
+        return 0, 0
+    cutoff = min(datetime.utcnow() - timedelta(days=retention_days), through)
+
+    views = db.session.execute(delete(PublicationViews).where(PublicationViews.viewed_at < cutoff)).rowcount
+    downloads = db.session.execute(delete(FileDownloads).where(FileDownloads.downloaded_at < cutoff)).rowcount
+    db.session.commit()
+    logger.info(f"Pruned {views} views and {downloads} downloads before {cutoff.isoformat()}")
+    return views, downloads
+
+
+def prune_hourly_rollups(retention_days: int) -> int:
+    """Delete hourly rollups older than `retention_days`; daily and monthly rollups are kept"""
+    cutoff = truncate(datetime.utcnow() - timedelta(days=retention_days), 'day')
+    through = compacted_through()
+    if through is not None:
+        # Hours of the day still being recompacted are needed to rebuild that day
+        cutoff = min(cutoff, truncate(through, 'day'))
+    deleted = db.session.execute(
+        delete(AnalyticsRollup).where(AnalyticsRollup.granularity == 'hour', AnalyticsRollup.bucket_start < cutoff)
+    ).rowcount
+    db.session.commit()
+    logger.info(f"Pruned {deleted} hourly rollups before {cutoff.isoformat()}")
+    return deleted
+
+
+def get_time_series(subject_type: str, subject_id: int, metric: str, granularity: str,
+                    start: datetime, end: datetime) -> List[Dict]:
+    """
+    Counts per bucket for one publication, file or document, with empty buckets as 0
+
+    Returns:
+        List of {'bucket': ISO start of the bucket, 'count': int}, oldest first
+    """
+    counts = dict(db.session.execute(
+        select(AnalyticsRollup.bucket_start, AnalyticsRollup.count)
+        .where(AnalyticsRollup.granularity == granularity,
+               AnalyticsRollup.subject_type == subject_type,
+               AnalyticsRollup.subject_id == subject_id,
+               AnalyticsRollup.metric == metric,
+               AnalyticsRollup.bucket_start >= truncate(start, granularity),
+               AnalyticsRollup.bucket_start < end)
+    ).all())
+    return [
+        {'bucket': bucket.isoformat(), 'count': counts.get(bucket, 0)}
+        for bucket in bucket_starts(granularity, start, end)
+    ]
+
+
+def get_top_subjects(subject_type: str, metric: str, start: datetime, end: datetime,
+                     limit: int) -> List[Tuple[int, int]]:
+    """
+    Leaderboard of the subjects with the highest counts between `start` and `end`, from the daily rollups
+
+    Returns:
+        List of (subject_id, count), highest first
+    """
+    total = func.sum(AnalyticsRollup.count).label('total')
+    return [
+        (subject_id, int(count))
+        for subject_id, count in db.session.execute(
+            select(AnalyticsRollup.subject_id, total)
+            .where(AnalyticsRollup.granularity == 'day',
+                   AnalyticsRollup.subject_type == subject_type,
+                   AnalyticsRollup.metric == metric,
+                   AnalyticsRollup.bucket_start >= truncate(start, 'day'),
+                   AnalyticsRollup.bucket_start < end)
+            .group_by(AnalyticsRollup.subject_id)
+            .order_by(total.desc(), AnalyticsRollup.subject_id)
+            .limit(limit)
+        )
+    ]
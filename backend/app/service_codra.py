@@ -1,8 +1,11 @@
 # service_codra.py
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from typing import Dict, Any, List
 import logging
+import threading
 import time
 import uuid
 
@@ -27,16 +30,47 @@ load_dotenv()
 CORDRA_BASE_URL = os.getenv("CORDRA_BASE_URL", "https://cordra.kenet.or.ke/cordra")
 CORDRA_USERNAME = os.getenv("CORDRA_USERNAME", "admin")
 CORDRA_PASSWORD = os.getenv("CORDRA_PASSWORD")
+CORDRA_TIMEOUT = float(os.getenv("CORDRA_TIMEOUT", 30))  # Seconds per request
+CORDRA_POOL_SIZE = int(os.getenv("CORDRA_POOL_SIZE", 10))  # Keep-alive connections kept per worker
+CORDRA_MAX_RETRIES = int(os.getenv("CORDRA_MAX_RETRIES", 3))
+CORDRA_TOKEN_TTL = int(os.getenv("CORDRA_TOKEN_TTL", 1500))  # Used when the token response has no expires_in
 
 class CordraService:
     
+    # Refresh the token this many seconds before it expires
+    TOKEN_EXPIRY_MARGIN = 60
+
     def __init__(self, base_url: str, username: str, password: str):
         self.base_url = base_url
         self.username = username
         self.password = password
         self.access_token = None
-        self.authenticate(username, password)
+        self.token_expiry = 0.0
+        self._token_lock = threading.Lock()
+        self.session = self._build_session()
         logger.info("Initialized CordraService with base URL: %s", self.base_url)
+
+    def _build_session(self) -> requests.Session:
+        """
+        Build the shared HTTP session: pooled keep-alive connections and retries with
+        backoff. Connection failures are retried for every method; 5xx responses only
+        for GET, since a replayed Create/Update POST could apply twice.
+        """
+        retry = Retry(
+            total=CORDRA_MAX_RETRIES,
+            connect=CORDRA_MAX_RETRIES,
+            read=0,
+            status=CORDRA_MAX_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=CORDRA_POOL_SIZE, pool_maxsize=CORDRA_POOL_SIZE, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
     
     def _generate_request_id(self) -> str:
         """Generate a unique request identifier."""
@@ -66,10 +100,11 @@ class CordraService:
             
             logger.info(f"Request {request_id}: Authenticating user {username}")
             
-            response = requests.post(
+            response = self.session.post(
                 auth_url, 
                 json=auth_data, 
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=CORDRA_TIMEOUT
             )
             
             duration = time.time() - start_time
@@ -81,7 +116,8 @@ class CordraService:
                     return False
                 
                 self.access_token = access_token
-                logger.info(f"Request {request_id} completed in {duration:.2f}s: Authentication successful {access_token}")
+                self.token_expiry = time.time() + int(response.json().get("expires_in") or CORDRA_TOKEN_TTL)
+                logger.info(f"Request {request_id} completed in {duration:.2f}s: Authentication successful")
                 return True
             else:
                 logger.error(
@@ -98,15 +134,54 @@ class CordraService:
             )
             return False
 
+    def _token_is_valid(self) -> bool:
+        return bool(self.access_token) and time.time() < self.token_expiry - self.TOKEN_EXPIRY_MARGIN
+
+    def _ensure_token(self, rejected_token: str = None) -> None:
+        """
+        Authenticate only when there is no token, it is about to expire, or CORDRA
+        rejected it. The lock makes concurrent callers wait for a single
+        re-authentication instead of each logging in again.
+
+        Args:
+            rejected_token: Token that just got a 401; skipped if another thread already replaced it
+        """
+        if self._token_is_valid() and rejected_token is None:
+            return
+        with self._token_lock:
+            if rejected_token is not None and self.access_token != rejected_token:
+                return
+            if rejected_token is None and self._token_is_valid():
+                return
+            self.access_token = None
+            self.authenticate(self.username, self.password)
+
     def _headers(self) -> Dict[str, str]:
-        """Headers for authenticated requests."""
-        # Re-authenticate for every request to get a fresh token
-        self.authenticate(self.username, self.password)
+        """Headers for authenticated requests, reusing the cached token while it is valid."""
+        self._ensure_token()
         return {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
 
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send an authenticated request over the pooled session, re-authenticating once
+        and replaying the request if CORDRA answers 401.
+        """
+        kwargs.setdefault("timeout", CORDRA_TIMEOUT)
+        headers = kwargs.pop("headers", None) or self._headers()
+        response = self.session.request(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 401:
+            rejected_token = headers.get("Authorization", "").replace("Bearer ", "", 1)
+            logger.warning(f"CORDRA returned 401 for {url}, re-authenticating")
+            self._ensure_token(rejected_token=rejected_token)
+            headers = {**headers, "Authorization": f"Bearer {self.access_token}"}
+            response = self.session.request(method, url, headers=headers, **kwargs)
+
+        return response
+
     def set_type_public(self, type_name: str) -> Dict[str, Any]:
         """
         Update the Authorization settings to make all objects of a specific type public.
@@ -127,7 +202,8 @@ class CordraService:
                 "targetId": "design"
             }
             
-            get_response = requests.post(
+            get_response = self._request(
+                'POST',
                 design_url, 
                 json=get_design_data, 
                 headers=self._headers()
@@ -162,7 +238,8 @@ class CordraService:
                 "attributes": design_obj
             }
             
-            update_response = requests.post(
+            update_response = self._request(
+                'POST',
                 update_url, 
                 json=update_data, 
                 headers=self._headers()
@@ -203,10 +280,11 @@ class CordraService:
                 f"Metadata keys: {list(metadata.keys())}"
             )
             
-            response = requests.post(
+            response = self._request(
+                'POST',
                 deposit_url, 
                 json=data, 
-                headers=self._headers()  # Fresh token for every request
+                headers=self._headers()
             )
             
             duration = time.time() - start_time
@@ -241,7 +319,7 @@ class CordraService:
             "attributes": metadata_list
         }
         
-        response = requests.post(batch_url, json=data, headers=self._headers())
+        response = self._request('POST', batch_url, json=data, headers=self._headers())
         if response.status_code == 200:
             return response.json()
         else:
@@ -251,7 +329,7 @@ class CordraService:
     def get_object(self, object_id: str) -> Dict[str, Any]:
         """Retrieve a digital object by ID."""
         get_url = f"{self.base_url}/doip?operationId=20.DOIP/Op.Retrieve&targetId={object_id}"
-        response = requests.get(get_url, headers=self._headers())
+        response = self._request('GET', get_url, headers=self._headers())
         if response.status_code == 200:
             return response.json()
         else:
@@ -267,7 +345,7 @@ class CordraService:
             "attributes": metadata
         }
         
-        response = requests.post(update_url, json=data, headers=self._headers())
+        response = self._request('POST', update_url, json=data, headers=self._headers())
         if response.status_code == 200:
             return response.json()
         else:
@@ -293,7 +371,7 @@ class CordraService:
 
         try:
             # Make the POST request with query parameters
-            response = requests.post(url, json=payload, headers=self._headers(), params=querystring)
+            response = self._request('POST', url, json=payload, headers=self._headers(), params=querystring)
             
             logger.info(f"Response status: {response.status_code}")
             logger.info(f"Response text: {response.text}")
@@ -315,7 +393,7 @@ class CordraService:
             "targetId": object_id
         }
         
-        response = requests.post(delete_url, json=data, headers=self._headers())
+        response = self._request('POST', delete_url, json=data, headers=self._headers())
         if response.status_code == 200:
             return response.json()
         else:
@@ -358,7 +436,8 @@ class CordraService:
                 f"Query: {query}, Page Size: {page_size}, Page Number: {page_number}"
             )
             
-            response = requests.post(
+            response = self._request(
+                'POST',
                 query_url, 
                 json=data, 
                 headers=self._headers()
@@ -392,7 +471,7 @@ class CordraService:
     def list_dois(self) -> Dict[str, Any]:
         """List all DOIs assigned in Cordra."""
         list_dois_url = f"{self.base_url}/doip?operationId=20.DOIP/Op.ListDOIs"
-        response = requests.get(list_dois_url, headers=self._headers())
+        response = self._request('GET', list_dois_url, headers=self._headers())
         if response.status_code == 200:
             return response.json()
         else:
@@ -402,7 +481,7 @@ class CordraService:
     def check_batch_status(self, batch_id: str) -> Dict[str, Any]:
         """Check the status of a batch operation."""
         status_url = f"{self.base_url}/doip?operationId=20.DOIP/Op.BatchStatus&targetId={batch_id}"
-        response = requests.get(status_url, headers=self._headers())
+        response = self._request('GET', status_url, headers=self._headers())
         if response.status_code == 200:
             return response.json()
         else:
@@ -411,8 +490,9 @@ class CordraService:
 
     def refresh_token(self) -> bool:
         """Refresh access token."""
-        self.access_token = None
-        return self.authenticate(self.username, self.password)
+        with self._token_lock:
+            self.access_token = None
+            return self.authenticate(self.username, self.password)
     
     def list_operations(self) -> Dict[str, Any]:
         """
@@ -432,7 +512,7 @@ class CordraService:
 
             logger.info(f"Request {request_id}: Listing operations from Cordra")
 
-            response = requests.post(url, headers=headers, params=querystring)
+            response = self._request('POST', url, headers=headers, params=querystring)
 
             duration = time.time() - start_time
 
@@ -487,7 +567,7 @@ class CordraService:
             logger.info(f"Request {request_id}: Query String - {querystring}")
 
             # Send the request
-            response = requests.post(url, json=payload, headers=headers, params=querystring)
+            response = self._request('POST', url, json=payload, headers=headers, params=querystring)
 
             duration = time.time() - start_time
 
@@ -581,13 +661,13 @@ class CordraService:
             url = f"{self.base_url}/doip/0.DOIP/Op.Create"
             querystring = {"targetId": "service"}
 
-            headers = self._headers()  # Get fresh authentication headers
+            headers = self._headers()
 
             logger.info(f"[{request_id}] - Sending POST request to Cordra API at {url}")
             logger.debug(f"[{request_id}] - Headers: {headers}")
 
             # Send the request to Cordra
-            response = requests.post(url, json=payload, headers=headers, params=querystring)
+            response = self._request('POST', url, json=payload, headers=headers, params=querystring)
 
             duration = time.time() - start_time
 
@@ -662,12 +742,12 @@ class CordraService:
             url = f"{self.base_url}/doip/0.DOIP/Op.Create"
             querystring = {"targetId": "service"}
 
-            headers = self._headers()  # Fresh authentication
+            headers = self._headers()
 
             logger.info(f"[{request_id}] - Sending POST request to Cordra API at {url}")
             logger.debug(f"[{request_id}] - Headers: {headers}")
 
-            response = requests.post(url, json=payload, headers=headers, params=querystring)
+            response = self._request('POST', url, json=payload, headers=headers, params=querystring)
 
             duration = time.time() - start_time
             logger.info(f"[{request_id}] - Received response in {duration:.2f}s with status code {response.status_code}")
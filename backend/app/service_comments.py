@@ -0,0 +1,314 @@
+"""
+Set-based loading of publication comment threads.
+
+A page of top-level comments is loaded in one query and all of their active replies,
+at any depth, in one recursive query, both with the author eager-loaded. The reply tree
+and reply counts are then built in memory instead of lazy-loading `replies` and `user`
+per comment.
+"""
+import base64
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import PublicationComments, CommentLikes
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = 'active'
+
+# Newest first, id as a tie-breaker so page boundaries are stable
+NEWEST_FIRST = (PublicationComments.created_at.desc(), PublicationComments.id.desc())
+
+
+def encode_comment_cursor(comment) -> str:
+    """Build an opaque keyset cursor pointing just after the given comment (newest-first order)"""
+    payload = {'t': comment.created_at.isoformat(), 'id': comment.id}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_comment_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a comment cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(payload['t']), int(payload['id'])
+    except (KeyError, TypeError, ValueError, json.JSONDecodeError, UnicodeError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
+
+
+def after_cursor(created_at: datetime, last_id: int):
+    """Filter selecting comments strictly after (created_at, last_id) in newest-first order"""
+    return or_(
+        PublicationComments.created_at < created_at,
+        and_(PublicationComments.created_at == created_at, PublicationComments.id < last_id)
+    )
+
+
+def _active_replies(parent_ids: List[int]) -> List[PublicationComments]:
+    """Every active reply below the given comments, at any depth, oldest first"""
+    tree = (
+        select(PublicationComments.id)
+        .where(PublicationComments.parent_comment_id.in_(parent_ids), PublicationComments.status == ACTIVE)
+        .cte('reply_tree', recursive=True)
+    )
+    tree = tree.union_all(
+        select(PublicationComments.id)
+        .where(PublicationComments.parent_comment_id == tree.c.id, PublicationComments.status == ACTIVE)
+    )
+    return (PublicationComments.query
+            .options(joinedload(PublicationComments.user))
+            .filter(PublicationComments.id.in_(select(tree.c.id)))
+            .order_by(PublicationComments.created_at, PublicationComments.id)
+            .all())
+
+
+def _reply_counts(parent_ids: List[int]) -> Dict[int, int]:
+    """Number of active direct replies per comment, in one grouped query"""
+    if not parent_ids:
+        return {}
+    return dict(db.session.execute(
+        select(PublicationComments.parent_comment_id, func.count())
+        .where(PublicationComments.parent_comment_id.in_(parent_ids), PublicationComments.status == ACTIVE)
+        .group_by(PublicationComments.parent_comment_id)
+    ).all())
+
+
+def count_active_comments(publication_id: int, top_level_only: bool = False) -> int:
+    """Number of active comments (optionally only top-level ones) on a publication"""
+    query = select(func.count()).select_from(PublicationComments).where(
+        PublicationComments.publication_id == publication_id,
+        PublicationComments.status == ACTIVE
+    )
+    if top_level_only:
+        query = query.where(PublicationComments.parent_comment_id.is_(None))
+    return db.session.scalar(query)
+
+
+def get_comment_stats(publication_id: int) -> Dict[str, Any]:
+    """
+    Statistics over a publication's active comments, computed in one grouped query.
+
+    ROLLUP adds a grand-total row to the per-type rows, so distinct commenters are
+    counted across all types rather than summed per type.
+
+    Returns:
+        Dict with total_comments, top_level_comments, replies, unique_commenters,
+        total_likes and comment_types (type -> count)
+    """
+    comment_type = PublicationComments.comment_type
+    rows = db.session.execute(
+        select(
+            comment_type,
+            func.grouping(comment_type),
+            func.count(),
+            func.count().filter(PublicationComments.parent_comment_id.is_(None)),
+            func.count(func.distinct(PublicationComments.user_id)),
+            func.coalesce(func.sum(PublicationComments.likes_count), 0)
+        )
+        .where(PublicationComments.publication_id == publication_id, PublicationComments.status == ACTIVE)
+        .group_by(func.rollup(comment_type))
+    ).all()
+
+    stats = {
+        'total_comments': 0,
+        'top_level_comments': 0,
+        'replies': 0,
+        'unique_commenters': 0,
+        'total_likes': 0,
+        'comment_types': {}
+    }
+    for type_name, is_total, count, top_level, commenters, likes in rows:
+        if is_total:
+            stats.update(
+                total_comments=count,
+                top_level_comments=top_level,
+                replies=count - top_level,
+                unique_commenters=commenters,
+                total_likes=int(likes)
+            )
+        else:
+            stats['comment_types'][type_name] = count
+    return stats
+
+
+def load_comment_thread(publication_id: int, include_replies: bool = True, limit: Optional[int] = None,
+                        cursor: Optional[Tuple[datetime, int]] = None) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+    """
+    Load the active top-level comments of a publication, newest first, with their reply trees.
+
+    Args:
+        publication_id: The publication
+        include_replies: Nest each comment's active replies under 'replies'
+        limit: Page size; all top-level comments when None
+        cursor: Decoded cursor of the last comment on the previous page
+
+    Returns:
+        Tuple of (serialized top-level comments, last top-level comment if another page follows else None)
+    """
+    query = (PublicationComments.query
+             .options(joinedload(PublicationComments.user))
+             .filter(PublicationComments.publication_id == publication_id,
+                     PublicationComments.parent_comment_id.is_(None),
+                     PublicationComments.status == ACTIVE))
+    if cursor:
+        query = query.filter(after_cursor(*cursor))
+    query = query.order_by(*NEWEST_FIRST)
+
+    if limit is None:
+        roots, last = query.all(), None
+    else:
+        # Fetch one extra row to learn whether another page follows
+        rows = query.limit(limit + 1).all()
+        roots = rows[:limit]
+        last = roots[-1] if len(rows) > limit else None
+
+    root_ids = [root.id for root in roots]
+    if not include_replies:
+        reply_counts = _reply_counts(root_ids)
+        return [root.to_dict(replies_count=reply_counts.get(root.id, 0)) for root in roots], last
+
+    children = defaultdict(list)
+    for reply in (_active_replies(root_ids) if root_ids else []):
+        children[reply.parent_comment_id].append(reply)
+
+    def build(comment):
+        comment_dict = comment.to_dict(replies_count=len(children[comment.id]))
+        comment_dict['replies'] = [build(reply) for reply in children[comment.id]]
+        return comment_dict
+
+    return [build(root) for root in roots], last
+
+
+# Columns returned for a user's comment history; no relationship is loaded per row
+HISTORY_COLUMNS = (
+    PublicationComments.id, PublicationComments.publication_id, PublicationComments.parent_comment_id,
+    PublicationComments.comment_text, PublicationComments.comment_type, PublicationComments.status,
+    PublicationComments.is_edited, PublicationComments.edit_count, PublicationComments.likes_count,
+    PublicationComments.created_at, PublicationComments.updated_at,
+)
+
+
+def load_user_comments(user, limit: Optional[int] = None,
+                       cursor: Optional[Tuple[datetime, int]] = None) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+    """
+    Load a user's active comments, newest first, as a column projection.
+
+    The author fields come from `user` once and reply counts from one grouped query,
+    so the cost does not grow with per-row relationship loads.
+
+    Args:
+        user: The UserAccount whose comments are listed
+        limit: Page size; all comments when None
+        cursor: Decoded cursor of the last comment on the previous page
+
+    Returns:
+        Tuple of (serialized comments, last comment row if another page follows else None)
+    """
+    query = (select(*HISTORY_COLUMNS)
+             .where(PublicationComments.user_id == user.user_id, PublicationComments.status == ACTIVE))
+    if cursor:
+        query = query.where(after_cursor(*cursor))
+    query = query.order_by(*NEWEST_FIRST)
+
+    if limit is None:
+        rows, last = db.session.execute(query).all(), None
+    else:
+        # Fetch one extra row to learn whether another page follows
+        rows = db.session.execute(query.limit(limit + 1)).all()
+        last = rows[limit - 1] if len(rows) > limit else None
+        rows = rows[:limit]
+
+    reply_counts = _reply_counts([row.id for row in rows])
+    comments = [
+        {
+            'id': row.id,
+            'publication_id': row.publication_id,
+            'user_id': user.user_id,
+            'user_name': user.full_name,
+            'user_avatar': user.avator,
+            'parent_comment_id': row.parent_comment_id,
+            'comment_text': row.comment_text,
+            'comment_type': row.comment_type,
+            'status': row.status,
+            'is_edited': row.is_edited,
+            'edit_count': row.edit_count,
+            'likes_count': row.likes_count,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+            'replies_count': reply_counts.get(row.id, 0)
+        }
+        for row in rows
+    ]
+    return comments, last
+
+
+def count_user_comments(user_id: int) -> int:
+    """Number of active comments written by a user"""
+    return db.session.scalar(
+        select(func.count()).select_from(PublicationComments)
+        .where(PublicationComments.user_id == user_id, PublicationComments.status == ACTIVE)
+    )
+
+
+def _adjust_likes(comment_id: int, delta: int) -> int:
+    """Atomically add `delta` to a comment's likes_count and return the new value"""
+    return db.session.execute(
+        update(PublicationComments)
+        .where(PublicationComments.id == comment_id)
+        .values(likes_count=func.greatest(func.coalesce(PublicationComments.likes_count, 0) + delta, 0))
+        .returning(PublicationComments.likes_count)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def _likes_count(comment_id: int) -> int:
+    return db.session.scalar(select(PublicationComments.likes_count).where(PublicationComments.id == comment_id)) or 0
+
+
+def add_like(comment_id: int, user_id: int) -> Tuple[bool, int]:
+    """
+    Record a user's like and bump the counter, both in one short transaction.
+
+    The like row is inserted with ON CONFLICT DO NOTHING, so a repeated or concurrent
+    like by the same user is a no-op, and the counter is incremented in place with
+    UPDATE ... SET likes_count = likes_count + 1 rather than read-modify-write.
+
+    Returns:
+        Tuple of (whether this call added the like, current likes count)
+    """
+    inserted = db.session.execute(
+        pg_insert(CommentLikes)
+        .values(comment_id=comment_id, user_id=user_id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=['comment_id', 'user_id'])
+        .returning(CommentLikes.comment_id)
+    ).first()
+    likes_count = _adjust_likes(comment_id, 1) if inserted else _likes_count(comment_id)
+    db.session.commit()
+    return inserted is not None, likes_count
+
+
+def remove_like(comment_id: int, user_id: int) -> Tuple[bool, int]:
+    """
+    Remove a user's like and decrement the counter if the like existed
+
+    Returns:
+        Tuple of (whether this call removed a like, current likes count)
+    """
+    removed = db.session.execute(
+        delete(CommentLikes)
+        .where(CommentLikes.comment_id == comment_id, CommentLikes.user_id == user_id)
+        .returning(CommentLikes.comment_id)
+    ).first()
+    likes_count = _adjust_likes(comment_id, -1) if removed else _likes_count(comment_id)
+    db.session.commit()
+    return removed is not None, likes_count
+
@@ -0,0 +1,563 @@
+"""
+Incremental push of publications and their semantics (files, documents, creators,
+organizations, funders and projects) to CORDRA.
+
+Used by push_to_cordra.py, push_recent_to_cordra.py and the push_to_cordra_async
+Celery task. Must be called inside an application context.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models import Publications, CordraSyncLedger, CordraSyncState
+from app.service_codra import update_object, create_or_update_semantic_object
+from app.service_publications import PUBLICATION_RELATIONS
+from app.service_reference_data import reference_data
+
+logger = logging.getLogger(__name__)
+
+# Always use the production domain for CORDRA
+APPLICATION_DOMAIN = 'https://docid.africapidalliance.org'
+
+# Keep DEFAULT_WORKERS at or below CORDRA_POOL_SIZE so every worker gets a pooled connection
+DEFAULT_WORKERS = int(os.getenv('CORDRA_PUSH_WORKERS', 8))
+DEFAULT_BATCH_SIZE = int(os.getenv('CORDRA_PUSH_BATCH_SIZE', 100))
+
+# CordraSyncState row holding the publication-change watermark
+SYNC_NAME = 'publications'
+
+# Content keys regenerated on every build; left out of the hash so unchanged objects still match the ledger
+VOLATILE_CONTENT_KEYS = ('createdOn',)
+
+
+def fix_file_url(url):
+    """Fix file URLs to use the correct domain instead of localhost or any other domain"""
+    if not url:
+        return url
+    
+    # Extract just the path part after /uploads/
+    if '/uploads/' in url:
+        # Get everything after /uploads/
+        parts = url.split('/uploads/')
+        if len(parts) > 1:
+            # Return with the correct domain
+            return f"{APPLICATION_DOMAIN}/uploads/{parts[1]}"
+    
+    # If it's already using the correct domain, return as is
+    if url.startswith(APPLICATION_DOMAIN):
+        return url
+    
+    # For any other URL format, try to extract the filename and rebuild
+    if 'localhost' in url or 'http://' in url or 'https://' in url:
+        # Try to extract just the filename
+        filename = url.split('/')[-1] if '/' in url else url
+        if filename:
+            return f"{APPLICATION_DOMAIN}/uploads/{filename}"
+    
+    return url
+
+
+class CordraOperation(NamedTuple):
+    """A single CORDRA object write, built from the database before any HTTP call is made"""
+    publication_id: int
+    label: str              # e.g. "PublicationFile 12", used in logs
+    handle: str
+    object_type: str        # CORDRA type used when the object has to be created
+    content: Dict[str, Any]
+    update_first: bool      # Try update_object first and create on 404, instead of create-then-update
+
+
+def build_publication_operations(publication) -> List[CordraOperation]:
+    """Build the main publication object (Container iD)"""
+    metadata = {
+        "id": str(publication.id),
+        "docid": f"https://docid.africapidalliance.org/docid/{publication.document_docid}",
+        "title": publication.document_title,
+        "description": publication.document_description,
+        "doi": publication.doi,
+        "owner": publication.owner,
+        "user_id": publication.user_id,
+        "resource_type_id": publication.resource_type_id,
+        "avatar": publication.avatar,
+        "poster_url": fix_file_url(publication.publication_poster_url),
+        "groupName": publication.document_title,  # Container iD requires groupName
+        "created_on": int(publication.published.timestamp()) if publication.published else None
+    }
+    return [CordraOperation(publication.id, f"Publication {publication.id}", publication.doi, "Container iD", metadata, True)]
+
+
+def build_publication_files_operations(publication) -> List[CordraOperation]:
+    """Build one APA_Handle_ID object per publication file that has a handle"""
+    operations = []
+    for file in publication.publications_files:
+        if not file.handle_identifier:
+            logger.warning(f"PublicationFile {file.id} has no handle, skipping")
+            continue
+            
+        # Get publication type name
+        pub_type = reference_data.publication_type(file.publication_type_id)
+        pub_type_name = pub_type.publication_type_name if pub_type else "Unknown"
+        
+        metadata = {
+            "title": file.title,
+            "description": file.description,
+            "fileUrl": fix_file_url(file.file_url),
+            "fileType": file.file_type,
+            "fileName": file.file_name,
+            "publicationType": pub_type_name,
+            "parentId": publication.doi,
+            "createdOn": int(datetime.now().timestamp())
+        }
+        
+        if file.external_identifier:
+            metadata["externalIdentifier"] = file.external_identifier
+            metadata["externalIdentifierType"] = file.external_identifier_type
+            if file.external_identifier_type:
+                metadata[file.external_identifier_type.lower()] = file.external_identifier
+        
+        operations.append(CordraOperation(
+            publication.id, f"PublicationFile {file.id}", file.handle_identifier, "APA_Handle_ID", metadata, True
+        ))
+    return operations
+
+
+def build_publication_documents_operations(publication) -> List[CordraOperation]:
+    """Build one APA_Handle_ID object per publication document that has a handle"""
+    operations = []
+    for doc in publication.publication_documents:
+        if not doc.handle_identifier:
+            logger.warning(f"PublicationDocument {doc.id} has no handle, skipping")
+            continue
+            
+        # Get publication type name
+        pub_type = reference_data.publication_type(doc.publication_type_id)
+        pub_type_name = pub_type.publication_type_name if pub_type else "Unknown"
+        
+        # Get identifier type name if available
+        identifier_type_name = None
+        if doc.identifier_type_id:
+            id_type = reference_data.identifier_type(doc.identifier_type_id)
+            identifier_type_name = id_type.identifier_type_name if id_type else None
+        
+        # Construct CSTR full resolvable URL if identifier_cstr exists
+        identifier_cstr_url = None
+        if doc.identifier_cstr:
+            # If it's already a full URL, use as is
+            if doc.identifier_cstr.startswith('http'):
+                identifier_cstr_url = doc.identifier_cstr
+            # Otherwise, construct the CSTR URL with correct format
+            else:
+                identifier_cstr_url = f"https://www.cstr.cn/detail?identifier={doc.identifier_cstr}"
+        
+        metadata = {
+            "title": doc.title,
+            "description": doc.description,
+            "fileUrl": fix_file_url(doc.file_url),
+            "publicationType": pub_type_name,
+            "identifierType": identifier_type_name,
+            "identifierCstr": identifier_cstr_url,  # Full resolvable CSTR URL
+            "parentId": publication.doi,
+            "createdOn": int(datetime.now().timestamp())
+        }
+        
+        if doc.external_identifier:
+            metadata["externalIdentifier"] = doc.external_identifier
+            metadata["externalIdentifierType"] = doc.external_identifier_type
+            if doc.external_identifier_type:
+                metadata[doc.external_identifier_type.lower()] = doc.external_identifier
+        
+        operations.append(CordraOperation(
+            publication.id, f"PublicationDocument {doc.id}", doc.handle_identifier, "APA_Handle_ID", metadata, True
+        ))
+    return operations
+
+
+def build_publication_creators_operations(publication) -> List[CordraOperation]:
+    """Build the creators collection object"""
+    creators = publication.publication_creators
+    
+    if not creators:
+        return []
+        
+    # Prepare creators list for CORDRA
+    creators_list = []
+    for creator in creators:
+        # Get role name
+        role = reference_data.creators_role(creator.role_id)
+        role_name = role.role_name if role else "Author"
+        
+        creator_data = {
+            "familyName": creator.family_name,
+            "givenName": creator.given_name,
+            "fullName": f"{creator.given_name} {creator.family_name}",
+            "identifier": creator.identifier,  # This now contains the full resolvable URL
+            "identifierType": creator.identifier_type,  # e.g., 'orcid', 'isni', 'viaf'
+            "role": role_name,
+            "parentId": publication.doi
+        }
+        
+        # Add specific identifier field for easier access
+        if creator.identifier_type and creator.identifier:
+            creator_data[creator.identifier_type.lower()] = creator.identifier
+        creators_list.append(creator_data)
+    
+    content_data = {
+        "parentId": publication.doi,
+        "publicationId": str(publication.id),
+        "creators": creators_list,
+        "createdOn": int(datetime.now().timestamp())
+    }
+    
+    # Use a synthetic handle for the creators collection, stored as APA_Handle_ID which exists in CORDRA
+    return [CordraOperation(
+        publication.id, f"PublicationCreators ({len(creators)}) of Publication {publication.id}",
+        f"{publication.doi}/creators", "APA_Handle_ID", content_data, False
+    )]
+
+
+def build_publication_organizations_operations(publication) -> List[CordraOperation]:
+    """Build the organizations collection object"""
+    organizations = publication.publication_organizations
+    
+    if not organizations:
+        return []
+        
+    # Prepare organizations list for CORDRA
+    orgs_list = []
+    for org in organizations:
+        org_data = {
+            "name": org.name,
+            "type": org.type,
+            "otherName": org.other_name,
+            "country": org.country,
+            "parentId": publication.doi
+        }
+        
+        # Add identifier fields (now that organization identifiers are supported)
+        if org.identifier:
+            org_data["identifier"] = org.identifier  # Full resolvable URL (e.g., https://ror.org/02qv1aw94)
+            if org.identifier_type:
+                org_data["identifierType"] = org.identifier_type  # e.g., 'ror', 'grid', 'isni'
+                org_data[org.identifier_type.lower()] = org.identifier
+        orgs_list.append(org_data)
+    
+    content_data = {
+        "parentId": publication.doi,
+        "publicationId": str(publication.id),
+        "organizations": orgs_list,
+        "organizationsCount": len(orgs_list),
+        "createdOn": int(datetime.now().timestamp())
+    }
+    
+    # Use a synthetic handle for the organizations collection, stored as APA_Handle_ID which exists in CORDRA
+    return [CordraOperation(
+        publication.id, f"PublicationOrganizations ({len(organizations)}) of Publication {publication.id}",
+        f"{publication.doi}/organizations", "APA_Handle_ID", content_data, False
+    )]
+
+
+def build_publication_funders_operations(publication) -> List[CordraOperation]:
+    """Build the funders collection object"""
+    funders = publication.publication_funders
+    
+    if not funders:
+        return []
+        
+    # Prepare funders list for CORDRA
+    funders_list = []
+    for funder in funders:
+        # Get funder type name
+        funder_type = reference_data.funder_type(funder.funder_type_id)
+        funder_type_name = funder_type.funder_type_name if funder_type else "Unknown"
+        
+        funder_data = {
+            "name": funder.name,
+            "type": funder.type,
+            "funderType": funder_type_name,
+            "otherName": funder.other_name,
+            "country": funder.country,
+            "identifier": funder.identifier,  # This now contains the full resolvable URL (e.g., https://ror.org/01bj3aw27)
+            "identifierType": funder.identifier_type,  # e.g., 'ror', 'fundref', 'isni'
+            "parentId": publication.doi
+        }
+        
+        # Add specific identifier field for easier access
+        if funder.identifier_type and funder.identifier:
+            funder_data[funder.identifier_type.lower()] = funder.identifier
+        funders_list.append(funder_data)
+    
+    content_data = {
+        "parentId": publication.doi,
+        "publicationId": str(publication.id),
+        "funders": funders_list,
+        "fundersCount": len(funders_list),
+        "createdOn": int(datetime.now().timestamp())
+    }
+    
+    # Use a synthetic handle for the funders collection, stored as APA_Handle_ID which exists in CORDRA
+    return [CordraOperation(
+        publication.id, f"PublicationFunders ({len(funders)}) of Publication {publication.id}",
+        f"{publication.doi}/funders", "APA_Handle_ID", content_data, False
+    )]
+
+
+def build_publication_projects_operations(publication) -> List[CordraOperation]:
+    """Build the projects collection object"""
+    projects = publication.publication_projects
+    
+    if not projects:
+        return []
+        
+    # Prepare projects list for CORDRA
+    projects_list = []
+    for project in projects:
+        project_data = {
+            "title": project.title,
+            "raidId": project.raid_id,  # Keep for backward compatibility
+            "description": project.description,
+            "identifier": project.identifier,  # Full resolvable URL (e.g., https://app.demo.raid.org.au/raids/10.80368/b1adfb3a)
+            "identifierType": project.identifier_type,  # Will be 'raid'
+            "parentId": publication.doi
+        }
+        
+        # Add dynamic field for easier access
+        if project.identifier_type and project.identifier:
+            project_data[project.identifier_type.lower()] = project.identifier
+        projects_list.append(project_data)
+    
+    content_data = {
+        "parentId": publication.doi,
+        "publicationId": str(publication.id),
+        "projects": projects_list,
+        "projectsCount": len(projects_list),
+        "createdOn": int(datetime.now().timestamp())
+    }
+    
+    # Use a synthetic handle for the projects collection, stored as APA_Handle_ID which exists in CORDRA
+    return [CordraOperation(
+        publication.id, f"PublicationProjects ({len(projects)}) of Publication {publication.id}",
+        f"{publication.doi}/projects", "APA_Handle_ID", content_data, False
+    )]
+
+
+OPERATION_BUILDERS = [
+    build_publication_operations,
+    build_publication_files_operations,
+    build_publication_documents_operations,
+    build_publication_creators_operations,
+    build_publication_organizations_operations,
+    build_publication_funders_operations,
+    build_publication_projects_operations,
+]
+
+
+def build_operations(publication) -> List[CordraOperation]:
+    """Build every CORDRA write for a publication and its semantics"""
+    if not publication.doi:
+        logger.warning(f"Publication {publication.id} has no DOI, skipping CORDRA push")
+        return []
+    operations = []
+    for builder in OPERATION_BUILDERS:
+        operations.extend(builder(publication))
+    return operations
+
+
+def send_operation(operation: CordraOperation) -> bool:
+    """Write one object to CORDRA. Safe to call from worker threads: it does not touch the database."""
+    try:
+        if operation.update_first:
+            response = update_object(operation.handle, {"attributes": {"content": operation.content}})
+            
+            # If object doesn't exist (404), try to create it
+            if isinstance(response, dict) and response.get('status_code') == 404:
+                logger.info(f"{operation.label} ({operation.handle}) not found in CORDRA, creating it")
+                response = create_or_update_semantic_object(operation.object_type, operation.handle, operation.content)
+        else:
+            response = create_or_update_semantic_object(operation.object_type, operation.handle, operation.content)
+        
+        if isinstance(response, dict) and (response.get('error') or response.get('success') is False):
+            logger.error(f"✗ CORDRA rejected {operation.label} ({operation.handle}): {response}")
+            return False
+        
+        logger.debug(f"CORDRA response for {operation.label}: {response}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Failed to push {operation.label} ({operation.handle}): {str(e)}")
+        return False
+
+
+def content_hash(operation: CordraOperation) -> str:
+    """SHA-256 of the object type and payload, ignoring volatile keys"""
+    content = {key: value for key, value in operation.content.items() if key not in VOLATILE_CONTENT_KEYS}
+    payload = json.dumps([operation.object_type, content], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def filter_changed_operations(operations: List[CordraOperation]):
+    """
+    Split operations into those whose payload differs from the ledger and those already pushed as-is
+
+    Returns:
+        Tuple of (changed operations, {handle: content hash}, unchanged count)
+    """
+    hashes = {operation.handle: content_hash(operation) for operation in operations}
+    pushed = dict(
+        db.session.query(CordraSyncLedger.handle, CordraSyncLedger.content_hash)
+        .filter(CordraSyncLedger.handle.in_(list(hashes)))
+        .all()
+    ) if hashes else {}
+    changed = [operation for operation in operations if pushed.get(operation.handle) != hashes[operation.handle]]
+    return changed, hashes, len(operations) - len(changed)
+
+
+def record_pushed_operations(operations: List[CordraOperation], hashes: Dict[str, str]) -> None:
+    """Upsert the ledger entries for successfully pushed operations in one statement"""
+    rows = {
+        operation.handle: {
+            'handle': operation.handle,
+            'publication_id': operation.publication_id,
+            'content_hash': hashes[operation.handle],
+            'pushed_at': datetime.utcnow()
+        }
+        for operation in operations
+    }
+    if not rows:
+        return
+    stmt = insert(CordraSyncLedger).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CordraSyncLedger.handle],
+        set_={
+            'publication_id': stmt.excluded.publication_id,
+            'content_hash': stmt.excluded.content_hash,
+            'pushed_at': stmt.excluded.pushed_at
+        }
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+
+
+def iter_publication_batches(publication_id=None, batch_size=DEFAULT_BATCH_SIZE, changed_since=None):
+    """
+    Read publications in keyset pages of batch_size with all related collections eager-loaded,
+    so each batch costs one query per collection instead of one per publication.
+
+    Each page is its own query (WHERE id > last id ORDER BY id LIMIT n) rather than one
+    server-side cursor, so the caller may commit between batches.
+
+    Args:
+        publication_id: Only read this publication
+        batch_size: Publications per batch
+        changed_since: Only read publications created or updated after this time
+    """
+    stmt = (select(Publications)
+            .options(*[selectinload(getattr(Publications, relation)) for relation in PUBLICATION_RELATIONS])
+            .order_by(Publications.id)
+            .limit(batch_size))
+    if publication_id:
+        stmt = stmt.where(Publications.id == publication_id)
+    if changed_since:
+        stmt = stmt.where(func.coalesce(Publications.updated_at, Publications.published) > changed_since)
+
+    last_id = None
+    while True:
+        page = stmt if last_id is None else stmt.where(Publications.id > last_id)
+        batch = db.session.execute(page).scalars().all()
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield batch
+        if len(batch) < batch_size:
+            return
+
+
+def push_publications(publication_id=None, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                      incremental=True, force=False) -> Dict[str, Any]:
+    """
+    Push publications and their semantics to CORDRA.
+    
+    Operations for each batch are built on the main thread (the only one using the
+    database session) and sent concurrently by a bounded pool of worker threads.
+    Objects whose payload hash matches the sync ledger are skipped.
+    
+    Args:
+        publication_id: Only push this publication
+        workers: Concurrent CORDRA requests
+        batch_size: Publications loaded per database batch
+        incremental: Only consider publications changed since the last complete sync.
+            Runs over all publications advance that watermark when they finish without failures
+        force: Push every object even if the ledger says it is unchanged
+    
+    Returns:
+        Dict with publication/object success and failure counts and the elapsed time
+    """
+    stats = {
+        'publications': 0, 'publications_failed': 0, 'publications_skipped': 0,
+        'objects': 0, 'objects_failed': 0, 'objects_unchanged': 0
+    }
+    start_time = time.time()
+    # Taken before reading so changes made during the run are picked up by the next one
+    sync_started = datetime.utcnow()
+    track_watermark = not publication_id
+    changed_since = CordraSyncState.get_watermark(SYNC_NAME) if track_watermark and incremental else None
+    if changed_since:
+        logger.info(f"Incremental sync: publications changed since {changed_since.isoformat()}")
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in iter_publication_batches(publication_id, batch_size, changed_since):
+            operations = []
+            for publication in batch:
+                publication_operations = build_operations(publication)
+                if not publication_operations:
+                    stats['publications_skipped'] += 1
+                operations.extend(publication_operations)
+            
+            considered_publications = {operation.publication_id for operation in operations}
+            if force:
+                hashes = {operation.handle: content_hash(operation) for operation in operations}
+            else:
+                operations, hashes, unchanged = filter_changed_operations(operations)
+                stats['objects_unchanged'] += unchanged
+            
+            failed_publications = set()
+            pushed_operations = []
+            for operation, succeeded in zip(operations, executor.map(send_operation, operations)):
+                stats['objects'] += 1
+                if succeeded:
+                    pushed_operations.append(operation)
+                else:
+                    stats['objects_failed'] += 1
+                    failed_publications.add(operation.publication_id)
+            
+            record_pushed_operations(pushed_operations, hashes)
+            
+            stats['publications'] += len(considered_publications)
+            stats['publications_failed'] += len(failed_publications)
+            
+            # Release the batch so memory stays flat over a full re-push
+            db.session.expunge_all()
+            
+            elapsed = time.time() - start_time
+            logger.info(
+                f"Progress: {stats['publications']} publications, {stats['objects']} objects "
+                f"({stats['objects_failed']} failed) in {elapsed:.1f}s - "
+                f"{stats['objects'] / elapsed if elapsed else 0:.1f} objects/s"
+            )
+    
+    if track_watermark and stats['objects_failed'] == 0:
+        CordraSyncState.set_watermark(SYNC_NAME, sync_started)
+        db.session.commit()
+        logger.info(f"CORDRA sync watermark advanced to {sync_started.isoformat()}")
+    
+    stats['elapsed'] = time.time() - start_time
+    return stats
@@ -1,6 +1,6 @@
 # app/service_crossref.py
 
-import requests
+from app.http_client import http_client
 from requests.auth import HTTPBasicAuth
 from flask import Blueprint, request, jsonify
 from xml.etree import ElementTree as ET
@@ -14,6 +14,9 @@ logging.basicConfig(level=logging.ERROR)
 # Crossref Deposit URL
 DEPOSIT_URL = 'https://test.crossref.org/servlet/deposit'
 
+# (connect, read) seconds; deposits upload a whole XML file and Crossref answers slowly
+DEPOSIT_TIMEOUT = (3.05, 60)
+
 # Common XML namespaces
 NAMESPACE = {
     'xsi': 'http://www.w3.org/2001/XMLSchema-instance',
@@ -62,7 +65,7 @@ def get_crossref_doi(doi):
             return jsonify({"success": False, "message": "Missing 'doi' field"}), 400
 
         url = CROSSREF_API_URL + doi
-        response = requests.get(url, headers=HEADERS)
+        response = http_client.get(url, headers=HEADERS, stale_if_error=True)
 
         if response.status_code == 200:
             xml_string = response.content
@@ -89,7 +92,7 @@ def deposit_to_crossref(xml_data, username, password):
     }
 
     try:
-        response = requests.post(DEPOSIT_URL, files=files, headers=headers)
+        response = http_client.post(DEPOSIT_URL, files=files, headers=headers, timeout=DEPOSIT_TIMEOUT)
         logging.error(f"Response status: {response.status_code}, Response content: {response.text}")
 
         if response.status_code == 200:
@@ -1,4 +1,4 @@
-import requests
+from app.http_client import http_client
 import json
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -151,7 +151,7 @@ class CSTRAPIHelper:
         }
         
         try:
-            response = requests.post(url, 
+            response = http_client.post(url, 
                                    headers=self.headers, 
                                    params=params,
                                    json=data)
@@ -180,7 +180,7 @@ class CSTRAPIHelper:
         }
         
         try:
-            response = requests.post(url, 
+            response = http_client.post(url, 
                                    headers=self.headers, 
                                    params=params,
                                    json=data)
@@ -202,7 +202,7 @@ class CSTRAPIHelper:
         params = {"task_id": task_id}
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = http_client.get(url, headers=self.headers, params=params)
             return response.json()
         except Exception as e:
             return {"error": str(e), "code": 500}
@@ -224,7 +224,7 @@ class CSTRAPIHelper:
         headers = {"Content-Type": "application/json"}
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = http_client.get(url, headers=headers, params=params)
             return response.json()
         except Exception as e:
             return {"error": str(e), "code": 500}
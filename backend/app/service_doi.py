@@ -1,5 +1,6 @@
 # app/service_doi.py
 import requests
+from app.http_client import http_client
 from flask import (
     Blueprint,
     jsonify,
@@ -15,7 +16,7 @@ def get_datacite_doi():
         )
         headers = {"Content-Type": "application/json"}
         repository_id, password = "FPAV", "Tremis#123$"
-        response = requests.get(
+        response = http_client.get(
             url=url,
             headers=headers,
             auth=(repository_id, password),
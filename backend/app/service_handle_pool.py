@@ -0,0 +1,153 @@
+"""
+Pool of pre-minted APA handles and back-fill of "handle pending" rows.
+
+Publishing claims a handle from the pool inside its own transaction instead of calling
+CORDRA. When the pool is empty the file or document is saved with its external DOI and
+no handle_identifier, which marks it as pending; assign_pending_handles fills it in later.
+"""
+import logging
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from flask import current_app
+
+from app import db
+from app.models import HandlePool, PublicationFiles, PublicationDocuments
+from app.service_identifiers import IdentifierService
+
+logger = logging.getLogger(__name__)
+
+# Models whose rows can be waiting for a handle
+PENDING_HANDLE_MODELS = (PublicationFiles, PublicationDocuments)
+
+
+def claim_handle() -> Optional[str]:
+    """
+    Claim one unused handle from the pool.
+
+    The row is locked with SKIP LOCKED so concurrent publishes never get the same handle.
+    The claim is committed (or rolled back and returned to the pool) with the caller's
+    transaction.
+
+    Returns:
+        The claimed handle, or None if the pool is empty
+    """
+    row = (HandlePool.query
+           .filter(HandlePool.claimed_at.is_(None))
+           .order_by(HandlePool.id)
+           .with_for_update(skip_locked=True)
+           .first())
+    if not row:
+        return None
+    row.claimed_at = datetime.utcnow()
+    return row.handle
+
+
+def available_handles() -> int:
+    """Number of unclaimed handles left in the pool"""
+    return HandlePool.query.filter(HandlePool.claimed_at.is_(None)).count()
+
+
+def pool_is_low() -> bool:
+    """Whether the pool has dropped below HANDLE_POOL_LOW_WATERMARK"""
+    return available_handles() < current_app.config.get('HANDLE_POOL_LOW_WATERMARK', 10)
+
+
+def replenish_pool(target: Optional[int] = None) -> int:
+    """
+    Mint handles in CORDRA until the pool holds `target` unclaimed handles.
+
+    Each handle is committed as soon as it is minted so a CORDRA failure part way
+    through keeps what was already minted.
+
+    Args:
+        target: Desired number of unclaimed handles (defaults to HANDLE_POOL_TARGET)
+
+    Returns:
+        Number of handles minted
+    """
+    target = target if target is not None else current_app.config.get('HANDLE_POOL_TARGET', 50)
+    missing = target - available_handles()
+    minted = 0
+
+    for _ in range(max(missing, 0)):
+        handle = IdentifierService.generate_handle()
+        if not handle:
+            logger.warning(f"Stopped replenishing handle pool after {minted} handles: CORDRA did not return a handle")
+            break
+        db.session.add(HandlePool(handle=handle))
+        db.session.commit()
+        minted += 1
+
+    logger.info(f"Handle pool replenished with {minted} handles (target {target})")
+    return minted
+
+
+def pending_handle_ids(publication_id: Optional[int] = None) -> List[Tuple[Any, int]]:
+    """
+    Get files and documents that carry an external DOI but are still waiting for a handle.
+
+    Args:
+        publication_id: Restrict to one publication (all publications when None)
+
+    Returns:
+        List of (model, row id) pairs
+    """
+    pending = []
+    for model in PENDING_HANDLE_MODELS:
+        query = db.session.query(model.id).filter(
+            model.handle_identifier.is_(None),
+            model.external_identifier_type == 'DOI'
+        )
+        if publication_id is not None:
+            query = query.filter(model.publication_id == publication_id)
+        pending.extend((model, row_id) for row_id, in query.order_by(model.id).all())
+    return pending
+
+
+def _lock_pending(model, row_id: int):
+    """
+    Lock a row that is still waiting for a handle, or return None if it has been given
+    one since it was listed or another run holds it (SKIP LOCKED)
+    """
+    return (model.query
+            .filter(model.id == row_id, model.handle_identifier.is_(None))
+            .with_for_update(skip_locked=True)
+            .first())
+
+
+def assign_pending_handles(publication_id: Optional[int] = None) -> int:
+    """
+    Give every pending file or document a handle, from the pool when possible and by
+    minting one in CORDRA otherwise. Each assignment is committed on its own so no
+    transaction is held open across more than one row.
+
+    Each row is locked and re-checked before its handle is claimed, so the cron run and
+    the Celery task never both assign a handle to the same file or document.
+
+    Args:
+        publication_id: Restrict to one publication (all publications when None)
+
+    Returns:
+        Number of rows that received a handle
+    """
+    assigned = 0
+
+    for model, row_id in pending_handle_ids(publication_id):
+        row = _lock_pending(model, row_id)
+        if row is None:
+            db.session.rollback()
+            continue
+        handle = claim_handle() or IdentifierService.generate_handle()
+        if not handle:
+            db.session.rollback()
+            logger.warning(f"Could not obtain a handle for {model.__name__} {row_id}; leaving it pending")
+            break
+        row.handle_identifier = handle
+        # Mark the parent publication as changed so the incremental CORDRA sync pushes the new handle
+        row.publication.updated_at = datetime.utcnow()
+        db.session.commit()
+        assigned += 1
+        logger.info(f"Assigned pending handle {handle} to {model.__name__} {row_id}")
+
+    return assigned
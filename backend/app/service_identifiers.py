@@ -82,13 +82,15 @@ class IdentifierService:
             
         # Check if it's a DOI
         if IdentifierService.is_doi(identifier):
-            # Generate a Handle for CORDRA
-            handle = IdentifierService.generate_handle()
+            # Take a pre-minted Handle for CORDRA instead of minting one while the caller holds a transaction
+            from app.service_handle_pool import claim_handle
+            handle = claim_handle()
             if handle:
-                logger.info(f"Generated Handle {handle} for DOI {identifier}")
+                logger.info(f"Claimed pooled Handle {handle} for DOI {identifier}")
                 return handle, identifier, "DOI"
             else:
-                logger.warning(f"Failed to generate Handle for DOI {identifier}")
+                # No handle_identifier with an external DOI marks the row as pending for assign_pending_handles
+                logger.warning(f"Handle pool empty, Handle for DOI {identifier} is pending")
                 return None, identifier, "DOI"
                 
         # Check if it's already a Handle
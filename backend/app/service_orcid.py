@@ -0,0 +1,202 @@
+"""
+Cached access to the ORCID public API.
+
+Person records are cached by iD and search results by normalized query in the shared
+cache. Freshness follows the upstream Cache-Control header (no-store/no-cache responses
+are not cached, max-age/s-maxage is capped at ORCID_CACHE_MAX_TTL, ORCID_CACHE_TTL
+applies when the header is absent). Expired entries are kept for ORCID_CACHE_RETAIN
+seconds and revalidated with their ETag/Last-Modified, so an unchanged record costs a
+304 instead of a full download.
+
+Concurrent lookups of the same key in a worker are coalesced: one request goes to ORCID
+and every caller waiting on it gets its result.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app
+
+from app import cache
+from app.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+ORCID_API_URL = "https://pub.orcid.org/v3.0/"
+ORCID_SEARCH_URL = f"{ORCID_API_URL}expanded-search"
+
+ORCID_URL_PREFIXES = ('https://orcid.org/', 'http://orcid.org/')
+
+_MAX_AGE = re.compile(r'(?:^|,)\s*(s-maxage|max-age)\s*=\s*"?(\d+)"?', re.IGNORECASE)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution per worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+_single_flight = SingleFlight()
+
+
+def _config(key: str, default: int) -> int:
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+def normalize_orcid_id(orcid_id: str) -> str:
+    """Bare iD from either the iD or the full https://orcid.org/ URL, with an uppercase X checksum"""
+    orcid_id = orcid_id.strip()
+    for prefix in ORCID_URL_PREFIXES:
+        if orcid_id.startswith(prefix):
+            orcid_id = orcid_id[len(prefix):]
+    return orcid_id.upper()
+
+
+def _normalize_value(value: Optional[str]) -> str:
+    return ' '.join((value or '').split()).casefold()
+
+
+def freshness(headers) -> Optional[int]:
+    """
+    Seconds a response may be served from cache according to its Cache-Control header
+
+    Returns:
+        None when the response must not be cached
+    """
+    cache_control = headers.get('Cache-Control', '')
+    directives = {directive.strip().lower() for directive in cache_control.split(',')}
+    if 'no-store' in directives or 'no-cache' in directives:
+        return None
+
+    ages = dict((name.lower(), int(seconds)) for name, seconds in _MAX_AGE.findall(cache_control))
+    max_age = ages.get('s-maxage', ages.get('max-age'))
+    if max_age is None:
+        return _config('ORCID_CACHE_TTL', 3600)
+    if max_age <= 0:
+        return None
+    return min(max_age, _config('ORCID_CACHE_MAX_TTL', 86400))
+
+
+def _read(key: str) -> Optional[Dict[str, Any]]:
+    try:
+        return cache.get(key)
+    except Exception as e:
+        logger.warning(f"ORCID cache read failed for {key}: {e}")
+        return None
+
+
+def _write(key: str, entry: Dict[str, Any], ttl: int) -> None:
+    entry['expires_at'] = time.time() + ttl
+    try:
+        # Kept past its freshness so it can be revalidated instead of downloaded again
+        cache.set(key, entry, timeout=max(ttl, _config('ORCID_CACHE_RETAIN', 604800)))
+    except Exception as e:
+        logger.warning(f"ORCID cache write failed for {key}: {e}")
+
+
+def _refresh(key: str, url: str, params: Optional[Dict[str, str]],
+             entry: Optional[Dict[str, Any]]) -> Tuple[int, Optional[Dict[str, Any]]]:
+    headers = {'Accept': 'application/json'}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+
+    response = http_client.get(url, params=params, headers=headers, stale_if_error=True)
+
+    if response.status_code == 304 and entry:
+        ttl = freshness(response.headers)
+        if ttl:
+            _write(key, entry, ttl)
+        return 200, entry['data']
+    if response.status_code != 200:
+        return response.status_code, None
+
+    data = response.json()
+    ttl = freshness(response.headers)
+    if ttl and not getattr(response, 'stale', False):
+        _write(key, {
+            'data': data,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }, ttl)
+    return 200, data
+
+
+def _cached_get(key: str, url: str, params: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """
+    Return an ORCID API document from the cache, or fetch (or revalidate) it once per worker
+
+    Returns:
+        Tuple of (status code, parsed JSON or None when the status is not 200)
+
+    Raises:
+        requests.exceptions.RequestException: ORCID could not be reached and nothing is cached
+    """
+    entry = _read(key)
+    if entry and entry['expires_at'] > time.time():
+        return 200, entry['data']
+    return _single_flight.do(key, lambda: _refresh(key, url, params, entry))
+
+
+def get_person(orcid_id: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """The /person section of an ORCID record"""
+    orcid_id = normalize_orcid_id(orcid_id)
+    return _cached_get(f"orcid:person:{orcid_id}", f"{ORCID_API_URL}{orcid_id}/person")
+
+
+def search_people(first_name: Optional[str] = None, last_name: Optional[str] = None,
+                  other_names: Optional[str] = None, affiliations: Optional[str] = None) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """ORCID expanded search on names and affiliation; equivalent queries share one cache entry"""
+    query_parts = []
+    if first_name:
+        query_parts.append(f"given-names:{_normalize_value(first_name)}")
+    if last_name:
+        query_parts.append(f"family-name:{_normalize_value(last_name)}")
+    if other_names:
+        query_parts.append(f"given-names:{_normalize_value(other_names)}")
+    if affiliations:
+        query_parts.append(f"affiliation-org-name:{_normalize_value(affiliations)}")
+    query = " AND ".join(query_parts)
+
+    digest = hashlib.sha1(query.encode('utf-8')).hexdigest()
+    return _cached_get(f"orcid:search:{digest}", ORCID_SEARCH_URL, params={'q': query})
@@ -0,0 +1,237 @@
+"""
+Service for loading and serializing a publication together with its related records
+"""
+import logging
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy.orm import selectinload
+
+from app.models import Publications
+
+logger = logging.getLogger(__name__)
+
+# Scalar fields returned for every publication detail response
+PUBLICATION_FIELDS = [
+    'id', 'document_title', 'document_description', 'document_docid',
+    'resource_type_id', 'user_id', 'avatar', 'owner', 'publication_poster_url',
+    'doi', 'published', 'handle_url'
+]
+
+# Extra scalar fields returned when serializing for the edit form
+PUBLICATION_EDIT_FIELDS = ['updated_at', 'updated_by']
+
+# Related collections, in the order they appear in the response
+PUBLICATION_RELATIONS = [
+    'publications_files', 'publication_documents', 'publication_creators',
+    'publication_organizations', 'publication_funders', 'publication_projects'
+]
+
+
+def _timestamp(value):
+    """Convert a datetime to a Unix timestamp, keeping None as is"""
+    return int(value.timestamp()) if value else value
+
+
+def _serialize_file(file, detailed: bool) -> Dict[str, Any]:
+    data = {
+        'id': file.id,
+        'title': file.title,
+        'description': file.description,
+        'publication_type_id': file.publication_type_id,
+        'file_name': file.file_name,
+        'file_type': file.file_type,
+        'file_url': file.file_url,
+        'identifier': file.identifier,
+        'generated_identifier': file.generated_identifier
+    }
+    if detailed:
+        data['handle_identifier'] = file.handle_identifier
+        data['external_identifier'] = file.external_identifier
+        data['external_identifier_type'] = file.external_identifier_type
+    return data
+
+
+def _serialize_document(doc, detailed: bool) -> Dict[str, Any]:
+    data = {
+        'id': doc.id,
+        'title': doc.title,
+        'description': doc.description,
+        'publication_type': doc.publication_type_id,
+        'file_url': doc.file_url,
+        'identifier': doc.identifier_type_id,
+        'generated_identifier': doc.generated_identifier
+    }
+    if detailed:
+        data['handle_identifier'] = doc.handle_identifier
+        data['external_identifier'] = doc.external_identifier
+        data['external_identifier_type'] = doc.external_identifier_type
+    return data
+
+
+def _serialize_creator(creator, detailed: bool) -> Dict[str, Any]:
+    data = {
+        'id': creator.id,
+        'family_name': creator.family_name,
+        'given_name': creator.given_name,
+        'identifier': creator.identifier,
+        'role': creator.role_id
+    }
+    if detailed:
+        data['identifier_type'] = creator.identifier_type
+    return data
+
+
+def _serialize_organization(org, detailed: bool) -> Dict[str, Any]:
+    data = {
+        'id': org.id,
+        'name': org.name,
+        'type': org.type,
+        'other_name': org.other_name,
+        'country': org.country
+    }
+    if detailed:
+        data['identifier'] = org.identifier
+        data['identifier_type'] = org.identifier_type
+    return data
+
+
+def _serialize_funder(funder, detailed: bool) -> Dict[str, Any]:
+    data = {
+        'id': funder.id,
+        'name': funder.name,
+        'type': funder.type,
+        'funder_type': funder.funder_type_id,
+        'other_name': funder.other_name,
+        'country': funder.country
+    }
+    if detailed:
+        data['identifier'] = funder.identifier
+        data['identifier_type'] = funder.identifier_type
+    return data
+
+
+def _serialize_project(project, detailed: bool) -> Dict[str, Any]:
+    data = {
+        'id': project.id,
+        'title': project.title,
+        'raid_id': project.raid_id,
+        'description': project.description
+    }
+    if detailed:
+        data['identifier'] = project.identifier
+        data['identifier_type'] = project.identifier_type
+    return data
+
+
+RELATION_SERIALIZERS = {
+    'publications_files': _serialize_file,
+    'publication_documents': _serialize_document,
+    'publication_creators': _serialize_creator,
+    'publication_organizations': _serialize_organization,
+    'publication_funders': _serialize_funder,
+    'publication_projects': _serialize_project,
+}
+
+
+def parse_fields(raw: Optional[str], detailed: bool = False) -> Optional[Set[str]]:
+    """
+    Parse a comma-separated field projection such as "id,document_title,publication_creators".
+
+    Args:
+        raw: The raw value of the ``fields`` query parameter
+        detailed: Whether edit-only fields are allowed in the projection
+
+    Returns:
+        The set of requested fields, or None when every field is requested
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not raw:
+        return None
+    fields = {field.strip() for field in raw.split(',') if field.strip()}
+    allowed = set(PUBLICATION_FIELDS) | set(PUBLICATION_RELATIONS)
+    if detailed:
+        allowed |= set(PUBLICATION_EDIT_FIELDS)
+    unknown = fields - allowed
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields or None
+
+
+def _requested_relations(fields: Optional[Iterable[str]]):
+    if fields is None:
+        return list(PUBLICATION_RELATIONS)
+    return [relation for relation in PUBLICATION_RELATIONS if relation in fields]
+
+
+def load_publication(fields: Optional[Set[str]] = None, **filters) -> Optional[Publications]:
+    """
+    Load a single publication with the related collections it will be serialized with.
+
+    Each collection is fetched with its own SELECT ... WHERE publication_id IN (...)
+    instead of being joined onto the publication row, so records with many creators
+    or files do not multiply into a cartesian product.
+
+    Args:
+        fields: Optional projection; only the requested collections are loaded
+        **filters: Column filters passed to filter_by (e.g. id=..., document_docid=...)
+
+    Returns:
+        The publication, or None if no publication matches
+    """
+    options = [
+        selectinload(getattr(Publications, relation))
+        for relation in _requested_relations(fields)
+    ]
+    return Publications.query.options(*options).filter_by(**filters).first()
+
+
+def serialize_publication(publication: Publications, fields: Optional[Set[str]] = None,
+                          detailed: bool = False) -> Dict[str, Any]:
+    """
+    Serialize a publication and its related records into the detail response shape.
+
+    Args:
+        publication: The publication, ideally returned by load_publication
+        fields: Optional projection of top-level fields and collections
+        detailed: Include edit-form fields (identifier details, updated_at/updated_by)
+
+    Returns:
+        Dict ready to be returned as JSON or converted with publication_to_xml
+    """
+    scalar_fields = PUBLICATION_FIELDS + (PUBLICATION_EDIT_FIELDS if detailed else [])
+    publication_dict = {}
+
+    for field in scalar_fields:
+        if fields is not None and field not in fields:
+            continue
+        value = getattr(publication, field)
+        if field in ('published', 'updated_at'):
+            value = _timestamp(value)
+        publication_dict[field] = value
+
+    for relation in _requested_relations(fields):
+        serializer = RELATION_SERIALIZERS[relation]
+        publication_dict[relation] = [
+            serializer(item, detailed) for item in getattr(publication, relation)
+        ]
+
+    return publication_dict
+
+
+def publication_to_xml(publication_dict: Dict[str, Any]) -> bytes:
+    """Convert a serialized publication into the XML document returned for type=xml"""
+    root = ET.Element("publication")
+    for key, value in publication_dict.items():
+        if isinstance(value, list):
+            list_root = ET.SubElement(root, key)
+            for item in value:
+                item_root = ET.SubElement(list_root, "item")
+                for k, v in item.items():
+                    ET.SubElement(item_root, k).text = str(v)
+        else:
+            ET.SubElement(root, key).text = str(value)
+
+    return ET.tostring(root, encoding='utf-8')
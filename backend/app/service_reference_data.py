@@ -0,0 +1,154 @@
+"""
+In-process registry of the small reference tables (resource types, publication types,
+identifier types, creator roles, funder types and creator identifiers).
+
+The tables are loaded once per worker and kept as plain read-only rows, so validating
+a publish with dozens of files or creators does not issue a query per row. The
+snapshot is reloaded after REFERENCE_DATA_TTL seconds or when refresh() is called.
+"""
+import logging
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+
+from app.models import (
+    ResourceTypes, PublicationTypes, PublicationIdentifierTypes,
+    CreatorsRoles, FunderTypes, creatorsIdentifiers
+)
+
+logger = logging.getLogger(__name__)
+
+# Table name -> (model, columns each row is indexed by)
+REFERENCE_TABLES = {
+    'resource_types': (ResourceTypes, ('id', 'resource_type')),
+    'publication_types': (PublicationTypes, ('id',)),
+    'identifier_types': (PublicationIdentifierTypes, ('id',)),
+    'creators_roles': (CreatorsRoles, ('role_id', 'role_name')),
+    'funder_types': (FunderTypes, ('id',)),
+    'creators_identifiers': (creatorsIdentifiers, ('id',)),
+}
+
+
+def _detach(row) -> SimpleNamespace:
+    """Copy a reference row into a plain object that outlives the session it was loaded in"""
+    return SimpleNamespace(**{column.name: getattr(row, column.name) for column in row.__table__.columns})
+
+
+def _normalize(column: str, value: Any) -> Any:
+    """Coerce lookup values so '3' and 3 resolve to the same integer id"""
+    if column == 'id':
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return value
+
+
+class ReferenceDataRegistry:
+    """Per-worker snapshot of the reference tables with TTL-based refresh"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, List[SimpleNamespace]] = {}
+        self._indexes: Dict[str, Dict[str, Dict[Any, SimpleNamespace]]] = {}
+        self._loaded_at: Optional[float] = None
+
+    def _ttl(self) -> int:
+        try:
+            return current_app.config.get('REFERENCE_DATA_TTL', 300)
+        except RuntimeError:
+            return 300
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self._ttl()
+
+    def _load(self) -> None:
+        rows: Dict[str, List[SimpleNamespace]] = {}
+        indexes: Dict[str, Dict[str, Dict[Any, SimpleNamespace]]] = {}
+
+        for table, (model, keys) in REFERENCE_TABLES.items():
+            table_rows = [_detach(row) for row in model.query.order_by(model.id).all()]
+            rows[table] = table_rows
+            indexes[table] = {
+                key: {getattr(row, key): row for row in table_rows}
+                for key in keys
+            }
+
+        # Swap the whole snapshot at once so readers never see a half-loaded registry
+        self._rows, self._indexes = rows, indexes
+        self._loaded_at = time.monotonic()
+        logger.info(
+            "Reference data loaded: "
+            + ", ".join(f"{table}={len(table_rows)}" for table, table_rows in rows.items())
+        )
+
+    def _ensure_loaded(self) -> None:
+        if not self._is_stale():
+            return
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._is_stale():
+                self._load()
+
+    def refresh(self) -> None:
+        """Force the snapshot to reload on the next lookup"""
+        with self._lock:
+            self._loaded_at = None
+
+    def all(self, table: str) -> List[SimpleNamespace]:
+        """
+        Get every row of a reference table, ordered by id
+
+        Args:
+            table: One of the REFERENCE_TABLES names (e.g. 'publication_types')
+        """
+        self._ensure_loaded()
+        return list(self._rows[table])
+
+    def get(self, table: str, value: Any, by: str = 'id') -> Optional[SimpleNamespace]:
+        """
+        Look up a single reference row
+
+        Args:
+            table: One of the REFERENCE_TABLES names (e.g. 'publication_types')
+            value: The value to match
+            by: The indexed column to match on (defaults to 'id')
+
+        Returns:
+            The matching row, or None if it does not exist
+        """
+        if value is None:
+            return None
+        self._ensure_loaded()
+        return self._indexes[table][by].get(_normalize(by, value))
+
+    def resource_type(self, resource_type_id: Any) -> Optional[SimpleNamespace]:
+        return self.get('resource_types', resource_type_id)
+
+    def resource_type_by_name(self, name: str) -> Optional[SimpleNamespace]:
+        return self.get('resource_types', name, by='resource_type')
+
+    def publication_type(self, publication_type_id: Any) -> Optional[SimpleNamespace]:
+        return self.get('publication_types', publication_type_id)
+
+    def identifier_type(self, identifier_type_id: Any) -> Optional[SimpleNamespace]:
+        return self.get('identifier_types', identifier_type_id)
+
+    def creators_role(self, role_id: Any) -> Optional[SimpleNamespace]:
+        return self.get('creators_roles', role_id, by='role_id')
+
+    def creators_role_by_name(self, role_name: str) -> Optional[SimpleNamespace]:
+        return self.get('creators_roles', role_name, by='role_name')
+
+    def funder_type(self, funder_type_id: Any) -> Optional[SimpleNamespace]:
+        return self.get('funder_types', funder_type_id)
+
+    def creators_identifier(self, identifier_id: Any) -> Optional[SimpleNamespace]:
+        return self.get('creators_identifiers', identifier_id)
+
+
+# Singleton instance shared by routes and scripts running in this worker
+reference_data = ReferenceDataRegistry()
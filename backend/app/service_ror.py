@@ -0,0 +1,173 @@
+"""
+Cached access to the ROR organization API.
+
+Search pages are cached by (normalized query, page) and organization records by ROR id,
+in a bounded per-worker LRU in front of the shared cache (Redis in production), both
+expiring after ROR_CACHE_TTL seconds. Filters such as country are applied by the callers
+to the cached page, so one upstream page serves every filtered variant of a query.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import current_app
+
+from app import cache
+from app.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+ROR_API_URL = "https://api.ror.org/"
+
+ROR_URL_PREFIXES = ('https://ror.org/', 'http://ror.org/')
+
+
+class LruTtlCache:
+    """Bounded per-worker LRU whose entries also expire after a TTL"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, ttl: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _config(key: str, default: int) -> int:
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+_local_cache: Optional[LruTtlCache] = None
+
+
+def _local() -> LruTtlCache:
+    """Per-worker LRU, sized from the app config on first use"""
+    global _local_cache
+    if _local_cache is None:
+        _local_cache = LruTtlCache(_config('ROR_CACHE_MAX_ENTRIES', 500))
+    return _local_cache
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """Collapse whitespace and case so 'Univ  of Nairobi' and 'univ of nairobi' share a cache entry"""
+    return ' '.join((query or '').split()).casefold()
+
+
+def normalize_ror_id(ror_id: str) -> str:
+    """Bare lowercase ROR id from either the id or the full https://ror.org/ URL"""
+    ror_id = ror_id.strip()
+    for prefix in ROR_URL_PREFIXES:
+        if ror_id.startswith(prefix):
+            ror_id = ror_id[len(prefix):]
+    return ror_id.lower()
+
+
+def _read(key: str, ttl: int) -> Optional[Dict[str, Any]]:
+    data = _local().get(key, ttl)
+    if data is not None:
+        return data
+    try:
+        data = cache.get(key)
+    except Exception as e:
+        logger.warning(f"ROR cache read failed for {key}: {e}")
+        return None
+    if data is not None:
+        _local().set(key, data)
+    return data
+
+
+def _write(key: str, data: Dict[str, Any], ttl: int) -> None:
+    _local().set(key, data)
+    try:
+        cache.set(key, data, timeout=ttl)
+    except Exception as e:
+        logger.warning(f"ROR cache write failed for {key}: {e}")
+
+
+def _cached_get(key: str, url: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """
+    Return a ROR API document from the cache, or fetch and cache it
+
+    Returns:
+        Tuple of (status code, parsed JSON or None when the status is not 200)
+
+    Raises:
+        ValueError: ROR answered 200 with a body that is not JSON
+    """
+    ttl = _config('ROR_CACHE_TTL', 3600)
+    data = _read(key, ttl)
+    if data is not None:
+        return 200, data
+
+    response = http_client.get(url, stale_if_error=True)
+    if response.status_code != 200:
+        return response.status_code, None
+    data = response.json()
+
+    # Stale fallbacks and query errors are served but not cached
+    if not getattr(response, 'stale', False) and 'errors' not in data:
+        _write(key, data, ttl)
+    return 200, data
+
+
+def search_organizations(query: Optional[str], page: Any = 1) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """One page of ROR search results for a free-text query"""
+    query = normalize_query(query)
+    try:
+        page = max(int(page or 1), 1)
+    except (TypeError, ValueError):
+        page = 1
+
+    digest = hashlib.sha1(query.encode('utf-8')).hexdigest()
+    url = f"{ROR_API_URL}organizations?{urlencode({'query': query, 'page': page})}"
+    return _cached_get(f"ror:search:{page}:{digest}", url)
+
+
+def get_organization(ror_id: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """A ROR organization record by id"""
+    ror_id = normalize_ror_id(ror_id)
+    return _cached_get(f"ror:organization:{ror_id}", f"{ROR_API_URL}organizations/{ror_id}")
+
+
+def organization_country(item: Dict[str, Any]) -> Optional[str]:
+    """Country name of a ROR record (v2 locations, or v1 country)"""
+    locations = item.get('locations') or []
+    if locations and locations[0].get('geonames_details'):
+        return locations[0]['geonames_details'].get('country_name')
+    return (item.get('country') or {}).get('country_name')
+
+
+def filter_by_country(items: List[Dict[str, Any]], country: Optional[str]) -> List[Dict[str, Any]]:
+    """Records located in `country` (case-insensitive); all records when no country is given"""
+    if not country:
+        return items
+    country = country.strip().casefold()
+    return [item for item in items if (organization_country(item) or '').casefold() == country]
@@ -0,0 +1,301 @@
+"""
+Local index of the ROR registry, loaded from the published ROR data dump.
+
+ROR publishes the whole registry on Zenodo as a zip holding one JSON array per schema
+version. import_dump() replaces ror_organizations with the schema v2 records and fills
+ror_organization_terms with every normalized name, alias, acronym and label (kind
+'name') and every word of them (kind 'token'). search_local() then answers prefix,
+token and alias searches with a country filter from indexed LIKE 'prefix%' lookups,
+and get_local() returns a record by id, without calling api.ror.org.
+
+With ROR_LOCAL_FIRST enabled and a dump imported, the ROR routes use this index first.
+refresh() downloads and imports a newer dump; run it periodically with
+import_ror_dump.py or the refresh_ror_dump_async task.
+"""
+import json
+import logging
+import os
+import re
+import unicodedata
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import case, delete, func, insert, intersect, literal, or_, select, union_all
+
+from app import db
+from app.http_client import http_client
+from app.models import RorOrganization, RorOrganizationTerm
+from app.service_ror import normalize_ror_id
+
+logger = logging.getLogger(__name__)
+
+# Zenodo community where ROR publishes its data dumps, newest first
+ROR_DUMP_RECORDS_URL = 'https://zenodo.org/api/communities/ror-data/records?sort=newest&size=1'
+
+# (connect, read) seconds for downloading a dump of a few hundred MB
+DUMP_DOWNLOAD_TIMEOUT = (3.05, 300)
+
+NAME = 'name'
+TOKEN = 'token'
+
+# Words shorter than this are only matched as part of a whole-name prefix
+MIN_TOKEN_LENGTH = 2
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_term(text: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation: 'Université  d'Abomey-Calavi' -> 'universite d abomey calavi'"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(_NON_WORD.sub(' ', stripped.casefold()).split())
+
+
+def _like_prefix(term: str) -> str:
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{escaped}%"
+
+
+def _record_row(record: Dict[str, Any], version: str, imported_at: datetime) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Build the ror_organizations row of a schema v2 record and list its names
+
+    Raises:
+        ValueError: The record is not in ROR schema v2
+    """
+    names = record.get('names')
+    if names is None:
+        raise ValueError("ROR dump must use schema v2 (use the *_schema_v2.json file of the dump)")
+
+    display_name = next(
+        (name.get('value') for name in names if 'ror_display' in name.get('types', [])),
+        names[0].get('value') if names else ''
+    )
+    locations = record.get('locations') or []
+    geonames = locations[0].get('geonames_details', {}) if locations else {}
+    row = {
+        'ror_id': normalize_ror_id(record['id']),
+        'display_name': (display_name or '')[:500],
+        'country_name': geonames.get('country_name'),
+        'country_code': geonames.get('country_code'),
+        'status': record.get('status'),
+        'record': record,
+        'dump_version': version,
+        'imported_at': imported_at,
+    }
+    return row, [name.get('value') for name in names if name.get('value')]
+
+
+def _term_rows(ror_id: str, names: List[str]) -> List[Dict[str, str]]:
+    terms = set()
+    for name in names:
+        normalized = normalize_term(name)[:500]
+        if not normalized:
+            continue
+        terms.add((NAME, normalized))
+        terms.update((TOKEN, word) for word in normalized.split())
+    return [{'ror_id': ror_id, 'kind': kind, 'term': term} for kind, term in terms]
+
+
+def dump_version(path: str) -> str:
+    """Dump version from its file name, e.g. v1.55-2024-10-31-ror-data"""
+    name = os.path.basename(path)
+    for suffix in ('.zip', '.json', '_schema_v2'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def read_dump(path: str) -> List[Dict[str, Any]]:
+    """
+    Load the records of a ROR dump given as the published zip or an extracted JSON file
+
+    From a zip the schema v2 file is used when the dump ships both schema versions.
+    """
+    if not zipfile.is_zipfile(path):
+        with open(path, encoding='utf-8') as dump:
+            return json.load(dump)
+
+    with zipfile.ZipFile(path) as archive:
+        members = [name for name in archive.namelist() if name.endswith('.json')]
+        if not members:
+            raise ValueError(f"No JSON file found in {path}")
+        member = next((name for name in members if name.endswith('_schema_v2.json')), members[0])
+        with archive.open(member) as dump:
+            return json.load(dump)
+
+
+def _batches(rows: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def import_dump(path: str, version: Optional[str] = None, batch_size: int = 1000) -> int:
+    """
+    Replace the local ROR index with the contents of a dump.
+
+    The old rows are deleted and the new ones inserted in one transaction, so readers
+    keep seeing the previous dump until the import commits.
+
+    Returns:
+        Number of organizations imported
+    """
+    version = version or dump_version(path)
+    records = read_dump(path)
+    imported_at = datetime.utcnow()
+    logger.info(f"Importing {len(records)} ROR organizations from {path} ({version})")
+
+    organizations, terms = [], []
+    for record in records:
+        row, names = _record_row(record, version, imported_at)
+        organizations.append(row)
+        terms.extend(_term_rows(row['ror_id'], names))
+
+    try:
+        db.session.execute(delete(RorOrganizationTerm))
+        db.session.execute(delete(RorOrganization))
+        for batch in _batches(organizations, batch_size):
+            db.session.execute(insert(RorOrganization), batch)
+        for batch in _batches(terms, batch_size * 10):
+            db.session.execute(insert(RorOrganizationTerm), batch)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"Imported {len(organizations)} ROR organizations with {len(terms)} search terms ({version})")
+    return len(organizations)
+
+
+def current_dump_version() -> Optional[str]:
+    """Version of the imported dump, or None if none has been imported"""
+    return db.session.scalar(select(RorOrganization.dump_version).limit(1))
+
+
+def latest_dump() -> Tuple[str, str]:
+    """
+    Find the newest dump published on Zenodo
+
+    Returns:
+        Tuple of (download URL, file name)
+    """
+    response = http_client.get(ROR_DUMP_RECORDS_URL)
+    response.raise_for_status()
+    dump_file = response.json()['hits']['hits'][0]['files'][0]
+    return dump_file['links']['self'], dump_file['key']
+
+
+def download_dump(url: str, filename: str, dest_dir: str) -> str:
+    """Download a dump into dest_dir and return its path"""
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, filename)
+    partial_path = f"{path}.partial"
+
+    response = http_client.get(url, stream=True, timeout=DUMP_DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    with open(partial_path, 'wb') as dump:
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            dump.write(chunk)
+
+    # Only a complete download gets the final name
+    os.replace(partial_path, path)
+    return path
+
+
+def refresh(dest_dir: Optional[str] = None, force: bool = False) -> int:
+    """
+    Import the newest published dump unless it is already imported
+
+    Returns:
+        Number of organizations imported (0 when the local index is already current)
+    """
+    dest_dir = dest_dir or current_app.config.get('ROR_DUMP_DIR', 'data/ror')
+    url, filename = latest_dump()
+    version = dump_version(filename)
+    if not force and version == current_dump_version():
+        logger.info(f"Local ROR index is already at {version}")
+        return 0
+
+    path = os.path.join(dest_dir, filename)
+    if not os.path.exists(path):
+        logger.info(f"Downloading ROR dump {filename}")
+        path = download_dump(url, filename, dest_dir)
+    return import_dump(path, version)
+
+
+def local_index_ready() -> bool:
+    """Whether ROR lookups should be answered locally: ROR_LOCAL_FIRST is on and a dump is imported"""
+    if not current_app.config.get('ROR_LOCAL_FIRST', False):
+        return False
+    return db.session.scalar(select(RorOrganization.ror_id).limit(1)) is not None
+
+
+def get_local(ror_id: str) -> Optional[Dict[str, Any]]:
+    """Schema v2 record of an organization, or None if it is not in the local index"""
+    return db.session.scalar(
+        select(RorOrganization.record).where(RorOrganization.ror_id == normalize_ror_id(ror_id))
+    )
+
+
+def search_local(query: str, country: Optional[str] = None, page: Any = 1, per_page: int = 20) -> List[Dict[str, Any]]:
+    """
+    Search the local index, best matches first.
+
+    Exact names, aliases, acronyms and labels rank first, then names starting with the
+    query, then organizations having a word starting with each query word (so
+    'nairobi univ' finds 'University of Nairobi'). Active organizations and shorter
+    names win ties.
+
+    Args:
+        query: Free-text organization name
+        country: Country name or ISO 3166 alpha-2 code to restrict results to
+        page: 1-based page number
+        per_page: Page size
+
+    Returns:
+        List of schema v2 records
+    """
+    phrase = normalize_term(query)
+    if not phrase:
+        return []
+    try:
+        page = max(int(page or 1), 1)
+    except (TypeError, ValueError):
+        page = 1
+
+    name_hits = select(
+        RorOrganizationTerm.ror_id,
+        case((RorOrganizationTerm.term == phrase, 0), else_=1).label('rank')
+    ).where(RorOrganizationTerm.kind == NAME, RorOrganizationTerm.term.like(_like_prefix(phrase), escape='\\'))
+    matches = [name_hits]
+
+    words = [word for word in phrase.split() if len(word) >= MIN_TOKEN_LENGTH]
+    if words:
+        word_hits = [
+            select(RorOrganizationTerm.ror_id)
+            .where(RorOrganizationTerm.kind == TOKEN, RorOrganizationTerm.term.like(_like_prefix(word), escape='\\'))
+            for word in words
+        ]
+        every_word = (intersect(*word_hits) if len(word_hits) > 1 else word_hits[0]).subquery()
+        matches.append(select(every_word.c.ror_id, literal(2).label('rank')))
+
+    hits = union_all(*matches).subquery()
+    rank = func.min(hits.c.rank)
+    stmt = (
+        select(RorOrganization.record)
+        .join(hits, hits.c.ror_id == RorOrganization.ror_id)
+        .group_by(RorOrganization.ror_id)
+        .order_by(rank, RorOrganization.status != 'active', func.length(RorOrganization.display_name),
+                  RorOrganization.display_name)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    )
+    if country:
+        country = country.strip()
+        stmt = stmt.where(or_(
+            func.lower(RorOrganization.country_name) == country.lower(),
+            RorOrganization.country_code == country.upper()
+        ))
+    return list(db.session.scalars(stmt))
@@ -1,8 +1,7 @@
 """
 Celery tasks for asynchronous processing
 """
-from celery import Celery
-import subprocess
+from celery import Celery, Task
 import logging
 from datetime import datetime
 import os
@@ -14,7 +13,16 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from config import Config
 
 # Configure Celery
-celery = Celery('tasks', broker=Config.CELERY_BROKER_URL or 'redis://localhost:6379/0')
+celery = Celery(
+    'tasks',
+    broker=Config.CELERY_BROKER_URL or 'redis://localhost:6379/0',
+    backend=Config.CELERY_RESULT_BACKEND
+)
+celery.conf.update(
+    task_acks_late=True,  # Redeliver a push if the worker dies mid-task
+    worker_prefetch_multiplier=1,
+    result_expires=Config.CELERY_RESULT_EXPIRES
+)
 
 # Configure logging
 logging.basicConfig(
@@ -23,29 +31,115 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@celery.task
-def push_to_cordra_async(publication_id):
+# Flask app shared by every task in this worker process, created on first use
+_flask_app = None
+
+
+def get_flask_app():
+    """Create the Flask app once per worker so tasks reuse its DB pool and service clients"""
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app()
+    return _flask_app
+
+
+class FlaskTask(Task):
+    """Run the task body inside the worker's application context"""
+
+    def __call__(self, *args, **kwargs):
+        with get_flask_app().app_context():
+            return self.run(*args, **kwargs)
+
+
+class CordraPushError(Exception):
+    """Raised when some objects could not be pushed, so the task is retried"""
+
+
+@celery.task(
+    bind=True,
+    base=FlaskTask,
+    autoretry_for=(CordraPushError,),
+    retry_backoff=30,
+    retry_backoff_max=900,
+    retry_jitter=True,
+    max_retries=5
+)
+def push_to_cordra_async(self, publication_id):
     """
     Asynchronously push publication to CORDRA after a delay
     """
-    try:
-        logger.info(f"Starting CORDRA push for publication {publication_id}")
-        
-        # Run the update and push script
-        result = subprocess.run(
-            [sys.executable, 'update_and_push_to_cordra.py', '--publication-id', str(publication_id)],
-            capture_output=True,
-            text=True,
-            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    from app import db
+    from app.service_cordra_sync import push_publications
+    from update_all_cstr_identifiers import process_all_publications
+
+    logger.info(f"Starting CORDRA push for publication {publication_id} (attempt {self.request.retries + 1})")
+    started = datetime.utcnow()
+
+    # Make sure the publication's documents have CSTR identifiers before they are pushed
+    if not process_all_publications(engine=db.engine):
+        logger.warning(f"Some CSTR identifiers could not be registered before pushing publication {publication_id}")
+
+    stats = push_publications(publication_id)
+    stats['started_at'] = started.isoformat()
+
+    if stats['objects_failed']:
+        raise CordraPushError(
+            f"{stats['objects_failed']} of {stats['objects']} objects failed for publication {publication_id}"
         )
-        
-        if result.returncode == 0:
-            logger.info(f"Successfully pushed publication {publication_id} to CORDRA")
-        else:
-            logger.error(f"Failed to push publication {publication_id}: {result.stderr}")
-            
-        return result.returncode == 0
-        
+
+    logger.info(
+        f"Successfully pushed publication {publication_id} to CORDRA: "
+        f"{stats['objects']} objects pushed, {stats['objects_unchanged']} unchanged in {stats['elapsed']:.2f}s"
+    )
+    return stats
+
+
+@celery.task(base=FlaskTask)
+def assign_pending_handles_async(publication_id=None):
+    """
+    Fill in handles for files and documents saved as "handle pending" during publish,
+    then top the handle pool back up if it is running low
+    """
+    try:
+        from app.service_handle_pool import assign_pending_handles, pool_is_low, replenish_pool
+
+        assigned = assign_pending_handles(publication_id)
+        logger.info(f"Assigned {assigned} pending handles for publication {publication_id}")
+        if pool_is_low():
+            replenish_pool()
+        return assigned
+
+    except Exception as e:
+        logger.error(f"Error assigning pending handles for publication {publication_id}: {str(e)}")
+        return 0
+
+
+@celery.task(base=FlaskTask)
+def replenish_handle_pool_async(target=None):
+    """
+    Mint APA handles in CORDRA until the handle pool is back at its target size
+    """
+    try:
+        from app.service_handle_pool import replenish_pool
+
+        return replenish_pool(target)
+
+    except Exception as e:
+        logger.error(f"Error replenishing handle pool: {str(e)}")
+        return 0
+
+
+@celery.task(base=FlaskTask)
+def refresh_ror_dump_async(force=False):
+    """
+    Download and import the newest ROR data dump into the local ROR index if it is not imported yet
+    """
+    try:
+        from app.service_ror_local import refresh
+
+        return refresh(force=force)
+
     except Exception as e:
-        logger.error(f"Error pushing publication {publication_id} to CORDRA: {str(e)}")
-        return False
\ No newline at end of file
+        logger.error(f"Error refreshing local ROR index: {str(e)}")
+        return 0
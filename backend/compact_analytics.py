@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script to compact publication_views / file_downloads into hourly, daily and monthly rollups
+and to prune raw events and hourly rollups past their retention window
+Intended to run hourly via cron
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add the parent directory to system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from app import create_app
+    from app.service_analytics_rollups import compact, prune_raw_events, prune_hourly_rollups
+    from app.service_analytics_partitions import PARTITIONED_TABLES, is_partitioned, archive_partitions
+except ImportError as e:
+    print(f"Error: Could not import required modules: {e}")
+    sys.exit(1)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("logs/compact_analytics.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Compact closed hours, then apply the retention windows"""
+    parser = argparse.ArgumentParser(description='Compact analytics events into rollups')
+    parser.add_argument('--no-prune', action='store_true', help='Only compact; keep raw events and hourly rollups')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        try:
+            windows = compact()
+            logger.info(f"Compacted {windows} windows of analytics events")
+
+            if not args.no_prune:
+                raw_retention = app.config.get('ANALYTICS_RAW_RETENTION_DAYS', 0)
+                if raw_retention > 0:
+                    # Partitioned tables drop whole archived months instead of deleting rows
+                    if all(is_partitioned(table) for table in PARTITIONED_TABLES):
+                        archive_partitions(raw_retention)
+                    else:
+                        prune_raw_events(raw_retention)
+                prune_hourly_rollups(app.config.get('ANALYTICS_HOURLY_RETENTION_DAYS', 90))
+            return 0
+
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
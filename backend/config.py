@@ -18,6 +18,61 @@ class Config:
     CSTR_USERNAME = os.getenv('CSTR_USERNAME')
     APPLICATION_BASE_URL = os.getenv('APPLICATION_BASE_URL', 'http://localhost:5000')
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+    CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+    CELERY_RESULT_EXPIRES = int(os.getenv('CELERY_RESULT_EXPIRES', 86400))  # Keep task results for a day
+
+    # Handle pool (pre-minted APA handles claimed during publish)
+    HANDLE_POOL_TARGET = int(os.getenv('HANDLE_POOL_TARGET', 50))  # Unclaimed handles to keep minted
+    HANDLE_POOL_LOW_WATERMARK = int(os.getenv('HANDLE_POOL_LOW_WATERMARK', 10))  # Replenish when fewer remain
+
+    # Cache Configuration (flask_caching backend, e.g. 'simple' or 'RedisCache')
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'simple')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/1')
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 300))  # 5 minutes
+    DOCID_CACHE_TIMEOUT = int(os.getenv('DOCID_CACHE_TIMEOUT', 3600))  # Cached DocID resolutions, in seconds
+    DOCID_HTTP_MAX_AGE = int(os.getenv('DOCID_HTTP_MAX_AGE', 60))  # Cache-Control max-age for DocID resolutions
+    REFERENCE_DATA_TTL = int(os.getenv('REFERENCE_DATA_TTL', 300))  # Reload interval for in-process reference tables, in seconds
+    REFERENCE_LIST_MAX_AGE = int(os.getenv('REFERENCE_LIST_MAX_AGE', 86400))  # Cache-Control max-age for /get-list-* endpoints
+
+    # Analytics ingestion (view/download events are buffered and written in batches)
+    ANALYTICS_QUEUE_BACKEND = os.getenv('ANALYTICS_QUEUE_BACKEND', 'memory')  # 'memory' or 'redis'
+    ANALYTICS_REDIS_URL = os.getenv('ANALYTICS_REDIS_URL', 'redis://localhost:6379/1')
+    ANALYTICS_FLUSH_INTERVAL = int(os.getenv('ANALYTICS_FLUSH_INTERVAL', 5))  # Seconds between batch writes
+    ANALYTICS_FLUSH_SIZE = int(os.getenv('ANALYTICS_FLUSH_SIZE', 500))  # Events per INSERT batch
+    ANALYTICS_MAX_BUFFER = int(os.getenv('ANALYTICS_MAX_BUFFER', 100000))  # In-memory queue bound per worker
+    ANALYTICS_DEDUPE_WINDOW = int(os.getenv('ANALYTICS_DEDUPE_WINDOW', 1800))  # Seconds a visitor's repeat hits count once; 0 disables
+    ANALYTICS_DEDUPE_MAX_KEYS = int(os.getenv('ANALYTICS_DEDUPE_MAX_KEYS', 100000))  # In-memory dedupe LRU bound per worker
+    ANALYTICS_BOT_PATTERNS = os.getenv('ANALYTICS_BOT_PATTERNS', '')  # Extra comma-separated user-agent regexes to drop
+    TRUSTED_PROXIES = os.getenv('TRUSTED_PROXIES', '127.0.0.1,::1')  # Comma-separated proxy IPs/CIDRs (e.g. the Next.js server) whose X-Forwarded-For and X-Client-User-Agent are trusted
+    ANALYTICS_COMPACTION_LOOKBACK_HOURS = int(os.getenv('ANALYTICS_COMPACTION_LOOKBACK_HOURS', 3))  # Hours recompacted each run for late events
+    ANALYTICS_RAW_RETENTION_DAYS = int(os.getenv('ANALYTICS_RAW_RETENTION_DAYS', 0))  # Delete compacted raw events after this; 0 keeps them
+    ANALYTICS_HOURLY_RETENTION_DAYS = int(os.getenv('ANALYTICS_HOURLY_RETENTION_DAYS', 90))  # Hourly rollups kept; daily/monthly are kept forever
+    ANALYTICS_PARTITIONS_AHEAD = int(os.getenv('ANALYTICS_PARTITIONS_AHEAD', 3))  # Monthly event partitions created ahead of time
+    ANALYTICS_ARCHIVE_DIR = os.getenv('ANALYTICS_ARCHIVE_DIR', 'archive/analytics')  # Gzipped CSVs of archived event partitions
+
+    # Outbound HTTP (shared client for ROR, ORCID, ISNI, Ringgold, ARKs, RAiD, CSTR, Local Contexts, Crossref)
+    OUTBOUND_CONNECT_TIMEOUT = float(os.getenv('OUTBOUND_CONNECT_TIMEOUT', 3.05))  # Seconds to establish a connection
+    OUTBOUND_READ_TIMEOUT = float(os.getenv('OUTBOUND_READ_TIMEOUT', 10))  # Seconds to wait for response data
+    OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', 2))  # Retries for connection errors and 429/5xx on GETs
+    OUTBOUND_BACKOFF_FACTOR = float(os.getenv('OUTBOUND_BACKOFF_FACTOR', 0.3))  # Exponential backoff base, plus jitter
+    OUTBOUND_POOL_SIZE = int(os.getenv('OUTBOUND_POOL_SIZE', 10))  # Keep-alive connections per upstream host
+    OUTBOUND_MAX_CONCURRENCY = int(os.getenv('OUTBOUND_MAX_CONCURRENCY', 8))  # In-flight requests per upstream host per worker
+    OUTBOUND_CONCURRENCY_LIMITS = os.getenv('OUTBOUND_CONCURRENCY_LIMITS', '')  # Per-host overrides, e.g. 'api.ror.org=4,pub.orcid.org=6'
+    OUTBOUND_QUEUE_TIMEOUT = float(os.getenv('OUTBOUND_QUEUE_TIMEOUT', 2))  # Seconds to wait for a free slot before failing fast
+    OUTBOUND_BREAKER_FAILURES = int(os.getenv('OUTBOUND_BREAKER_FAILURES', 5))  # Consecutive failures that open a host's circuit
+    OUTBOUND_BREAKER_RESET = float(os.getenv('OUTBOUND_BREAKER_RESET', 30))  # Seconds a circuit stays open before a half-open probe
+    OUTBOUND_STALE_TTL = int(os.getenv('OUTBOUND_STALE_TTL', 86400))  # Seconds the last good upstream response is kept as a fallback
+
+    # ROR organization cache (per-worker LRU in front of the shared CACHE_TYPE cache)
+    ROR_CACHE_TTL = int(os.getenv('ROR_CACHE_TTL', 3600))  # Seconds ROR search pages and records stay cached
+    ROR_CACHE_MAX_ENTRIES = int(os.getenv('ROR_CACHE_MAX_ENTRIES', 500))  # Per-worker LRU bound in front of the shared cache
+    ROR_LOCAL_FIRST = os.getenv('ROR_LOCAL_FIRST', 'False').lower() == 'true'  # Answer ROR lookups from the imported dump
+    ROR_DUMP_DIR = os.getenv('ROR_DUMP_DIR', 'data/ror')  # Where import_ror_dump.py downloads ROR data dumps
+
+    # ORCID record and search cache (shared CACHE_TYPE cache; upstream Cache-Control is honored)
+    ORCID_CACHE_TTL = int(os.getenv('ORCID_CACHE_TTL', 3600))  # Freshness when ORCID sends no max-age
+    ORCID_CACHE_MAX_TTL = int(os.getenv('ORCID_CACHE_MAX_TTL', 86400))  # Upper bound on upstream max-age
+    ORCID_CACHE_RETAIN = int(os.getenv('ORCID_CACHE_RETAIN', 604800))  # Seconds expired entries are kept for ETag revalidation
 
     # CORDRA Configuration
     CORDRA_BASE_URL = os.getenv('CORDRA_BASE_URL', 'https://cordra.kenet.or.ke/cordra')
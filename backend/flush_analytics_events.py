@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script to drain the shared analytics event queue into publication_views / file_downloads
+Only needed with ANALYTICS_QUEUE_BACKEND=redis when no web worker is running to flush it
+(e.g. during deploys); run via cron or manually
+"""
+
+import os
+import sys
+import logging
+
+# Add the parent directory to system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from app import create_app
+    from app.service_analytics import analytics_ingestor
+except ImportError as e:
+    print(f"Error: Could not import required modules: {e}")
+    sys.exit(1)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Write every queued analytics event"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            written = analytics_ingestor.flush()
+            logger.info(f"Wrote {written} analytics events")
+            return 0
+
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
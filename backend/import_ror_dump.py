@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script to load the ROR data dump into the local ROR organization index
+Without arguments it downloads and imports the newest dump published on Zenodo if it is
+not imported yet. Intended to run weekly via cron
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add the parent directory to system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from app import create_app
+    from app.service_ror_local import import_dump, refresh
+except ImportError as e:
+    print(f"Error: Could not import required modules: {e}")
+    sys.exit(1)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("logs/import_ror_dump.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Import a local dump file, or refresh from the newest published dump"""
+    parser = argparse.ArgumentParser(description='Import the ROR data dump into the local ROR index')
+    parser.add_argument('--file', help='Dump to import (.zip as published, or the extracted schema v2 .json)')
+    parser.add_argument('--force', action='store_true', help='Re-import even if the newest dump is already imported')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        try:
+            if args.file:
+                imported = import_dump(args.file)
+            else:
+                imported = refresh(force=args.force)
+            logger.info(f"Imported {imported} ROR organizations")
+            return 0
+
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Management command for the monthly partitions of publication_views / file_downloads
+  convert  - rebuild both tables as partitioned tables (migrations/partition_analytics_events.sql)
+  create   - create partitions for the coming months; run monthly via cron
+  archive  - archive compacted months older than ANALYTICS_RAW_RETENTION_DAYS to gzipped CSV and drop them
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add the parent directory to system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from app import create_app
+    from app.service_analytics_partitions import convert_tables, ensure_partitions, archive_partitions
+except ImportError as e:
+    print(f"Error: Could not import required modules: {e}")
+    sys.exit(1)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("logs/manage_analytics_partitions.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Run the requested partition maintenance action"""
+    parser = argparse.ArgumentParser(description='Manage monthly partitions of the analytics event tables')
+    parser.add_argument('action', choices=['convert', 'create', 'archive'])
+    parser.add_argument('--months-ahead', type=int, help='Future months to create (defaults to ANALYTICS_PARTITIONS_AHEAD)')
+    parser.add_argument('--retention-days', type=int, help='Archive months older than this (defaults to ANALYTICS_RAW_RETENTION_DAYS)')
+    parser.add_argument('--archive-dir', help='Directory for archived partitions (defaults to ANALYTICS_ARCHIVE_DIR)')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        try:
+            if args.action == 'convert':
+                convert_tables()
+                ensure_partitions(args.months_ahead or app.config.get('ANALYTICS_PARTITIONS_AHEAD', 3))
+
+            elif args.action == 'create':
+                created = ensure_partitions(args.months_ahead or app.config.get('ANALYTICS_PARTITIONS_AHEAD', 3))
+                logger.info(f"Created {len(created)} partitions")
+
+            elif args.action == 'archive':
+                retention_days = args.retention_days or app.config.get('ANALYTICS_RAW_RETENTION_DAYS', 0)
+                if retention_days <= 0:
+                    logger.error("Set --retention-days or ANALYTICS_RAW_RETENTION_DAYS to archive partitions")
+                    return 1
+                archived = archive_partitions(retention_days, args.archive_dir)
+                logger.info(f"Archived {len(archived)} partitions")
+
+            return 0
+
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
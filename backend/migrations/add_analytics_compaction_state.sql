@@ -0,0 +1,20 @@
+-- Migration: Add analytics compaction watermark table
+-- Date: 2026-10-16
+-- Description: Persists how far compact_analytics.py has compacted the raw events into analytics_rollups,
+-- so each run resumes from the end of the last compacted window instead of the newest non-empty hourly bucket
+
+CREATE TABLE IF NOT EXISTS analytics_compaction_state (
+    name VARCHAR(50) PRIMARY KEY,
+    watermark TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Resume existing installations from the newest hourly bucket already compacted
+INSERT INTO analytics_compaction_state (name, watermark)
+SELECT 'rollups', MAX(bucket_start) + INTERVAL '1 hour'
+FROM analytics_rollups
+WHERE granularity = 'hour'
+HAVING MAX(bucket_start) IS NOT NULL
+ON CONFLICT (name) DO NOTHING;
+
+COMMENT ON TABLE analytics_compaction_state IS 'High-water marks of raw analytics events compacted into the rollups';
@@ -0,0 +1,63 @@
+-- Migration: Add pre-aggregated analytics counters
+-- Date: 2026-10-16
+-- Description: Running totals and daily buckets of views and downloads per publication, file and document,
+-- incremented by the analytics ingestor so the stats endpoints no longer COUNT(*) the raw event tables.
+-- Run before deploying the code that reads the counters; the backfill below seeds them from existing events.
+
+CREATE TABLE IF NOT EXISTS analytics_counter_totals (
+    subject_type VARCHAR(20) NOT NULL,
+    subject_id INTEGER NOT NULL,
+    metric VARCHAR(20) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (subject_type, subject_id, metric)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_counter_daily (
+    subject_type VARCHAR(20) NOT NULL,
+    subject_id INTEGER NOT NULL,
+    metric VARCHAR(20) NOT NULL,
+    day DATE NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (subject_type, subject_id, metric, day)
+);
+
+-- Backfill daily buckets from the raw event tables
+INSERT INTO analytics_counter_daily (subject_type, subject_id, metric, day, count)
+SELECT 'publication', publication_id, 'views', viewed_at::date, COUNT(*)
+FROM publication_views
+GROUP BY publication_id, viewed_at::date
+ON CONFLICT DO NOTHING;
+
+INSERT INTO analytics_counter_daily (subject_type, subject_id, metric, day, count)
+SELECT 'file', publication_file_id, 'downloads', downloaded_at::date, COUNT(*)
+FROM file_downloads
+WHERE publication_file_id IS NOT NULL
+GROUP BY publication_file_id, downloaded_at::date
+ON CONFLICT DO NOTHING;
+
+INSERT INTO analytics_counter_daily (subject_type, subject_id, metric, day, count)
+SELECT 'document', publication_document_id, 'downloads', downloaded_at::date, COUNT(*)
+FROM file_downloads
+WHERE publication_document_id IS NOT NULL
+GROUP BY publication_document_id, downloaded_at::date
+ON CONFLICT DO NOTHING;
+
+INSERT INTO analytics_counter_daily (subject_type, subject_id, metric, day, count)
+SELECT 'publication', COALESCE(pf.publication_id, pd.publication_id), 'downloads', fd.downloaded_at::date, COUNT(*)
+FROM file_downloads fd
+LEFT JOIN publications_files pf ON pf.id = fd.publication_file_id
+LEFT JOIN publication_documents pd ON pd.id = fd.publication_document_id
+WHERE COALESCE(pf.publication_id, pd.publication_id) IS NOT NULL
+GROUP BY COALESCE(pf.publication_id, pd.publication_id), fd.downloaded_at::date
+ON CONFLICT DO NOTHING;
+
+-- Totals are the sum of the daily buckets
+INSERT INTO analytics_counter_totals (subject_type, subject_id, metric, count)
+SELECT subject_type, subject_id, metric, SUM(count)
+FROM analytics_counter_daily
+GROUP BY subject_type, subject_id, metric
+ON CONFLICT DO NOTHING;
+
+COMMENT ON TABLE analytics_counter_totals IS 'Running view/download totals per publication, file or document';
+COMMENT ON TABLE analytics_counter_daily IS 'View/download counts per publication, file or document and day';
@@ -0,0 +1,21 @@
+-- Migration: Add analytics rollups table
+-- Date: 2026-10-16
+-- Description: Hourly, daily and monthly view/download counts per publication, file and document,
+-- built from publication_views and file_downloads by compact_analytics.py. Serves the time-series and
+-- top-N endpoints and lets raw events older than ANALYTICS_RAW_RETENTION_DAYS be deleted.
+
+CREATE TABLE IF NOT EXISTS analytics_rollups (
+    granularity VARCHAR(10) NOT NULL,
+    subject_type VARCHAR(20) NOT NULL,
+    subject_id INTEGER NOT NULL,
+    metric VARCHAR(20) NOT NULL,
+    bucket_start TIMESTAMP NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, subject_type, subject_id, metric, bucket_start)
+);
+
+-- Top-N leaderboards scan one granularity and period across all subjects
+CREATE INDEX IF NOT EXISTS ix_analytics_rollups_leaderboard
+    ON analytics_rollups(granularity, subject_type, metric, bucket_start);
+
+COMMENT ON TABLE analytics_rollups IS 'View/download counts per hour, day and month, compacted from the raw event tables';
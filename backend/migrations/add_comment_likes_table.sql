@@ -0,0 +1,15 @@
+-- Migration: Add comment_likes table
+-- Date: 2026-10-16
+-- Description: One row per (comment, user) like so a user can like a comment only once; likes_count on
+-- publication_comments is kept in step with atomic increments/decrements
+
+CREATE TABLE IF NOT EXISTS comment_likes (
+    comment_id INTEGER NOT NULL REFERENCES publication_comments(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES user_accounts(user_id) ON DELETE CASCADE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (comment_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_comment_likes_user_id ON comment_likes(user_id);
+
+COMMENT ON TABLE comment_likes IS 'Users who liked each publication comment';
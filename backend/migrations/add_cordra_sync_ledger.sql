@@ -0,0 +1,26 @@
+-- Migration: Add CORDRA sync ledger and watermark tables
+-- Date: 2026-10-16
+-- Description: Stores the content hash last pushed for each CORDRA object and a high-water mark on
+-- publication changes, so push_to_cordra.py only sends objects whose payload changed
+
+CREATE TABLE IF NOT EXISTS cordra_sync_ledger (
+    handle VARCHAR(255) PRIMARY KEY,
+    publication_id INTEGER NOT NULL REFERENCES publications(id) ON DELETE CASCADE,
+    content_hash VARCHAR(64) NOT NULL,
+    pushed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_cordra_sync_ledger_publication_id ON cordra_sync_ledger(publication_id);
+
+CREATE TABLE IF NOT EXISTS cordra_sync_state (
+    name VARCHAR(50) PRIMARY KEY,
+    watermark TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Candidate selection filters on the latest change of each publication
+CREATE INDEX IF NOT EXISTS idx_publications_last_change
+    ON publications ((COALESCE(updated_at, published)));
+
+COMMENT ON TABLE cordra_sync_ledger IS 'SHA-256 of the payload last pushed to CORDRA per object handle';
+COMMENT ON TABLE cordra_sync_state IS 'High-water marks on publication changes for incremental CORDRA syncs';
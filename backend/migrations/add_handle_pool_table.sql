@@ -0,0 +1,24 @@
+-- Migration: Add handle_pool table for pre-minted APA handles
+-- Date: 2026-10-16
+-- Description: Stores handles minted in CORDRA ahead of time so publish can claim one without
+-- calling CORDRA. Rows with an external DOI but no handle_identifier are "handle pending" and
+-- are filled in by the assign_pending_handles task.
+
+CREATE TABLE IF NOT EXISTS handle_pool (
+    id SERIAL PRIMARY KEY,
+    handle VARCHAR(100) NOT NULL UNIQUE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claimed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_handle_pool_claimed_at ON handle_pool(claimed_at);
+
+-- Partial indexes for finding rows whose handle is still pending
+CREATE INDEX IF NOT EXISTS idx_publications_files_handle_pending
+    ON publications_files(publication_id)
+    WHERE handle_identifier IS NULL AND external_identifier_type = 'DOI';
+CREATE INDEX IF NOT EXISTS idx_publication_documents_handle_pending
+    ON publication_documents(publication_id)
+    WHERE handle_identifier IS NULL AND external_identifier_type = 'DOI';
+
+COMMENT ON TABLE handle_pool IS 'Pre-minted APA handles; claimed_at is set when a publication file or document takes one';
@@ -0,0 +1,8 @@
+-- Migration: Add comment thread index
+-- Date: 2026-10-16
+-- Description: Partial index backing keyset pagination of a publication's active top-level comments
+-- (newest first) in GET /api/publications/<id>/comments
+
+CREATE INDEX IF NOT EXISTS ix_publication_comments_thread
+    ON publication_comments (publication_id, created_at DESC, id DESC)
+    WHERE status = 'active' AND parent_comment_id IS NULL;
@@ -0,0 +1,8 @@
+-- Migration: Add user comment history index
+-- Date: 2026-10-16
+-- Description: Partial index backing keyset pagination of a user's active comments (newest first)
+-- in GET /api/users/<id>/comments
+
+CREATE INDEX IF NOT EXISTS ix_publication_comments_user_history
+    ON publication_comments (user_id, created_at DESC, id DESC)
+    WHERE status = 'active';
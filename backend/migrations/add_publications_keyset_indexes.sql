@@ -0,0 +1,7 @@
+-- Migration: Add composite indexes for keyset pagination on publications
+-- Date: 2026-10-16
+-- Description: Supports cursor pagination of /api/v1/publications/get-publications
+--              ordered by (published, id) or (document_title, id) without OFFSET scans
+
+CREATE INDEX IF NOT EXISTS ix_publications_published_id ON publications(published, id);
+CREATE INDEX IF NOT EXISTS ix_publications_document_title_id ON publications(document_title, id);
@@ -0,0 +1,31 @@
+-- Migration: Add local ROR organization index
+-- Date: 2026-10-16
+-- Description: Local copy of the ROR data dump (ror_organizations) and its normalized search terms
+-- (ror_organization_terms) so organization search and lookup can be answered without calling api.ror.org.
+-- Load or refresh with: python import_ror_dump.py
+
+CREATE TABLE IF NOT EXISTS ror_organizations (
+    ror_id VARCHAR(20) PRIMARY KEY,
+    display_name VARCHAR(500) NOT NULL,
+    country_name VARCHAR(100),
+    country_code VARCHAR(2),
+    status VARCHAR(20),
+    record JSON NOT NULL,
+    dump_version VARCHAR(100) NOT NULL,
+    imported_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_ror_organizations_country_code ON ror_organizations(country_code);
+
+CREATE TABLE IF NOT EXISTS ror_organization_terms (
+    ror_id VARCHAR(20) NOT NULL REFERENCES ror_organizations(ror_id) ON DELETE CASCADE,
+    kind VARCHAR(10) NOT NULL,
+    term VARCHAR(500) NOT NULL,
+    PRIMARY KEY (ror_id, kind, term)
+);
+
+-- text_pattern_ops lets LIKE 'prefix%' use the index regardless of the database collation
+CREATE INDEX IF NOT EXISTS ix_ror_organization_terms_prefix ON ror_organization_terms(kind, term text_pattern_ops);
+
+COMMENT ON TABLE ror_organizations IS 'Local copy of the ROR registry from the ROR data dump';
+COMMENT ON TABLE ror_organization_terms IS 'Normalized names (kind=name) and name words (kind=token) of ROR organizations';
@@ -0,0 +1,112 @@
+-- Migration: Partition publication_views and file_downloads by month
+-- Date: 2026-10-16
+-- Description: Rebuilds both raw analytics event tables as RANGE partitioned tables with one partition per
+-- month (publication_views_y2026m10, ...) plus a DEFAULT partition, and replaces the single-column indexes
+-- with composite (subject, timestamp) ones. Count and range queries then only touch the matching months,
+-- and old months can be archived and dropped whole (manage_analytics_partitions.py archive).
+-- Runs in one transaction; the tables are locked while rows are copied, so run it in a maintenance window.
+-- Apply with: python manage_analytics_partitions.py convert
+
+BEGIN;
+
+-- publication_views ------------------------------------------------------------------------------------
+
+ALTER TABLE publication_views RENAME TO publication_views_unpartitioned;
+ALTER TABLE publication_views_unpartitioned RENAME CONSTRAINT publication_views_pkey TO publication_views_unpartitioned_pkey;
+
+CREATE TABLE publication_views (
+    id INTEGER NOT NULL DEFAULT nextval('publication_views_id_seq'),
+    publication_id INTEGER NOT NULL REFERENCES publications(id),
+    user_id INTEGER REFERENCES user_accounts(user_id),
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    viewed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (id, viewed_at)
+) PARTITION BY RANGE (viewed_at);
+
+CREATE TABLE publication_views_default PARTITION OF publication_views DEFAULT;
+
+-- One partition per month from the oldest event to three months ahead
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE((SELECT MIN(viewed_at) FROM publication_views_unpartitioned), now())),
+            date_trunc('month', now()) + INTERVAL '3 months',
+            INTERVAL '1 month'
+        )::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF publication_views FOR VALUES FROM (%L) TO (%L)',
+            'publication_views_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+            month_start, (month_start + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO publication_views (id, publication_id, user_id, ip_address, user_agent, viewed_at)
+SELECT id, publication_id, user_id, ip_address, user_agent, viewed_at
+FROM publication_views_unpartitioned;
+
+-- Keep the id sequence alive when the old table is dropped
+ALTER SEQUENCE publication_views_id_seq OWNED BY publication_views.id;
+DROP TABLE publication_views_unpartitioned;
+
+CREATE INDEX ix_publication_views_publication_id_viewed_at ON publication_views (publication_id, viewed_at);
+CREATE INDEX ix_publication_views_user_id ON publication_views (user_id);
+CREATE INDEX ix_publication_views_viewed_at ON publication_views (viewed_at);
+
+-- file_downloads ---------------------------------------------------------------------------------------
+
+ALTER TABLE file_downloads RENAME TO file_downloads_unpartitioned;
+ALTER TABLE file_downloads_unpartitioned RENAME CONSTRAINT file_downloads_pkey TO file_downloads_unpartitioned_pkey;
+
+CREATE TABLE file_downloads (
+    id INTEGER NOT NULL DEFAULT nextval('file_downloads_id_seq'),
+    publication_file_id INTEGER REFERENCES publications_files(id),
+    publication_document_id INTEGER REFERENCES publication_documents(id),
+    user_id INTEGER REFERENCES user_accounts(user_id),
+    ip_address VARCHAR(45),
+    downloaded_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (id, downloaded_at)
+) PARTITION BY RANGE (downloaded_at);
+
+CREATE TABLE file_downloads_default PARTITION OF file_downloads DEFAULT;
+
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE((SELECT MIN(downloaded_at) FROM file_downloads_unpartitioned), now())),
+            date_trunc('month', now()) + INTERVAL '3 months',
+            INTERVAL '1 month'
+        )::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF file_downloads FOR VALUES FROM (%L) TO (%L)',
+            'file_downloads_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+            month_start, (month_start + INTERVAL '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO file_downloads (id, publication_file_id, publication_document_id, user_id, ip_address, downloaded_at)
+SELECT id, publication_file_id, publication_document_id, user_id, ip_address, downloaded_at
+FROM file_downloads_unpartitioned;
+
+ALTER SEQUENCE file_downloads_id_seq OWNED BY file_downloads.id;
+DROP TABLE file_downloads_unpartitioned;
+
+CREATE INDEX ix_file_downloads_publication_file_id_downloaded_at ON file_downloads (publication_file_id, downloaded_at);
+CREATE INDEX ix_file_downloads_publication_document_id_downloaded_at ON file_downloads (publication_document_id, downloaded_at);
+CREATE INDEX ix_file_downloads_user_id ON file_downloads (user_id);
+CREATE INDEX ix_file_downloads_downloaded_at ON file_downloads (downloaded_at);
+
+COMMENT ON TABLE publication_views IS 'Raw publication views, partitioned by month of viewed_at';
+COMMENT ON TABLE file_downloads IS 'Raw file/document downloads, partitioned by month of downloaded_at';
+
+COMMIT;
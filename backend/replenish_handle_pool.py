@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script to keep the pool of pre-minted APA handles full and to assign handles to
+publication files/documents that were saved as "handle pending"
+Intended to run every few minutes via cron
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add the parent directory to system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from app import create_app
+    from app.service_handle_pool import assign_pending_handles, available_handles, replenish_pool
+except ImportError as e:
+    print(f"Error: Could not import required modules: {e}")
+    sys.exit(1)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("logs/replenish_handle_pool.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    """Assign pending handles, then refill the handle pool"""
+    parser = argparse.ArgumentParser(description='Replenish the pre-minted APA handle pool')
+    parser.add_argument('--target', type=int, help='Number of unclaimed handles to keep (defaults to HANDLE_POOL_TARGET)')
+    parser.add_argument('--publication-id', type=int, help='Only assign pending handles for this publication')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        try:
+            assigned = assign_pending_handles(args.publication_id)
+            logger.info(f"Assigned {assigned} pending handles")
+
+            minted = replenish_pool(args.target)
+            logger.info(f"Minted {minted} handles, {available_handles()} available in pool")
+            return 0
+
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
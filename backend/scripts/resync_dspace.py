@@ -132,7 +132,7 @@ def resync_dspace_items():
             # Import sync function
             from app.service_dspace import DSpaceMetadataMapper
             from app.routes.dspace import save_publication_creators
-            from app.models import ResourceTypes
+            from app.service_reference_data import reference_data
 
             # Use a test user (you can change this)
             from app.models import UserAccount
@@ -168,7 +168,7 @@ def resync_dspace_items():
 
                     # Get resource type
                     resource_type_name = mapped_data['publication'].get('resource_type', 'Text')
-                    resource_type = ResourceTypes.query.filter_by(resource_type=resource_type_name).first()
+                    resource_type = reference_data.resource_type_by_name(resource_type_name)
                     resource_type_id = resource_type.id if resource_type else 1
 
                     # Create publication - use DSpace handle as document_docid
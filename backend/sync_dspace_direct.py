@@ -5,8 +5,9 @@ Bypasses API authentication for direct database access
 """
 
 from app import create_app, db
-from app.models import Publications, DSpaceMapping, ResourceTypes, UserAccount
+from app.models import Publications, DSpaceMapping, UserAccount
 from app.service_dspace import DSpaceClient, DSpaceMetadataMapper
+from app.service_reference_data import reference_data
 import sys
 
 # Configuration
@@ -112,7 +113,7 @@ def sync_dspace_items():
 
                 # Get resource type
                 resource_type_name = mapped_data['publication'].get('resource_type', 'Text')
-                resource_type = ResourceTypes.query.filter_by(resource_type=resource_type_name).first()
+                resource_type = reference_data.resource_type_by_name(resource_type_name)
                 resource_type_id = resource_type.id if resource_type else 1
 
                 # Generate DOCiD
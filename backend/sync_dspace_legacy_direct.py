@@ -7,8 +7,9 @@ Use this for bulk syncing from DSpace 6.x repositories.
 """
 
 from app import create_app, db
-from app.models import Publications, DSpaceMapping, ResourceTypes, UserAccount
+from app.models import Publications, DSpaceMapping, UserAccount
 from app.service_dspace_legacy import DSpaceLegacyClient, DSpaceLegacyMetadataMapper
+from app.service_reference_data import reference_data
 import sys
 
 # Configuration - UPDATE THESE FOR YOUR DSPACE LEGACY INSTANCE
@@ -130,7 +131,7 @@ def sync_dspace_legacy_items():
 
                 # Get resource type
                 resource_type_name = mapped_data['publication'].get('resource_type', 'Text')
-                resource_type = ResourceTypes.query.filter_by(resource_type=resource_type_name).first()
+                resource_type = reference_data.resource_type_by_name(resource_type_name)
                 resource_type_id = resource_type.id if resource_type else 1
 
                 # Generate DOCiD
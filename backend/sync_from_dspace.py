@@ -9,6 +9,7 @@ import sys
 from app import create_app, db
 from app.models import Publications, DSpaceMapping, UserAccount
 from app.service_dspace import DSpaceClient, DSpaceMetadataMapper
+from app.service_reference_data import reference_data
 import os
 
 # Configuration
@@ -97,9 +98,8 @@ def sync_items(pages=1, size=50, skip_existing=True):
                     mapped_data = DSpaceMetadataMapper.dspace_to_docid(full_item, DEFAULT_USER_ID)
 
                     # Get resource type ID (default to 1 for 'Text' if not found)
-                    from app.models import ResourceTypes
                     resource_type_name = mapped_data['publication'].get('resource_type', 'Text')
-                    resource_type = ResourceTypes.query.filter_by(resource_type=resource_type_name).first()
+                    resource_type = reference_data.resource_type_by_name(resource_type_name)
                     resource_type_id = resource_type.id if resource_type else 1
 
                     # Generate Handle-format DocID for DSpace items
@@ -0,0 +1,50 @@
+"""
+GET /api/comments/stats/<publication_id>
+"""
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app.routes import comments
+
+
+STATS = {
+    'total_comments': 3,
+    'top_level_comments': 2,
+    'replies': 1,
+    'unique_commenters': 2,
+    'total_likes': 4,
+    'comment_types': {'general': 3},
+}
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(comments.comments_bp)
+    return app.test_client()
+
+
+def _publications(found):
+    return SimpleNamespace(query=SimpleNamespace(get=lambda publication_id: object() if found else None))
+
+
+def test_comment_stats_returns_service_statistics(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(comments, 'Publications', _publications(found=True))
+    monkeypatch.setattr(comments, 'compute_comment_stats', lambda publication_id: calls.append(publication_id) or STATS)
+
+    response = client.get('/api/comments/stats/7')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'publication_id': 7, 'statistics': STATS}
+    assert calls == [7]
+
+
+def test_comment_stats_unknown_publication(client, monkeypatch):
+    monkeypatch.setattr(comments, 'Publications', _publications(found=False))
+
+    response = client.get('/api/comments/stats/7')
+
+    assert response.status_code == 404
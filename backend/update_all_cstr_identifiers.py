@@ -155,6 +155,13 @@ def update_publication_document(document_id, identifier, connection):
             'document_id': document_id
         })
         
+        # Mark the parent publication as changed so the incremental CORDRA sync picks it up
+        connection.execute(text("""
+            UPDATE publications 
+            SET updated_at = NOW() AT TIME ZONE 'UTC'
+            WHERE id = (SELECT publication_id FROM publication_documents WHERE id = :document_id)
+        """), {'document_id': document_id})
+        
         connection.commit()
         
         logger.info(f"Updated PublicationDocuments id={document_id} with identifier={identifier} ({result.rowcount} rows affected)")
@@ -173,16 +180,23 @@ def check_api_availability():
     except:
         return False
 
-def process_all_publications():
-    """Process all publication documents with NULL/blank identifier_cstr"""
+def process_all_publications(engine=None):
+    """
+    Process all publication documents with NULL/blank identifier_cstr
+
+    Args:
+        engine: Existing SQLAlchemy engine to reuse (e.g. db.engine inside a worker);
+            a new one is created from SQLALCHEMY_DATABASE_URI when omitted
+    """
     
-    # Create database connection
-    database_url = Config.SQLALCHEMY_DATABASE_URI
-    if not database_url:
-        logger.error("Database URL not configured")
-        return False
-        
-    engine = create_engine(database_url)
+    if engine is None:
+        # Create database connection
+        database_url = Config.SQLALCHEMY_DATABASE_URI
+        if not database_url:
+            logger.error("Database URL not configured")
+            return False
+            
+        engine = create_engine(database_url)
     
     with engine.connect() as connection:
         # Query for all publication documents with NULL identifier_cstr
@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import axios from 'axios';
+import { clientHeaders } from '@/utils/clientHeaders';
 
 const ANALYTICS_API_URL = process.env.BACKEND_API_URL || 'http://localhost:5001/api';
 
@@ -14,6 +15,7 @@ export async function POST(request, { params }) {
       {
         headers: {
           'Content-Type': 'application/json',
+          ...clientHeaders(request),
         },
       }
     );
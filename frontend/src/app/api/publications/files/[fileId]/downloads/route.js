@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import axios from 'axios';
+import { clientHeaders } from '@/utils/clientHeaders';
 
 export async function POST(request, { params }) {
   const { fileId } = (await params);
@@ -15,6 +16,7 @@ export async function POST(request, { params }) {
     const response = await axios.post(fullUrl, body, {
       headers: {
         'Content-Type': 'application/json',
+        ...clientHeaders(request),
       },
     });
 
@@ -0,0 +1,34 @@
+/**
+ * Headers that carry the browser's identity through a Next.js API route to the backend,
+ * so analytics can filter bots and dedupe visitors on the real client instead of this server.
+ *
+ * @param {Request} request - The incoming request of the API route
+ * @returns {Object} - X-Client-User-Agent and X-Forwarded-For headers, when known
+ */
+export const clientHeaders = (request) => {
+  const headers = {};
+
+  const userAgent = request.headers.get('user-agent');
+  if (userAgent) {
+    headers['X-Client-User-Agent'] = userAgent;
+  }
+
+  const chain = (request.headers.get('x-forwarded-for') || '')
+    .split(',')
+    .map((address) => address.trim())
+    .filter(Boolean);
+
+  // Route handlers do not see the socket address, so the connecting address is the one the
+  // reverse proxy in front of Next.js records in x-real-ip (overwriting anything the browser sent).
+  // Appending it last means the backend never takes a browser-supplied entry as the client.
+  const connectingAddress = request.headers.get('x-real-ip')?.trim();
+  if (connectingAddress && chain[chain.length - 1] !== connectingAddress) {
+    chain.push(connectingAddress);
+  }
+
+  if (chain.length) {
+    headers['X-Forwarded-For'] = chain.join(', ');
+  }
+
+  return headers;
+};